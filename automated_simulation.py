@@ -1,10 +1,16 @@
+import os
 import time
 import pygame
 import sys
-import random
-import heapq
-from utils.base_robot import Robot
-from utils.conflict_handler import ConflictDetector, ConflictResolver, Decision
+from utils.simulation_engine import SimulationEngine
+from utils.routing_table import RoutingTable
+from utils.sim_logging import configure_logging
+from utils.render_cache import RenderCache
+from utils.profiler import Profiler
+from utils.fleet_stats import FleetStats
+from utils.trace import TraceWriter
+from utils.scenario import save_scenario, load_scenario
+from utils.warehouse_map import WarehouseMap
 
 # Constants
 WIDTH, HEIGHT = 1000, 700
@@ -13,6 +19,7 @@ ROBOT_RADIUS = 8
 FPS = 60
 SPEED = 1
 GRID_SIZE = 40
+SCENARIO_FILE = "simulation_data.scn"
 
 ROBOT_COLORS = [
     (255, 0, 0),      # Red
@@ -35,6 +42,11 @@ GREEN = (0, 255, 0)
 BLACK = (0, 0, 0)
 LIGHT_GREY = (220, 220, 220)
 
+# Console level comes from FMS_LOG_LEVEL; the 'd' dump keeps the same records unless
+# FMS_LOG_RING asks for more (e.g. DEBUG for the recent decisions, at the cost of logging them all)
+ring_buffer = configure_logging(os.environ.get("FMS_LOG_LEVEL") or "WARNING", ring_buffer_size=5000,
+                                ring_buffer_level=os.environ.get("FMS_LOG_RING"))
+
 pygame.init()
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("Automated Robot Simulation")
@@ -42,121 +54,6 @@ clock = pygame.time.Clock()
 
 font = pygame.font.SysFont(None, 24)
 
-# Function to generate grid nodes
-def generate_grid_nodes(cols=10, rows=10):
-    nodes = {}
-    node_id = 0
-    
-    # Calculate spacing to fit grid within screen dimensions
-    # Leave some margin around the edges
-    margin = 50
-    available_width = WIDTH - (2 * margin)
-    available_height = HEIGHT - (2 * margin)
-    
-    # Calculate spacing between nodes
-    x_spacing = available_width / (cols - 1) if cols > 1 else available_width
-    y_spacing = available_height / (rows - 1) if rows > 1 else available_height
-    
-    # Start positions - centered in screen
-    start_x = margin
-    start_y = margin
-    
-    for y in range(rows):
-        for x in range(cols):
-            nodes[node_id] = (start_x + x * x_spacing, start_y + y * y_spacing)
-            node_id += 1
-            
-    return nodes
-
-# Function to generate edges between nodes
-def generate_edges(nodes, cols=10, rows=10):
-    edges = {}
-    
-    for node_id in nodes:
-        edges[node_id] = []
-        
-        # Check right neighbor
-        if (node_id + 1) % cols != 0 and node_id + 1 < len(nodes):
-            edges[node_id].append(node_id + 1)
-            
-        # Check left neighbor
-        if node_id % cols != 0 and node_id - 1 >= 0:
-            edges[node_id].append(node_id - 1)
-            
-        # Check down neighbor
-        if node_id + cols < len(nodes):
-            edges[node_id].append(node_id + cols)
-            
-        # Check up neighbor
-        if node_id - cols >= 0:
-            edges[node_id].append(node_id - cols)
-            
-    return edges
-
-# Dijkstra's algorithm for path planning
-def find_path(start, goal, edges):
-    if start == goal:
-        return [start]
-        
-    open_set = [(0, start)]
-    closed_set = set()
-    g_score = {start: 0}
-    came_from = {}
-    
-    while open_set:
-        current_g, current = heapq.heappop(open_set)
-        
-        if current == goal:
-            # Reconstruct path
-            path = [current]
-            while current in came_from:
-                current = came_from[current]
-                path.append(current)
-            return path[::-1]  # Reverse path
-            
-        closed_set.add(current)
-        
-        for neighbor in edges[current]:
-            if neighbor in closed_set:
-                continue
-                
-            tentative_g = g_score[current] + 1  # Cost is 1 for grid movement
-            
-            if neighbor not in g_score or tentative_g < g_score[neighbor]:
-                came_from[neighbor] = current
-                g_score[neighbor] = tentative_g
-                f_score = tentative_g  # No heuristic, so f = g
-                
-                # Check if in open set
-                in_open_set = False
-                for i, (_, node) in enumerate(open_set):
-                    if node == neighbor:
-                        in_open_set = True
-                        break
-                        
-                if not in_open_set:
-                    heapq.heappush(open_set, (f_score, neighbor))
-                    
-    return []  # No path found
-
-# Generate random goal for a robot
-def generate_random_goal(robot, nodes, edges, occupied_nodes):
-    available_nodes = list(set(nodes.keys()) - set(occupied_nodes))
-    
-    if not available_nodes:
-        return False
-        
-    goal_node = random.choice(available_nodes)
-    
-    # Find path from current node to goal
-    if robot.current_node is not None:
-        path = find_path(robot.current_node, goal_node, edges)
-        if path:
-            robot.handle_path(path)
-            return True
-            
-    return False
-
 # Draw functions
 def draw_grid():
     for x in range(0, WIDTH, GRID_SIZE):
@@ -164,18 +61,23 @@ def draw_grid():
     for y in range(0, HEIGHT, GRID_SIZE):
         pygame.draw.line(screen, LIGHT_GREY, (0, y), (WIDTH, y))
 
-def draw():
-    screen.fill(WHITE)
+def draw_static(surface):
+    # The map never changes while the simulation runs, so it is drawn once
+    surface.fill(WHITE)
     # draw_grid()
 
-    # Draw nodes and edges
+    # Draw nodes
     for node_id, pos in nodes.items():
-        pygame.draw.circle(screen, BLUE, pos, NODE_RADIUS)
+        pygame.draw.circle(surface, BLUE, pos, NODE_RADIUS)
         
     # Draw edges
     for node_id, neighbors in edges.items():
         for neighbor in neighbors:
-            pygame.draw.line(screen, LIGHT_GREY, nodes[node_id], nodes[neighbor], 1)
+            pygame.draw.line(surface, LIGHT_GREY, nodes[node_id], nodes[neighbor], 1)
+
+def draw():
+    render_cache.begin_frame()
+    mark = render_cache.mark
 
     # Draw robots and their paths
     for i, robot in enumerate(robots):
@@ -186,80 +88,122 @@ def draw():
             path_points = [nodes[node_id] for node_id in robot.full_path]
             
             if len(path_points) >= 2:
-                pygame.draw.lines(screen, color, False, path_points, 2)
+                mark(pygame.draw.lines(screen, color, False, path_points, 2))
             
                 # Highlight start and goal
-                pygame.draw.circle(screen, color, path_points[0], NODE_RADIUS + 2, 2)
-                pygame.draw.circle(screen, color, path_points[-1], NODE_RADIUS + 2, 2)
+                mark(pygame.draw.circle(screen, color, path_points[0], NODE_RADIUS + 2, 2))
+                mark(pygame.draw.circle(screen, color, path_points[-1], NODE_RADIUS + 2, 2))
 
         # Draw the robot itself
         if robot.current_pose:
-            pygame.draw.circle(screen, color, (int(robot.current_pose[0]), int(robot.current_pose[1])), ROBOT_RADIUS)
+            mark(pygame.draw.circle(screen, color, (int(robot.current_pose[0]), int(robot.current_pose[1])), ROBOT_RADIUS))
             robot_text = font.render(f"{robot.name} {'' if not robot.waiting else '(W)'}", True, BLACK)
-            screen.blit(robot_text, (int(robot.current_pose[0]) - 15, int(robot.current_pose[1]) - 25))
+            mark(screen.blit(robot_text, (int(robot.current_pose[0]) - 15, int(robot.current_pose[1]) - 25)))
 
     # Display simulation stats
     stats_text = font.render(f"Robots: {len(robots)} | Simulation Running", True, BLACK)
-    screen.blit(stats_text, (10, 10))
+    mark(screen.blit(stats_text, (10, 10)))
 
-    pygame.display.flip()
+    render_cache.end_frame()
 
-def move_robot(robot):
-    if not robot.next_node or robot.waiting:
-        return
-        
-    current = pygame.Vector2(robot.current_pose)
-    target = pygame.Vector2(nodes[robot.next_node])
-    direction = (target - current)
-    distance = direction.length()
+# Set up simulation parameters
+num_robots = int(input("Enter the number of robots: "))
 
-    if distance != 0:
-        direction = direction.normalize()
-        step = direction * SPEED
+# FMS_ASSIGNMENT=greedy|hungarian matches robots to a pool of tasks instead of random goals
+ASSIGNMENT = os.environ.get("FMS_ASSIGNMENT", "random")
 
-        if distance <= SPEED:
-            robot.move_forward()
-            robot.current_pose = nodes[robot.current_node]
-        else:
-            robot.current_pose = (current + step)
+# FMS_REPLAN_AFTER=<ticks> replans robots that keep waiting around the others' next steps
+REPLAN_AFTER = int(os.environ["FMS_REPLAN_AFTER"]) if os.environ.get("FMS_REPLAN_AFTER") else None
 
+# FMS_MAP=<file> loads a warehouse layout (text grid or CSV) instead of generating a grid
+map_file = os.environ.get("FMS_MAP")
+if map_file:
+    warehouse_map = WarehouseMap.load(map_file)
+    warehouse_map.fit(WIDTH, HEIGHT)
+    print(f"Loaded {len(warehouse_map.nodes)} nodes and {warehouse_map.edge_count} edges from {map_file}")
 
-def make_decision(current_robot, robots):
-    # Find conflicts and make decision
-    conflicts = conflict_detector.find_conflicts(current_robot, robots)
-    decision = conflict_resolver.handle_conflicts(conflicts, current_robot)
-    
-    return decision
+    # Imported maps are too large for a routing table
+    precompute_routes = False
+    engine = SimulationEngine.from_map(warehouse_map, num_robots, speed=SPEED, assignment=ASSIGNMENT,
+                                       replan_after=REPLAN_AFTER)
+else:
+    grid_cols = int(input("Enter number of columns in grid (default 10): ") or "10")
+    grid_rows = int(input("Enter number of rows in grid (default 10): ") or "10")
 
-# Set up simulation parameters
-num_robots = int(input("Enter the number of robots: "))
-grid_cols = int(input("Enter number of columns in grid (default 10): ") or "10")
-grid_rows = int(input("Enter number of rows in grid (default 10): ") or "10")
-
-# Generate grid nodes and edges
-nodes = generate_grid_nodes(cols=grid_cols, rows=grid_rows)
-edges = generate_edges(nodes, cols=grid_cols, rows=grid_rows)
-
-# Create robots
-robots = [Robot(name=f"R{i+1}") for i in range(num_robots)]
-
-# Set initial priorities and battery levels
-for i, robot in enumerate(robots):
-    robot.update_priority(random.randint(1, 10))
-    robot.update_battery_level(random.randint(50, 100))
-    
-    # Assign random starting position
-    start_node = random.choice(list(nodes.keys()))
-    robot.current_node = start_node
-    robot.current_pose = nodes[start_node]
-    
-    # Generate initial random goal
-    occupied_nodes = [r.current_node for r in robots[:i]]
-    generate_random_goal(robot, nodes, edges, occupied_nodes)
-
-# Create conflict handler
-conflict_detector = ConflictDetector()
-conflict_resolver = ConflictResolver()
+    # The routing table trades memory (quadratic in node count) for search-free re-goaling
+    table_mb = RoutingTable.estimate_memory(grid_cols * grid_rows) / 1e6
+    precompute_routes = input(f"Precompute routing table (~{table_mb:.1f} MB)? (y/N): ").strip().lower() == "y"
+
+    # Generate the grid, place the robots and give them their first goals
+    engine = SimulationEngine.from_grid(num_robots, cols=grid_cols, rows=grid_rows,
+                                        width=WIDTH, height=HEIGHT, speed=SPEED,
+                                        precompute_routes=precompute_routes, assignment=ASSIGNMENT,
+                                        replan_after=REPLAN_AFTER)
+if precompute_routes:
+    print(f"Routing table uses {engine.planner.memory_usage() / 1e6:.1f} MB")
+nodes = engine.nodes
+edges = engine.edges
+robots = engine.robots
+render_cache = RenderCache(screen, draw_static)
+
+# Phase timers are only installed while profiling, 'p' toggles them and FMS_PROFILE=1 starts with them on
+profiler = Profiler()
+
+def toggle_profiling():
+    if profiler.enabled:
+        profiler.disable()
+        profiler.export()
+    else:
+        profiler.instrument_engine(engine)
+        profiler.instrument(sys.modules[__name__], "draw")
+        print("Profiling enabled")
+
+if os.environ.get("FMS_PROFILE"):
+    toggle_profiling()
+
+# FMS_STATS=<prefix> streams fleet statistics to <prefix>_fleet.* and <prefix>_robots.*
+stats = None
+if os.environ.get("FMS_STATS"):
+    stats = FleetStats(engine, os.environ["FMS_STATS"], ticks_per_second=FPS)
+
+# FMS_TRACE=<file> records every tick for replay_viewer.py
+trace = None
+if os.environ.get("FMS_TRACE"):
+    trace = TraceWriter(engine, os.environ["FMS_TRACE"])
+
+def load_simulation():
+    global engine, nodes, edges, robots, stats, trace
+    try:
+        scenario = load_scenario(SCENARIO_FILE)
+    except (OSError, ValueError) as e:
+        print(f"Could not load {SCENARIO_FILE}: {e}")
+        return
+
+    # Recorders belong to the engine being replaced
+    if stats is not None:
+        stats.close()
+        stats = None
+        print("Fleet statistics stopped")
+    if trace is not None:
+        trace.close()
+        trace = None
+        print("Trace recording stopped")
+
+    planner = RoutingTable.build(scenario.nodes, scenario.edges) if precompute_routes else None
+    engine = SimulationEngine(scenario.nodes, scenario.edges, scenario.robots, speed=SPEED, planner=planner,
+                              assignment=ASSIGNMENT, replan_after=REPLAN_AFTER)
+    engine.tick = scenario.metadata.get("tick", 0)
+    nodes = engine.nodes
+    edges = engine.edges
+    robots = engine.robots
+    if profiler.enabled:
+        # Move the phase timers over to the new engine
+        profiler.disable()
+        profiler.instrument_engine(engine)
+        profiler.instrument(sys.modules[__name__], "draw")
+
+    render_cache.invalidate()
+    print(f"Simulation data loaded from {SCENARIO_FILE}.")
 
 # Main simulation loop
 running = True
@@ -275,40 +219,49 @@ while running:
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
             running = False
+        elif event.type == pygame.VIDEOEXPOSE:
+            render_cache.redraw_all()
         elif event.type == pygame.KEYDOWN:
             if event.key == pygame.K_SPACE:
                 simulating = not simulating
             elif event.key == pygame.K_r:
                 # Reset simulation
-                for robot in robots:
-                    robot.reset_robot()
-                    start_node = random.choice(list(nodes.keys()))
-                    robot.current_node = start_node
-                    robot.current_pose = nodes[start_node]
-                    generate_random_goal(robot, nodes, edges, [])
+                engine.reset()
+            elif event.key == pygame.K_v:
+                save_scenario(SCENARIO_FILE, nodes, edges, robots, metadata={"tick": engine.tick})
+                print(f"Simulation data saved to {SCENARIO_FILE}.")
+            elif event.key == pygame.K_l:
+                load_simulation()
+            elif event.key == pygame.K_d:
+                ring_buffer.dump("decision_log.txt")
+                print("Recent log records written to decision_log.txt")
+            elif event.key == pygame.K_p:
+                toggle_profiling()
+            elif event.key == pygame.K_o:
+                if profiler.toggle_cprofile("profile.prof"):
+                    print("cProfile capture started")
+                else:
+                    print("cProfile capture written to profile.prof")
 
     if simulating:
-        # Update robots
-        for i, robot in enumerate(robots):
-            
-            if robot.current_pose == nodes[robot.full_path[-1]]:
-                occupied_nodes = [r.current_node for r in robots if r != robot]
-                generate_random_goal(robot, nodes, edges, occupied_nodes)
-                
-            if robot.current_pose == nodes[robot.current_node]:
-                decision = make_decision(robot, robots)
-                if decision != Decision.FORWARD.value:
-                    robot.waiting = True
-                    continue
-                robot.waiting = False
-                
-            move_robot(robot)
-    
+        engine.step()
+
     try:
         draw()
     except Exception as e:
         print(f"Error in draw: {e}")
         time.sleep(1)
 
+if stats is not None:
+    stats.close()
+if trace is not None:
+    trace.close()
+if profiler.capturing:
+    profiler.stop_cprofile("profile.prof")
+if profiler.enabled:
+    profiler.disable()
+    profiler.export()
+    profiler.export("profile_summary.txt")
+
 pygame.quit()
 sys.exit()
@@ -0,0 +1,120 @@
+"""
+    Consistency check of batched against per-robot conflict decisions.
+
+    Builds random fleet snapshots on a grid where every robot follows a
+    self-avoiding random walk (a valid path that is usually not a shortest
+    one, like hand-drawn paths, deadlock detours and cooperative replans).
+    Each snapshot is decided twice, with ConflictResolver.decide_all and
+    robot by robot with find_conflicts and handle_conflicts, with and
+    without a conflict cache. Exits with status 1 if any decision differs.
+
+    Examples:
+        python benchmarks/check_batch_decisions.py
+        python benchmarks/check_batch_decisions.py --snapshots 5000 --robots 12
+"""
+
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.base_robot import Robot
+from utils.aisle_cache import AisleCache
+from utils.conflict_cache import ConflictCache
+from utils.conflict_handler import ConflictDetector, ConflictResolver
+from utils.node_index import NodeRobotIndex
+from utils.simulation_engine import generate_edges, generate_grid_nodes
+
+
+def random_walk(edges, start, length, rng):
+    """Self-avoiding random walk of up to length nodes from a start node."""
+    path = [start]
+    visited = {start}
+    while len(path) < length:
+        options = [n for n in edges[path[-1]] if n not in visited]
+        if not options:
+            break
+        node = rng.choice(options)
+        path.append(node)
+        visited.add(node)
+    return path
+
+
+def build_snapshot(edges, num_robots, path_length, rng):
+    """Robots on random walks, each advanced a random number of steps along it."""
+    robots = []
+    occupied = set()
+    for i in range(num_robots):
+        robot = Robot(name=f"R{i+1}")
+        robot.update_priority(rng.randint(1, 10))
+        robot.update_battery_level(rng.randint(50, 100))
+
+        start = rng.choice([n for n in edges if n not in occupied])
+        path = random_walk(edges, start, path_length, rng)
+        if len(path) < 2:
+            continue
+        robot.handle_path(path)
+        for _ in range(rng.randrange(len(path) - 1)):
+            if robot.next_node in occupied:
+                break
+            robot.move_forward()
+        occupied.add(robot.current_node)
+        robots.append(robot)
+    return robots
+
+
+def decide(robots, batched, cached=False):
+    """Decisions for every robot on a fresh detector and resolver."""
+    node_index = NodeRobotIndex()
+    for robot in robots:
+        node_index.add_robot(robot)
+    try:
+        detector = ConflictDetector(
+            node_index=node_index,
+            aisle_cache=AisleCache(),
+            conflict_cache=ConflictCache() if cached else None
+        )
+        resolver = ConflictResolver(conflict_detector=detector)
+
+        if batched:
+            return resolver.decide_all(robots)
+        return {robot.name: resolver.handle_conflicts(detector.find_conflicts(robot, robots), robot)
+                for robot in robots}
+    finally:
+        # The index is a path listener of every robot, which the next comparison reuses
+        for robot in robots:
+            node_index.remove_robot(robot)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare batched and per-robot conflict decisions")
+    parser.add_argument("--snapshots", type=int, default=2000, help="Fleet snapshots to check")
+    parser.add_argument("--robots", type=int, default=8, help="Robots per snapshot")
+    parser.add_argument("--grid", type=int, default=8, help="Grid size (NxN)")
+    parser.add_argument("--path-length", type=int, default=16, help="Longest random walk")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    nodes = generate_grid_nodes(cols=args.grid, rows=args.grid)
+    edges = generate_edges(nodes, cols=args.grid, rows=args.grid)
+    rng = random.Random(args.seed)
+
+    mismatches = 0
+    for i in range(args.snapshots):
+        robots = build_snapshot(edges, args.robots, args.path_length, rng)
+        expected = decide(robots, batched=False)
+        for batched, cached in ((True, False), (True, True), (False, True)):
+            decisions = decide(robots, batched, cached)
+            if decisions != expected:
+                mismatches += 1
+                differing = sorted(name for name in expected if decisions[name] != expected[name])
+                print(f"Snapshot {i} (batched={batched}, cached={cached}): {', '.join(differing)} differ")
+
+    print(f"{mismatches} mismatches in {args.snapshots} snapshots")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+    Consistency check of the event-driven engine against the frame-stepped one.
+
+    Runs the same seeded scenarios on SimulationEngine and
+    EventSimulationEngine over every deadlock policy and detection mode and
+    compares the fleet metrics, the FleetStats conflict counts and every
+    robot's node and pose after each interval of ticks. The listed cases
+    reproduce splits that were found before. Exits with status 1 if any scenario diverges.
+
+    Examples:
+        python benchmarks/check_event_engine.py
+        python benchmarks/check_event_engine.py --seeds 10 --ticks 5000
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.event_engine import EventSimulationEngine
+from utils.fleet_stats import FleetStats
+from utils.simulation_engine import SimulationEngine
+
+# Scenarios that split the engines before (seed, engine arguments)
+CASES = [
+    # A deadlock that can't be broken yet changes no robot, the cycle's other members try on the next tick
+    (2, dict(num_robots=12, cols=8, rows=8, speed=2.5, deadlock_policy="yield", detection_mode="reservation")),
+]
+
+DEADLOCK_POLICIES = ["reroute", "backoff", "yield", None]
+DETECTION_MODES = ["aisle", "reservation"]
+
+
+def fleet_state(engine, stats):
+    """Metrics and robot positions that have to match between the engines."""
+    return (
+        stats.conflicts.tolist(),
+        stats.robot_conflicts.tolist(),
+        engine.tick,
+        engine.goals_completed,
+        engine.wait_ticks,
+        engine.deadlocks_broken,
+        engine.replans,
+        tuple((robot.current_node, robot.current_pose, robot.waiting) for robot in engine.robots)
+    )
+
+
+def first_split(seed, kwargs, ticks, interval):
+    """First checked tick at which the engines differ, None if they match throughout."""
+    frame = SimulationEngine.from_grid(seed=seed, **kwargs)
+    event = EventSimulationEngine.from_grid(seed=seed, **kwargs)
+    frame_stats, event_stats = FleetStats(frame), FleetStats(event)
+    try:
+        while frame.tick < ticks:
+            frame.run(interval)
+            event.run(interval)
+            if fleet_state(frame, frame_stats) != fleet_state(event, event_stats):
+                return frame.tick
+        return None
+    finally:
+        frame_stats.close()
+        event_stats.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the event-driven and frame-stepped engines")
+    parser.add_argument("--seeds", type=int, default=3, help="Seeds per policy and detection mode")
+    parser.add_argument("--ticks", type=int, default=3000, help="Ticks per scenario")
+    parser.add_argument("--interval", type=int, default=50, help="Ticks between comparisons")
+    parser.add_argument("--robots", type=int, default=12, help="Robots per scenario")
+    parser.add_argument("--grid", type=int, default=8, help="Grid size (NxN)")
+    args = parser.parse_args()
+
+    scenarios = list(CASES)
+    for policy in DEADLOCK_POLICIES:
+        for mode in DETECTION_MODES:
+            for seed in range(args.seeds):
+                scenarios.append((seed, dict(num_robots=args.robots, cols=args.grid, rows=args.grid, speed=2.5,
+                                             deadlock_policy=policy, detection_mode=mode, replan_after=15)))
+
+    splits = 0
+    for seed, kwargs in scenarios:
+        tick = first_split(seed, kwargs, args.ticks, args.interval)
+        if tick is not None:
+            splits += 1
+            print(f"Seed {seed} {kwargs}: split by tick {tick}")
+
+    print(f"{splits} of {len(scenarios)} scenarios diverged")
+    sys.exit(1 if splits else 0)
+
+
+if __name__ == "__main__":
+    main()
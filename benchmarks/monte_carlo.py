@@ -0,0 +1,245 @@
+"""
+    Parallel Monte Carlo runner for the headless simulation engine.
+
+    Spreads many seeded runs over fleet sizes and grid layouts across a
+    process pool. Per run results are streamed to a JSON lines file as they
+    finish, and throughput, waiting and deadlock statistics are aggregated
+    per (fleet size, layout) at the end.
+
+    Examples:
+        python benchmarks/monte_carlo.py --runs 100 --robots 10 20 --grids 20x20
+        python benchmarks/monte_carlo.py --runs 1000 --robots 50 --grids 30x30 40x20 --workers 32
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from run_benchmarks import percentile
+from utils.simulation_engine import SimulationEngine
+from utils.event_engine import EventSimulationEngine
+from utils.task_assigner import TaskAssigner
+
+# Per run values summarized by aggregate()
+AGGREGATED_METRICS = ["throughput", "wait_fraction", "stuck_robots", "max_wait_streak",
+                      "deadlocks_detected", "mean_deadlock_ticks"]
+
+
+def parse_grid(text):
+    """Parse a layout given as COLSxROWS (or a single number for a square grid)."""
+    cols, _, rows = text.lower().partition("x")
+    try:
+        return int(cols), int(rows or cols)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid grid '{text}', expected COLSxROWS")
+
+
+def run_once(scenario):
+    """
+    Run one seeded scenario to completion.
+
+    Args:
+        scenario: Dictionary with robots, cols, rows, seed, ticks, speed, stall_ticks,
+            detection_mode, deadlock_policy, assignment, replan_after and event_driven
+
+    Returns:
+        Dictionary of results for the run
+    """
+    # Anything still using the module level generator is seeded as well
+    random.seed(scenario["seed"])
+
+    start = time.perf_counter()
+    engine_class = EventSimulationEngine if scenario["event_driven"] else SimulationEngine
+    engine = engine_class.from_grid(
+        scenario["robots"],
+        cols=scenario["cols"],
+        rows=scenario["rows"],
+        speed=scenario["speed"],
+        seed=scenario["seed"],
+        detection_mode=scenario["detection_mode"],
+        deadlock_policy=scenario["deadlock_policy"],
+        assignment=scenario["assignment"],
+        replan_after=scenario["replan_after"]
+    )
+    engine.run(scenario["ticks"])
+    run_s = time.perf_counter() - start
+
+    robot_ticks = scenario["robots"] * scenario["ticks"]
+    stuck = engine.stuck_robots(scenario["stall_ticks"])
+    deadlocks = engine.conflict_resolver.wait_for_graph.stats()
+
+    result = dict(scenario)
+    result.update({
+        "goals_completed": engine.goals_completed,
+        "throughput": engine.goals_completed / scenario["ticks"],
+        "wait_ticks": engine.wait_ticks,
+        "wait_fraction": engine.wait_ticks / robot_ticks if robot_ticks else 0.0,
+        "stuck_robots": len(stuck),
+        "max_wait_streak": max(engine.wait_streaks.values(), default=0),
+        "deadlocked": bool(stuck) or deadlocks["active"] > 0,
+        "deadlocks_detected": deadlocks["detected"],
+        "deadlocks_broken": engine.deadlocks_broken,
+        "replans": engine.replans,
+        "active_deadlocks": deadlocks["active"],
+        "mean_deadlock_ticks": deadlocks["mean_duration"],
+        "max_deadlock_ticks": deadlocks["max_duration"],
+        "decisions": engine.decisions,
+        "run_s": run_s
+    })
+    return result
+
+
+def build_runs(robot_counts, grids, runs, seed_base, ticks, speed, stall_ticks, detection_mode,
+               deadlock_policy, event_driven=False, assignment="random", replan_after=None):
+    """
+    Build the list of runs, skipping fleets too large for the layout.
+
+    Returns:
+        List of scenario dictionaries
+    """
+    scenarios = []
+    for cols, rows in grids:
+        for robots in robot_counts:
+            # Robots start on random nodes; keep at least two nodes per robot
+            if robots * 2 > cols * rows:
+                continue
+            for i in range(runs):
+                scenarios.append({
+                    "robots": robots,
+                    "cols": cols,
+                    "rows": rows,
+                    "seed": seed_base + i,
+                    "ticks": ticks,
+                    "speed": speed,
+                    "stall_ticks": stall_ticks,
+                    "detection_mode": detection_mode,
+                    "deadlock_policy": deadlock_policy,
+                    "assignment": assignment,
+                    "replan_after": replan_after,
+                    "event_driven": event_driven
+                })
+    return scenarios
+
+
+def summarize(values):
+    """Mean, standard deviation and 5th/95th percentiles of a list of numbers."""
+    ordered = sorted(values)
+    return {
+        "mean": statistics.fmean(ordered),
+        "stdev": statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        "p5": percentile(ordered, 0.05),
+        "p95": percentile(ordered, 0.95)
+    }
+
+
+def aggregate(results):
+    """
+    Aggregate run results per fleet size and layout.
+
+    Args:
+        results: Per run result dictionaries (failed runs are skipped)
+
+    Returns:
+        List of summary dictionaries, one per (robots, cols, rows)
+    """
+    groups = {}
+    for result in results:
+        if "error" in result:
+            continue
+        key = (result["robots"], result["cols"], result["rows"])
+        groups.setdefault(key, []).append(result)
+
+    summaries = []
+    for (robots, cols, rows), group in sorted(groups.items()):
+        summary = {"robots": robots, "cols": cols, "rows": rows, "runs": len(group)}
+        for metric in AGGREGATED_METRICS:
+            summary[metric] = summarize([r[metric] for r in group])
+        summary["deadlock_rate"] = sum(r["deadlocked"] for r in group) / len(group)
+        summaries.append(summary)
+    return summaries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel Monte Carlo runs of the simulation engine")
+    parser.add_argument("--runs", type=int, default=20, help="Seeded runs per fleet size and layout")
+    parser.add_argument("--robots", type=int, nargs="+", default=[10], help="Fleet sizes to run")
+    parser.add_argument("--grids", type=parse_grid, nargs="+", default=[(20, 20)],
+                        help="Layouts as COLSxROWS")
+    parser.add_argument("--ticks", type=int, default=1000, help="Ticks per run")
+    parser.add_argument("--seed-base", type=int, default=0, help="Seed of the first run")
+    parser.add_argument("--speed", type=float, default=2.0, help="Distance travelled per tick")
+    parser.add_argument("--stall-ticks", type=int, default=100,
+                        help="Consecutive waiting ticks after which a robot counts as deadlocked")
+    parser.add_argument("--detection-mode", choices=["aisle", "reservation"], default="aisle",
+                        help="Conflict detection mode")
+    parser.add_argument("--deadlock-policy", choices=["none", *SimulationEngine.DEADLOCK_POLICIES],
+                        default="reroute", help="How deadlocks found in the wait-for graph are broken")
+    parser.add_argument("--assignment", choices=TaskAssigner.STRATEGIES, default="random",
+                        help="How robots that reached their goal get a new one")
+    parser.add_argument("--replan-after", type=int,
+                        help="Consecutive waiting ticks after which a robot is replanned around the others")
+    parser.add_argument("--event-driven", action="store_true",
+                        help="Jump between node arrivals instead of stepping every tick (same results)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--output", default="monte_carlo_runs.jsonl",
+                        help="JSON lines file receiving each run as it finishes")
+    parser.add_argument("--summary", help="JSON file for the aggregated statistics")
+    args = parser.parse_args()
+
+    scenarios = build_runs(args.robots, args.grids, args.runs, args.seed_base, args.ticks,
+                           args.speed, args.stall_ticks, args.detection_mode,
+                           None if args.deadlock_policy == "none" else args.deadlock_policy,
+                           args.event_driven, args.assignment, args.replan_after)
+    results = []
+
+    start = time.perf_counter()
+    with open(args.output, "w") as output, ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(run_once, scenario): scenario for scenario in scenarios}
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"error": repr(e), **futures[future]}
+
+            results.append(result)
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+
+            if "error" in result:
+                print(f"[{done}/{len(scenarios)}] seed {result['seed']} failed: {result['error']}")
+            else:
+                print(f"[{done}/{len(scenarios)}] r{result['robots']} {result['cols']}x{result['rows']} "
+                      f"seed {result['seed']}: {result['goals_completed']} goals, "
+                      f"{result['wait_fraction']:.1%} waiting, {result['deadlocks_detected']} deadlocks, "
+                      f"{result['stuck_robots']} stuck")
+    elapsed = time.perf_counter() - start
+
+    summaries = aggregate(results)
+    print(f"\n{len(results)} runs in {elapsed:.1f}s with {args.workers} workers\n")
+    print(f"{'robots':>7}{'layout':>9}{'runs':>6}{'goals/tick':>12}{'stdev':>8}{'p5':>8}{'p95':>8}"
+          f"{'waiting':>9}{'deadlock':>10}{'cycles':>8}{'ticks':>7}{'stuck':>7}")
+    for s in summaries:
+        throughput = s["throughput"]
+        print(f"{s['robots']:>7}{str(s['cols']) + 'x' + str(s['rows']):>9}{s['runs']:>6}"
+              f"{throughput['mean']:>12.3f}{throughput['stdev']:>8.3f}"
+              f"{throughput['p5']:>8.3f}{throughput['p95']:>8.3f}"
+              f"{s['wait_fraction']['mean']:>9.1%}{s['deadlock_rate']:>10.1%}"
+              f"{s['deadlocks_detected']['mean']:>8.1f}{s['mean_deadlock_ticks']['mean']:>7.1f}"
+              f"{s['stuck_robots']['mean']:>7.2f}")
+
+    if args.summary:
+        with open(args.summary, "w") as f:
+            json.dump({"args": {**vars(args), "grids": [list(g) for g in args.grids]},
+                       "summaries": summaries}, f, indent=2)
+        print(f"\nSummary written to {args.summary}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""
+    Scaling benchmarks for the headless simulation engine.
+
+    Runs fixed-seed scenarios over a matrix of fleet sizes and grid sizes and
+    reports decisions/sec, mean and p99 tick latency, peak memory and the time
+    spent in find_conflicts, handle_conflicts and path planning. Results are
+    written as JSON so branches can be compared with --compare.
+
+    Examples:
+        python benchmarks/run_benchmarks.py --quick
+        python benchmarks/run_benchmarks.py --output before.json
+        python benchmarks/run_benchmarks.py --output after.json --compare before.json
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.simulation_engine import SimulationEngine
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+ROBOT_COUNTS = [10, 50, 100, 250, 500, 1000]
+GRID_SIZES = [10, 25, 50, 100, 200]
+QUICK_ROBOT_COUNTS = [10, 50]
+QUICK_GRID_SIZES = [10, 25]
+
+# Metrics compared by --compare: (higher is better, values below this are noise)
+COMPARED_METRICS = {
+    "decisions_per_sec": (True, 0.0),
+    "mean_tick_ms": (False, 0.05),
+    "p99_tick_ms": (False, 0.05),
+    "find_conflicts_s": (False, 0.01),
+    "handle_conflicts_s": (False, 0.01),
+    "find_path_s": (False, 0.01),
+    "peak_memory_mb": (False, 1.0)
+}
+
+
+class PhaseTimer:
+    """Accumulates the time spent in one wrapped function."""
+
+    def __init__(self, func):
+        self.func = func
+        self.total = 0.0
+        self.calls = 0
+
+    def __call__(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self.func(*args, **kwargs)
+        finally:
+            self.total += time.perf_counter() - start
+            self.calls += 1
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[rank]
+
+
+def peak_memory_mb():
+    """Peak resident memory of this process in MB, None if unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_scenario(scenario):
+    """
+    Run one scenario and measure it.
+
+    Args:
+        scenario: Dictionary with robots, grid, seed, ticks and speed
+
+    Returns:
+        Dictionary of measurements for the scenario
+    """
+    # Setup time includes planning the initial goals
+    setup_start = time.perf_counter()
+    engine = SimulationEngine.from_grid(
+        scenario["robots"],
+        cols=scenario["grid"],
+        rows=scenario["grid"],
+        speed=scenario["speed"],
+        seed=scenario["seed"],
+        batch_motion=scenario.get("batch_motion", False),
+        batch_decisions=scenario.get("batch_decisions", False),
+        detection_mode=scenario.get("detection_mode", "aisle")
+    )
+    setup_s = time.perf_counter() - setup_start
+
+    # Re-goaling during the run is what find_path_s measures
+    planner_timer = PhaseTimer(engine.planner.find_path)
+    engine.planner.find_path = planner_timer
+    find_conflicts_timer = PhaseTimer(engine.conflict_detector.find_conflicts)
+    engine.conflict_detector.find_conflicts = find_conflicts_timer
+    handle_conflicts_timer = PhaseTimer(engine.conflict_resolver.handle_conflicts)
+    engine.conflict_resolver.handle_conflicts = handle_conflicts_timer
+
+    tick_times = []
+    run_start = time.perf_counter()
+    for _ in range(scenario["ticks"]):
+        tick_start = time.perf_counter()
+        engine.step()
+        tick_times.append(time.perf_counter() - tick_start)
+    run_s = time.perf_counter() - run_start
+
+    tick_times.sort()
+    result = dict(scenario)
+    result.update({
+        "setup_s": setup_s,
+        "run_s": run_s,
+        "decisions": engine.decisions,
+        "decisions_per_sec": engine.decisions / run_s if run_s else 0.0,
+        "ticks_per_sec": scenario["ticks"] / run_s if run_s else 0.0,
+        "mean_tick_ms": 1000 * sum(tick_times) / len(tick_times) if tick_times else 0.0,
+        "p99_tick_ms": 1000 * percentile(tick_times, 0.99),
+        "find_conflicts_s": find_conflicts_timer.total,
+        "handle_conflicts_s": handle_conflicts_timer.total,
+        "find_path_s": planner_timer.total,
+        "find_path_calls": planner_timer.calls,
+        "peak_memory_mb": peak_memory_mb()
+    })
+    return result
+
+
+def _scenario_worker(scenario, queue):
+    try:
+        queue.put(run_scenario(scenario))
+    except Exception as e:
+        queue.put({"error": repr(e), **scenario})
+
+
+def run_isolated(scenario):
+    """Run a scenario in a fresh process so peak memory is per scenario."""
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_scenario_worker, args=(scenario, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def build_matrix(robot_counts, grid_sizes, seeds, ticks, speed, batch_motion=False,
+                 detection_mode="aisle", batch_decisions=False):
+    """
+    Build the list of scenarios, skipping fleets too large for the grid.
+
+    Returns:
+        List of scenario dictionaries
+    """
+    scenarios = []
+    for grid in grid_sizes:
+        for robots in robot_counts:
+            # Robots start on random nodes; keep at least two nodes per robot
+            if robots * 2 > grid * grid:
+                continue
+            for seed in seeds:
+                scenarios.append({
+                    "name": f"r{robots}_g{grid}x{grid}_s{seed}",
+                    "robots": robots,
+                    "grid": grid,
+                    "seed": seed,
+                    "ticks": ticks,
+                    "speed": speed,
+                    "batch_motion": batch_motion,
+                    "detection_mode": detection_mode,
+                    "batch_decisions": batch_decisions
+                })
+    return scenarios
+
+
+def git_revision():
+    """Current git commit of the repository, None outside a checkout."""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_results(current, baseline, threshold):
+    """
+    Print metric ratios against a baseline and collect regressions.
+
+    Args:
+        current: Results of this run
+        baseline: Results loaded from a previous run
+        threshold: Relative change counted as a regression (0.1 = 10%)
+
+    Returns:
+        List of (scenario name, metric, baseline value, current value) regressions
+    """
+    baseline_by_name = {r["name"]: r for r in baseline["results"] if "error" not in r}
+    regressions = []
+
+    print(f"\n{'scenario':<24}{'metric':<22}{'baseline':>12}{'current':>12}{'change':>9}")
+    for result in current["results"]:
+        old = baseline_by_name.get(result["name"])
+        if old is None or "error" in result:
+            continue
+        for metric, (higher_is_better, noise_floor) in COMPARED_METRICS.items():
+            old_value, new_value = old.get(metric), result.get(metric)
+            if not old_value or new_value is None:
+                continue
+            if max(old_value, new_value) < noise_floor:
+                continue
+            change = (new_value - old_value) / old_value
+            worse = -change if higher_is_better else change
+            flag = " !" if worse > threshold else ""
+            print(f"{result['name']:<24}{metric:<22}{old_value:>12.3f}{new_value:>12.3f}{change:>+8.1%}{flag}")
+            if worse > threshold:
+                regressions.append((result["name"], metric, old_value, new_value))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scaling benchmarks for the simulation engine")
+    parser.add_argument("--robots", type=int, nargs="+", help="Fleet sizes to run")
+    parser.add_argument("--grids", type=int, nargs="+", help="Grid sizes to run (NxN)")
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0], help="Random seeds")
+    parser.add_argument("--ticks", type=int, default=300, help="Ticks per scenario")
+    parser.add_argument("--speed", type=float, default=2.0, help="Distance travelled per tick")
+    parser.add_argument("--batch-motion", action="store_true",
+                        help="Use the vectorized NumPy motion stage")
+    parser.add_argument("--batch-decisions", action="store_true",
+                        help="Decide for the whole fleet with ConflictResolver.decide_all")
+    parser.add_argument("--detection-mode", choices=["aisle", "reservation"], default="aisle",
+                        help="Conflict detection mode")
+    parser.add_argument("--quick", action="store_true", help="Small matrix for a fast check")
+    parser.add_argument("--in-process", action="store_true",
+                        help="Run scenarios in this process (peak memory becomes cumulative)")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON file to write")
+    parser.add_argument("--compare", help="Previous results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative change reported as a regression")
+    args = parser.parse_args()
+
+    robot_counts = args.robots or (QUICK_ROBOT_COUNTS if args.quick else ROBOT_COUNTS)
+    grid_sizes = args.grids or (QUICK_GRID_SIZES if args.quick else GRID_SIZES)
+    ticks = min(args.ticks, 100) if args.quick else args.ticks
+
+    scenarios = build_matrix(robot_counts, grid_sizes, args.seeds, ticks, args.speed,
+                             args.batch_motion, args.detection_mode, args.batch_decisions)
+    results = []
+
+    print(f"{'scenario':<24}{'decisions/s':>12}{'mean ms':>10}{'p99 ms':>10}"
+          f"{'conflicts s':>13}{'resolve s':>11}{'plan s':>9}{'peak MB':>9}")
+    for scenario in scenarios:
+        result = run_scenario(scenario) if args.in_process else run_isolated(scenario)
+        results.append(result)
+
+        if "error" in result:
+            print(f"{scenario['name']:<24} failed: {result['error']}")
+            continue
+        peak = result["peak_memory_mb"]
+        print(f"{result['name']:<24}{result['decisions_per_sec']:>12.0f}"
+              f"{result['mean_tick_ms']:>10.2f}{result['p99_tick_ms']:>10.2f}"
+              f"{result['find_conflicts_s']:>13.3f}{result['handle_conflicts_s']:>11.3f}"
+              f"{result['find_path_s']:>9.3f}{peak if peak is not None else float('nan'):>9.1f}")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args)
+        },
+        "results": results
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare_results(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,11 +2,16 @@ from enum import Enum
 from typing import List, Dict, Set, Tuple, Any, Optional
 from utils.base_robot import Robot
 from utils.path_manager import RobotPathManager
+from utils.sim_logging import configure_logging
+import sys
 import time
 
 
 # Example usage
 def run_simulation():
+    # Show robot moves; use "DEBUG" to also see every conflict decision
+    configure_logging("INFO", stream=sys.stdout)
+    
     # Create robots
     robot1 = Robot(name="R1")
     robot2 = Robot(name="R2")
@@ -51,7 +56,7 @@ def run_simulation():
             print(f"{robot.name} at node {robot.current_node}, decision: {decisions.get(robot.name, 'N/A')}")
             if robot.remaining_path:
                 print(f"{robot.name} next node: {robot.next_node}")
-            print(f"{robot.name} remaining path: {robot.remaining_path}")
+            print(f"{robot.name} remaining path: {list(robot.remaining_path)}")
             # print(f"{robot.name} full path: {robot.full_path}")
 
         break_flag = True
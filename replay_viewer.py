@@ -0,0 +1,147 @@
+"""
+    Replay viewer for traces recorded with utils/trace.py.
+
+    Plays a trace back without running the conflict logic. Any tick can be
+    shown immediately, e.g. to inspect a robot that got stuck hours into a run.
+
+    Usage:
+        python replay_viewer.py run.trace [--start TICK]
+"""
+
+import argparse
+import pygame
+import sys
+from utils.trace import TraceReader
+from utils.render_cache import RenderCache
+
+# Constants
+WIDTH, HEIGHT = 1000, 700
+NODE_RADIUS = 4
+ROBOT_RADIUS = 8
+FPS = 60
+
+ROBOT_COLORS = [
+    (255, 0, 0),      # Red
+    (0, 255, 0),      # Green
+    (0, 0, 255),      # Blue
+    (255, 165, 0),    # Orange
+    (255, 0, 255),    # Magenta
+    (0, 255, 255),    # Cyan
+    (128, 0, 128),    # Purple
+    (128, 128, 0),    # Olive
+    (0, 128, 128)     # Teal
+]
+
+# Colors
+WHITE = (255, 255, 255)
+BLUE = (0, 0, 255)
+BLACK = (0, 0, 0)
+LIGHT_GREY = (220, 220, 220)
+
+# Keys that jump through the trace, in ticks
+JUMPS = {
+    pygame.K_RIGHT: 1,
+    pygame.K_LEFT: -1,
+    pygame.K_UP: 100,
+    pygame.K_DOWN: -100,
+    pygame.K_PAGEUP: 10000,
+    pygame.K_PAGEDOWN: -10000
+}
+
+parser = argparse.ArgumentParser(description="Replay a recorded simulation trace")
+parser.add_argument("trace", help="Trace file written by TraceWriter")
+parser.add_argument("--start", type=int, help="Tick to start at")
+args = parser.parse_args()
+
+trace = TraceReader(args.trace)
+nodes = trace.nodes
+edges = trace.edges
+
+pygame.init()
+screen = pygame.display.set_mode((WIDTH, HEIGHT))
+pygame.display.set_caption(f"Replay: {args.trace}")
+clock = pygame.time.Clock()
+
+font = pygame.font.SysFont(None, 24)
+
+def draw_static(surface):
+    surface.fill(WHITE)
+
+    for node_id, neighbors in edges.items():
+        for neighbor in neighbors:
+            pygame.draw.line(surface, LIGHT_GREY, nodes[node_id], nodes[neighbor], 1)
+
+    for node_id, pos in nodes.items():
+        pygame.draw.circle(surface, BLUE, pos, NODE_RADIUS)
+
+render_cache = RenderCache(screen, draw_static)
+
+def draw(tick):
+    render_cache.begin_frame()
+    mark = render_cache.mark
+
+    for i, robot in enumerate(trace.frame(tick)):
+        if robot["pose"] is None:
+            continue
+        color = ROBOT_COLORS[i % len(ROBOT_COLORS)]
+        pose = (int(robot["pose"][0]), int(robot["pose"][1]))
+
+        # The trace holds the next node, not the whole path
+        if robot["next_node"] is not None:
+            mark(pygame.draw.line(screen, color, pose, nodes[robot["next_node"]], 2))
+
+        mark(pygame.draw.circle(screen, color, pose, ROBOT_RADIUS))
+        robot_text = font.render(f"{robot['name']} {'(W)' if robot['decision'] == 'WAIT' else ''}", True, BLACK)
+        mark(screen.blit(robot_text, (pose[0] - 15, pose[1] - 25)))
+
+    status = "Playing" if playing else "Paused"
+    stats_text = font.render(f"Tick {tick} / {trace.last_tick} | {status} x{speed}", True, BLACK)
+    mark(screen.blit(stats_text, (10, 10)))
+
+    render_cache.end_frame()
+
+tick = trace.first_tick if args.start is None else args.start
+tick = max(trace.first_tick, min(tick, trace.last_tick))
+playing = False
+speed = 1  # Ticks advanced per frame
+
+running = True
+while running:
+    clock.tick(FPS)
+
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT:
+            running = False
+        elif event.type == pygame.VIDEOEXPOSE:
+            render_cache.redraw_all()
+        elif event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_SPACE:
+                playing = not playing
+            elif event.key in JUMPS:
+                tick += JUMPS[event.key]
+            elif event.key == pygame.K_HOME:
+                tick = trace.first_tick
+            elif event.key == pygame.K_END:
+                tick = trace.last_tick
+            elif event.key in (pygame.K_PLUS, pygame.K_EQUALS):
+                speed *= 2
+            elif event.key == pygame.K_MINUS:
+                speed = max(1, speed // 2)
+            elif event.key == pygame.K_g:
+                try:
+                    tick = int(input(f"Go to tick ({trace.first_tick}-{trace.last_tick}): "))
+                except ValueError:
+                    print("Not a tick number")
+
+    if playing:
+        tick += speed
+
+    tick = max(trace.first_tick, min(tick, trace.last_tick))
+    if tick == trace.last_tick:
+        playing = False
+
+    draw(tick)
+
+trace.close()
+pygame.quit()
+sys.exit()
@@ -6,11 +6,16 @@
 
 """
 
+import os
 import pygame
 import sys
-import pickle
 from utils.base_robot import Robot
-from utils.conflict_handler import ConflictDetector, ConflictResolver, Decision
+from utils.simulation_engine import SimulationEngine
+from utils.sim_logging import configure_logging
+from utils.render_cache import RenderCache
+from utils.profiler import Profiler
+from utils.scenario import save_scenario, load_scenario
+from utils.layout_graph import LayoutGraph
 
 # Constants
 WIDTH, HEIGHT = 1000, 700
@@ -19,6 +24,9 @@ ROBOT_RADIUS = 8
 FPS = 60
 SPEED = 2
 GRID_SIZE = 40
+SCENARIO_FILE = "simulation_data.scn"
+LINK_DISTANCE = 5 * GRID_SIZE  # Longest edge between neighboring nodes
+PICK_RADIUS = 10
 
 ROBOT_COLORS = [
     (255, 0, 0),      # Red
@@ -40,6 +48,12 @@ RED = (255, 0, 0)
 GREEN = (0, 255, 0)
 BLACK = (0, 0, 0)
 LIGHT_GREY = (220, 220, 220)
+LIGHT_BLUE = (150, 180, 255)
+
+# Console level comes from FMS_LOG_LEVEL; the 'd' dump keeps the same records unless
+# FMS_LOG_RING asks for more (e.g. DEBUG for the recent decisions, at the cost of logging them all)
+ring_buffer = configure_logging(os.environ.get("FMS_LOG_LEVEL") or "WARNING", ring_buffer_size=5000,
+                                ring_buffer_level=os.environ.get("FMS_LOG_RING"))
 
 pygame.init()
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
@@ -54,6 +68,8 @@ mode = "SHELF"
 # Data storage
 shelves = []
 nodes = {}   # {1: (x, y), 2: (x, y), ...}
+edges = {}   # Linked by the layout as nodes and shelves are placed
+layout = LayoutGraph(nodes, edges, cell_size=GRID_SIZE, link_distance=LINK_DISTANCE)
 # robot_a = {'start': None, 'goal': None, 'path': [], 'pos': None, 'full_path': [], 'index': 0}
 # robot_b = {'start': None, 'goal': None, 'path': [], 'pos': None, 'full_path': [], 'index': 0}
 robot_a = Robot(name="R1")
@@ -72,23 +88,35 @@ robot_set_stage = 0
 
 simulating = False
 
-def draw_grid():
+def draw_grid(surface):
     for x in range(0, WIDTH, GRID_SIZE):
-        pygame.draw.line(screen, LIGHT_GREY, (x, 0), (x, HEIGHT))
+        pygame.draw.line(surface, LIGHT_GREY, (x, 0), (x, HEIGHT))
     for y in range(0, HEIGHT, GRID_SIZE):
-        pygame.draw.line(screen, LIGHT_GREY, (0, y), (WIDTH, y))
+        pygame.draw.line(surface, LIGHT_GREY, (0, y), (WIDTH, y))
 
-def draw():
-    screen.fill(WHITE)
-    draw_grid()
+def draw_static(surface):
+    # Redrawn only when shelves or nodes change (render_cache.invalidate())
+    surface.fill(WHITE)
+    draw_grid(surface)
 
     # Draw shelves
     for rect in shelves:
-        pygame.draw.rect(screen, GREY, rect)
+        pygame.draw.rect(surface, GREY, rect)
+
+    # Draw edges, and the ones blocked by shelves
+    for node, neighbors in edges.items():
+        for neighbor in neighbors:
+            pygame.draw.line(surface, LIGHT_BLUE, nodes[node], nodes[neighbor], 1)
+    for node, neighbor in layout.blocked_edges:
+        pygame.draw.line(surface, RED, nodes[node], nodes[neighbor], 1)
 
     # Draw nodes
     for node, node_pose in nodes.items():
-        pygame.draw.circle(screen, BLUE, node_pose, NODE_RADIUS)
+        pygame.draw.circle(surface, BLUE, node_pose, NODE_RADIUS)
+
+def draw():
+    render_cache.begin_frame()
+    mark = render_cache.mark
 
     for i, robot in enumerate(robots):
         color = robot_colors[i]
@@ -97,21 +125,21 @@ def draw():
         if robot.full_path:
             path_points = [nodes[i] for i in robot.full_path]
             
-            pygame.draw.lines(screen, color, False, path_points, 2)
+            mark(pygame.draw.lines(screen, color, False, path_points, 2))
             
-            pygame.draw.circle(screen, color, path_points[0], ROBOT_RADIUS, 2)
-            pygame.draw.circle(screen, color, path_points[-1], ROBOT_RADIUS, 2)
+            mark(pygame.draw.circle(screen, color, path_points[0], ROBOT_RADIUS, 2))
+            mark(pygame.draw.circle(screen, color, path_points[-1], ROBOT_RADIUS, 2))
 
 
         if robot.current_pose:
-            pygame.draw.circle(screen, color, (int(robot.current_pose[0]), int(robot.current_pose[1])), ROBOT_RADIUS)
+            mark(pygame.draw.circle(screen, color, (int(robot.current_pose[0]), int(robot.current_pose[1])), ROBOT_RADIUS))
 
 
     # Draw current mode
     mode_text = font.render(f"Mode: {mode}", True, BLACK)
-    screen.blit(mode_text, (10, 10))
+    mark(screen.blit(mode_text, (10, 10)))
 
-    pygame.display.flip()
+    render_cache.end_frame()
 
 def snap_to_grid(pos):
     x = round(pos[0] / GRID_SIZE) * GRID_SIZE
@@ -120,46 +148,42 @@ def snap_to_grid(pos):
 
 
 def get_nearest_node(pos):
-    for node_id, node_pos in nodes.items():
-        if pygame.Rect(node_pos[0] - 10, node_pos[1] - 10, 20, 20).collidepoint(pos):
-            return node_id
-    return None
-
-def make_decision(current_robot, robots):
-    # Find conflicts and make decision
-    conflicts = conflict_detector.find_conflicts(current_robot, robots)
-    decision = conflict_resolver.handle_conflicts(conflicts, current_robot)
-        
-    return decision
-    
+    return layout.node_at(pos, PICK_RADIUS)
 
-def move_robot(robot):
-    current = pygame.Vector2(robot.current_pose)
-    target = pygame.Vector2(nodes[robot.next_node])
-    direction = (target - current)
-    distance = direction.length()
-
-    if distance != 0:
-        direction = direction.normalize()
-        step = direction * SPEED
-
-        if distance <= SPEED:
-            robot.move_forward()    
-            robot.current_pose = nodes[robot.current_node]            
-        else:
-            robot.current_pose = (current + step)
-                
-                
 def save_simulation():
-    data = {
-        'shelves': shelves,
-        'nodes': nodes,
-        'robots': robots
-    }
-    with open('simulation_data.pkl', 'wb') as f:
-        pickle.dump(data, f)
-    print("Simulation data saved.")
-    
+    save_scenario(SCENARIO_FILE, nodes, edges, robots, shelves, {"tick": engine.tick})
+    print(f"Simulation data saved to {SCENARIO_FILE}.")
+
+def load_simulation():
+    global robots, robot_colors, engine, node_counter, simulating, current_robot_editing, mode
+    try:
+        scenario = load_scenario(SCENARIO_FILE)
+    except (OSError, ValueError) as e:
+        print(f"Could not load {SCENARIO_FILE}: {e}")
+        return
+
+    # nodes and shelves are updated in place, the drawing code holds on to them
+    shelves[:] = [pygame.Rect(shelf) for shelf in scenario.shelves]
+    layout.rebuild(scenario.nodes, shelves)
+    node_counter = max((node for node in nodes if isinstance(node, int)), default=0) + 1
+
+    robots = scenario.robots
+    robot_colors = {i: ROBOT_COLORS[i % len(ROBOT_COLORS)] for i in range(len(robots))}
+    engine = SimulationEngine(nodes, edges, robots, speed=SPEED, auto_goal=False, deadlock_policy=None)
+    engine.tick = scenario.metadata.get("tick", 0)
+    if profiler.enabled:
+        # Move the phase timers over to the new engine
+        profiler.disable()
+        profiler.instrument_engine(engine)
+        profiler.instrument(sys.modules[__name__], "draw")
+
+    robot_path_temp.clear()
+    current_robot_editing = None
+    mode = "SHELF"
+    simulating = False
+    render_cache.invalidate()
+    print(f"Simulation data loaded from {SCENARIO_FILE}.")
+
 priority_array = [5, 6]
 battery_lvl_array = [50, 50]
 
@@ -171,25 +195,32 @@ for i, robot in enumerate(robots):
     robot.update_priority(priority_array[i])
     robot.update_battery_level(battery_lvl_array[i])
     
-conflict_detector = ConflictDetector()
-conflict_resolver = ConflictResolver()
+# Paths are drawn by hand, so the engine must not hand out random goals or replace
+# them to break deadlocks (they are still detected and counted)
+engine = SimulationEngine(nodes, edges, robots, speed=SPEED, auto_goal=False, deadlock_policy=None)
+render_cache = RenderCache(screen, draw_static)
+
+# Phase timers are only installed while profiling, 'p' toggles them and FMS_PROFILE=1 starts with them on
+profiler = Profiler()
+
+def toggle_profiling():
+    if profiler.enabled:
+        profiler.disable()
+        profiler.export()
+    else:
+        profiler.instrument_engine(engine)
+        profiler.instrument(sys.modules[__name__], "draw")
+        print("Profiling enabled")
+
+if os.environ.get("FMS_PROFILE"):
+    toggle_profiling()
 
 running = True
 while running:
     clock.tick(FPS)
 
-    if simulating:            
-        for robot in robots:
-            if robot.next_node:
-                # first make decision and based on that move the robot
-                if robot.current_pose == nodes[robot.current_node]:
-                    decision = make_decision(robot, robots)
-                    if decision != Decision.FORWARD.value:
-                        robot.waiting = True
-                        continue
-                    
-                move_robot(robot)
-                robot.waiting = False
+    if simulating:
+        engine.step()
 
     draw()
 
@@ -197,6 +228,9 @@ while running:
         if event.type == pygame.QUIT:
             running = False
 
+        elif event.type == pygame.VIDEOEXPOSE:
+            render_cache.redraw_all()
+
         elif event.type == pygame.KEYDOWN:
             if event.key == pygame.K_s:
                 mode = "SHELF"
@@ -204,6 +238,8 @@ while running:
                 mode = "NODE"
             elif event.key == pygame.K_RETURN:
                 if current_robot_editing and len(robot_path_temp) > 1:
+                    for a, b in layout.blocked_steps(robot_path_temp):
+                        print(f"Warning: path step {a} -> {b} passes through a shelf")
                     current_robot_editing.handle_path(robot_path_temp)
                     current_robot_editing.current_pose = nodes[robot_path_temp[0]]
                     robot_path_temp = []
@@ -213,7 +249,7 @@ while running:
                 simulating = True
             elif event.key == pygame.K_c:
                 shelves.clear()
-                nodes.clear()
+                layout.clear()
                 for robot in robots:
                     robot.reset_robot()
 
@@ -221,24 +257,28 @@ while running:
                 simulating = False
                 placing_shelf = False
                 shelf_start = None
+                render_cache.invalidate()
                 print("Cleared all data and reset simulation.")
             elif event.key == pygame.K_v:
                 save_simulation()
+            elif event.key == pygame.K_l:
+                load_simulation()
+            elif event.key == pygame.K_d:
+                ring_buffer.dump("decision_log.txt")
+                print("Recent log records written to decision_log.txt")
+            elif event.key == pygame.K_p:
+                toggle_profiling()
+            elif event.key == pygame.K_o:
+                if profiler.toggle_cprofile("profile.prof"):
+                    print("cProfile capture started")
+                else:
+                    print("cProfile capture written to profile.prof")
             elif event.key == pygame.K_r:
                 # Reset simulation without clearing data
                 simulating = False
         
                 # Reset all robots to their starting positions
-                for robot in robots:
-                    if robot.full_path:
-                        robot.current_node = robot.full_path[0]
-                        if len(robot.full_path) > 1:
-                            robot.next_node = robot.full_path[1]
-                        else:
-                            robot.next_node = None
-                        robot.current_pose = nodes[robot.current_node]
-                        robot.waiting = False
-                        robot.remaining_path = robot.full_path.copy()
+                engine.restart()
         
                 print("Simulation restarted - robots reset to starting positions.")
             elif pygame.K_1 <= event.key <= pygame.K_9:
@@ -260,11 +300,16 @@ while running:
                     rect = pygame.Rect(min(shelf_start[0], pos[0]), min(shelf_start[1], pos[1]),
                                        abs(shelf_start[0] - pos[0]), abs(shelf_start[1] - pos[1]))
                     shelves.append(rect)
+                    layout.add_shelf(rect)
                     placing_shelf = False
+                    render_cache.invalidate()
 
             elif mode == "NODE":
-                nodes[node_counter] = pos
-                node_counter+=1
+                # One node per grid point
+                if layout.node_at(pos, 0) is None:
+                    layout.add_node(node_counter, pos)
+                    node_counter+=1
+                    render_cache.invalidate()
 
             elif "ROBOT_PATH" in mode:
                 nearest = get_nearest_node(pos)
@@ -272,5 +317,12 @@ while running:
                     robot_path_temp.append(nearest)
                     # print("point added to path ", nearest)
 
+if profiler.capturing:
+    profiler.stop_cprofile("profile.prof")
+if profiler.enabled:
+    profiler.disable()
+    profiler.export()
+    profiler.export("profile_summary.txt")
+
 pygame.quit()
 sys.exit()
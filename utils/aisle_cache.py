@@ -0,0 +1,95 @@
+from collections import OrderedDict
+from typing import Callable, Dict, List, Any
+from utils.base_robot import Robot
+
+
+class AisleCache:
+    """
+    Bounded LRU cache of connected aisles per ordered robot pair.
+
+    Entries are keyed by both robots and their path versions. A robot's path
+    version changes whenever it is given a new path, so stale entries can no
+    longer be reached and are evicted once the cache is full.
+    """
+
+    DEFAULT_MAX_ENTRIES = 4096
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_entries: Maximum number of robot pairs kept in the cache
+        """
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_aisles(
+        self,
+        robot1: Robot,
+        robot2: Robot,
+        compute: Callable[[Robot, Robot], List[List[Any]]]
+    ) -> List[List[Any]]:
+        """
+        Return the aisles between two robots, computing them on a miss.
+
+        Args:
+            robot1: First robot
+            robot2: Second robot
+            compute: Function computing the aisles for the pair
+
+        Returns:
+            List of aisles (lists of connected points)
+        """
+        key = (robot1, robot1.path_version, robot2, robot2.path_version)
+
+        aisles = self.entries.get(key)
+        if aisles is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return aisles
+
+        self.misses += 1
+        aisles = compute(robot1, robot2)
+        self.entries[key] = aisles
+
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+        return aisles
+
+    def clear(self):
+        """Drop every cached entry and reset the counters."""
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups answered from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the cache counters.
+
+        Returns:
+            Dictionary with hits, misses, evictions, size and hit rate
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self.entries),
+            "hit_rate": self.hit_rate
+        }
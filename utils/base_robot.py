@@ -1,50 +1,136 @@
+from array import array
+
 
 # Robot class
 class Robot:
+    __slots__ = (
+        "name", "battery_lvl", "current_pose", "waiting",
+        "full_path", "_path_view", "_cursor", "current_node", "next_node",
+        "task_priority", "robot_speed", "total_load", "total_items",
+        "path_version", "state_version", "path_listeners"
+    )
+
     def __init__(self, name, battery_lvl = 100):
         self.name = name
         self.battery_lvl = battery_lvl
-        
+
         self.current_pose = None
         self.waiting = False
-        
+
+        # The full path is stored once; _cursor is the index of current_node in it.
+        # full_path is read-only, give the robot a new path with handle_path instead
         self.full_path = None
-        self.remaining_path = None
-        
+        self._path_view = None
+        self._cursor = 0
+
         self.current_node = None
         self.next_node = None
-        
+
         self.task_priority = None
-        
+
         self.robot_speed = 2 # m/s
         self.total_load = None  # Total weight the robot is carrying
         self.total_items = None # Total no.of items robot is carrying
-    
+
+        # Incremented on every new path so cached pair results can be invalidated
+        self.path_version = 0
+        # Incremented whenever priority, battery level or path progress changes,
+        # so cached per-robot scores can be refreshed
+        self.state_version = 0
+
+        # Objects (e.g. NodeRobotIndex) notified when the route changes
+        self.path_listeners = []
+
+    @property
+    def remaining_path(self):
+        # Cheap view of the nodes after current_node (no copy for integer node ids)
+        if self._path_view is None:
+            return None
+        return self._path_view[self._cursor + 1:]
+
+    @property
+    def path_index(self):
+        # Index of current_node in full_path
+        return self._cursor
+
+    @property
+    def previous_node(self):
+        # Node the robot came from on its current path, None at the start
+        if self.full_path is None or self._cursor == 0:
+            return None
+        return self.full_path[self._cursor - 1]
+
+    def __getstate__(self):
+        # Views and listeners belong to the running simulation, not to the robot
+        return {slot: getattr(self, slot) for slot in self.__slots__
+                if slot not in ("_path_view", "path_listeners")}
+
+    def __setstate__(self, state):
+        for slot, value in state.items():
+            setattr(self, slot, value)
+        path = self.full_path
+        self._path_view = memoryview(path) if isinstance(path, array) else path
+        self.path_listeners = []
+
+    def add_path_listener(self, listener):
+        self.path_listeners.append(listener)
+
+    def remove_path_listener(self, listener):
+        self.path_listeners.remove(listener)
+
     def handle_path(self, path):
-        self.full_path = path.copy()  # Create a copy for full_path
-        self.remaining_path = path.copy()  # Create another copy for remaining_path
-        self.current_node = self.remaining_path.pop(0)
-        self.next_node = self.remaining_path[0] if self.remaining_path else None
-        
+        try:
+            # Compact storage: 8 bytes per node instead of a list of int objects
+            self.full_path = array("q", path)
+            self._path_view = memoryview(self.full_path)
+        except TypeError:
+            # Node ids that are not integers are kept in a tuple
+            self.full_path = tuple(path)
+            self._path_view = self.full_path
+
+        self._cursor = 0
+        self.current_node = self.full_path[0]
+        self.next_node = self.full_path[1] if len(self.full_path) > 1 else None
+        self.path_version += 1
+        self.state_version += 1
+
+        for listener in self.path_listeners:
+            listener.on_path_changed(self)
+
     def update_battery_level(self, lvl):
         self.battery_lvl = lvl
-        
+        self.state_version += 1
+
     def update_priority(self, priority):
-        self.task_priority = priority 
-        
+        self.task_priority = priority
+        self.state_version += 1
+
     def move_forward(self):
-        self.current_node = self.remaining_path.pop(0)
-        if len(self.remaining_path)>0:
-            self.next_node = self.remaining_path[0]
+        departed_node = self.current_node
+        cursor = self._cursor + 1
+        self.current_node = self.full_path[cursor]  # IndexError if the path is finished
+        self._cursor = cursor
+        if cursor + 1 < len(self.full_path):
+            self.next_node = self.full_path[cursor + 1]
         else:
             self.next_node = None
-          
+        self.state_version += 1
+
+        for listener in self.path_listeners:
+            listener.on_advance(self, departed_node)
+
     def reset_robot(self):
         self.full_path = None
-        self.remaining_path = None
+        self._path_view = None
+        self._cursor = 0
         self.current_node = None
         self.next_node = None
         self.current_pose = None
-        
-    def raise_request(self):    
+        self.path_version += 1
+        self.state_version += 1
+
+        for listener in self.path_listeners:
+            listener.on_path_changed(self)
+
+    def raise_request(self):
         pass
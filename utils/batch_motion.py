@@ -0,0 +1,109 @@
+from typing import Callable, Dict, List, Any, Sequence
+import numpy as np
+from utils.base_robot import Robot
+
+
+class BatchMotion:
+    """
+    Vectorized motion stage that advances every moving robot at once.
+
+    Poses, targets and speeds of the whole fleet live in NumPy arrays. One
+    call to advance() steps all moving robots towards their next node and
+    detects arrivals in bulk; move_forward() is only called for the robots
+    that actually reached their node. The stage listens to the robots' path
+    changes to keep the target array current.
+    """
+
+    def __init__(
+        self,
+        robots: List[Robot],
+        nodes: Dict[Any, Any],
+        speed_of: Callable[[Robot], float]
+    ):
+        """
+        Initialize the arrays from the robots' current state.
+
+        Args:
+            robots: Robots to move, in a fixed order
+            nodes: Mapping of node ids to (x, y) positions
+            speed_of: Function returning the distance a robot travels per tick
+        """
+        self.robots = robots
+        self.nodes = nodes
+        self.speed_of = speed_of
+        self.index_of = {robot: i for i, robot in enumerate(robots)}
+
+        count = len(robots)
+        self.poses = np.full((count, 2), np.nan)
+        self.targets = np.full((count, 2), np.nan)
+        self.speeds = np.zeros(count)
+
+        for robot in robots:
+            robot.add_path_listener(self)
+        self.sync_all()
+
+    def sync_all(self):
+        """Reload poses, targets and speeds after robots were moved by hand."""
+        for robot in self.robots:
+            self.sync_robot(robot)
+
+    def sync_robot(self, robot: Robot):
+        """Reload one robot's pose, target and speed."""
+        i = self.index_of[robot]
+        self.poses[i] = robot.current_pose if robot.current_pose is not None else (np.nan, np.nan)
+        self.speeds[i] = self.speed_of(robot)
+        self._sync_target(robot, i)
+
+    def on_path_changed(self, robot: Robot):
+        self.sync_robot(robot)
+
+    def on_advance(self, robot: Robot, departed_node: Any):
+        self._sync_target(robot, self.index_of[robot])
+
+    def _sync_target(self, robot: Robot, i: int):
+        if robot.next_node is None:
+            self.targets[i] = self.poses[i]
+        else:
+            self.targets[i] = self.nodes[robot.next_node]
+
+    def advance(self, moving: Sequence[bool]) -> List[Robot]:
+        """
+        Move every robot flagged as moving by one tick of travel.
+
+        Args:
+            moving: One flag per robot, True if it should move this tick
+
+        Returns:
+            Robots that arrived at their next node
+        """
+        moving = np.asarray(moving, dtype=bool)
+        if not moving.any():
+            return []
+
+        delta = self.targets - self.poses
+        distance = np.hypot(delta[:, 0], delta[:, 1])
+
+        # Robots already on their target are not moved, as in the scalar loop
+        arrived_mask = moving & (distance != 0) & (distance <= self.speeds)
+        stepping_mask = moving & (distance > self.speeds)
+
+        stepping = np.flatnonzero(stepping_mask)
+        if stepping.size:
+            # Same operation order as the scalar loop: pose + delta / distance * speed
+            self.poses[stepping] += (delta[stepping] / distance[stepping, None]) * self.speeds[stepping, None]
+
+            # Robot objects keep plain tuples so the rest of the code is unaffected
+            for i, (x, y) in zip(stepping.tolist(), self.poses[stepping].tolist()):
+                self.robots[i].current_pose = (x, y)
+
+        arrived = []
+        for i in np.flatnonzero(arrived_mask).tolist():
+            robot = self.robots[i]
+            robot.move_forward()
+            robot.current_pose = self.nodes[robot.current_node]
+            self.poses[i] = robot.current_pose
+            if robot.next_node is None:
+                self.targets[i] = self.poses[i]
+            arrived.append(robot)
+
+        return arrived
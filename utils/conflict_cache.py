@@ -0,0 +1,125 @@
+from typing import Any, Callable, Dict, List, Set, Tuple
+from utils.base_robot import Robot
+
+
+class ConflictCache:
+    """
+    Pairwise aisle conflicts, recomputed only for robots that changed.
+
+    An entry holds the conflicts of a robot with another robot in the aisles
+    their paths share. Everything in it is derived from the two full paths,
+    except is_immediate, which depends on the robot's next node. A robot's
+    state_version goes up on handle_path, move_forward and priority or
+    battery updates, and its path_version on handle_path and reset_robot:
+
+    - When a robot's path_version changed, every entry it is part of is purged.
+    - When only its state_version changed, its own entries are kept and their
+      is_immediate flags are refreshed on the next lookup.
+
+    So a new path costs one recomputation per pair, stepping along a path
+    costs a flag update per cached conflict, and robots waiting on a node are
+    answered from the cache as they are.
+
+    Cached conflict lists are shared between lookups and must not be modified.
+    """
+
+    def __init__(self):
+        """Initialize an empty cache."""
+        # (robot, other robot) -> [robot state_version, conflicts]
+        self.entries: Dict[Tuple[Robot, Robot], list] = {}
+        # robot -> keys of the entries it is part of
+        self.keys_of: Dict[Robot, Set[tuple]] = {}
+        # robot -> path_version its entries were computed for
+        self.path_versions: Dict[Robot, int] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.purged = 0
+
+    def get_conflicts(
+        self,
+        robot: Robot,
+        other_robot: Robot,
+        compute: Callable[[], List[Dict]]
+    ) -> List[Dict]:
+        """
+        Return the aisle conflicts of a robot with another one, computing them on a miss.
+
+        Args:
+            robot: The robot to check conflicts for
+            other_robot: The robot it may be in conflict with
+            compute: Function computing the conflicts of the pair
+
+        Returns:
+            List of conflict dictionaries
+        """
+        self.refresh(robot)
+        self.refresh(other_robot)
+
+        key = (robot, other_robot)
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            conflicts = compute()
+            self.entries[key] = [robot.state_version, conflicts]
+            self.keys_of.setdefault(robot, set()).add(key)
+            self.keys_of.setdefault(other_robot, set()).add(key)
+            return conflicts
+
+        self.hits += 1
+        if entry[0] != robot.state_version:
+            # The robot moved along its path; only the aisle its next move enters changed
+            next_node = robot.next_node
+            entry[0] = robot.state_version
+            entry[1] = [
+                dict(c, is_immediate=next_node is not None and next_node in c["conflict_points"])
+                for c in entry[1]
+            ]
+            self.refreshes += 1
+        return entry[1]
+
+    def refresh(self, robot: Robot):
+        """Purge every entry of a robot that got a new path since they were computed."""
+        if self.path_versions.get(robot) == robot.path_version:
+            return
+        self.path_versions[robot] = robot.path_version
+
+        keys = self.keys_of.pop(robot, ())
+        for key in keys:
+            del self.entries[key]
+            other = key[1] if key[0] is robot else key[0]
+            self.keys_of[other].discard(key)
+        self.purged += len(keys)
+
+    def clear(self):
+        """Drop every cached entry and reset the counters."""
+        self.entries.clear()
+        self.keys_of.clear()
+        self.path_versions.clear()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.purged = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups answered from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the cache counters.
+
+        Returns:
+            Dictionary with hits, misses, refreshed entries, purged entries, size and hit rate
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "purged": self.purged,
+            "size": len(self.entries),
+            "hit_rate": self.hit_rate
+        }
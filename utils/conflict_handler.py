@@ -1,6 +1,14 @@
 from enum import Enum
-from typing import List, Dict, Tuple, Any
+from typing import List, Dict, Tuple, Any, Optional
 from utils.base_robot import Robot
+from utils.node_index import NodeRobotIndex
+from utils.aisle_cache import AisleCache
+from utils.conflict_cache import ConflictCache
+from utils.reservation_table import ReservationTable
+from utils.wait_for_graph import WaitForGraph
+from utils.sim_logging import get_logger, TRACE
+
+logger = get_logger(__name__)
 
 
 class ConflictType(Enum):
@@ -25,6 +33,55 @@ class Decision(Enum):
 class ConflictDetector:
     """Responsible for detecting conflicts between robots."""
     
+    # Detection modes: compare static paths pairwise, or look up space-time reservations
+    MODES = ("aisle", "reservation")
+    
+    def __init__(
+        self,
+        node_index: NodeRobotIndex = None,
+        aisle_cache: AisleCache = None,
+        reservation_table: ReservationTable = None,
+        mode: str = "aisle",
+        conflict_cache: ConflictCache = None
+    ):
+        """
+        Initialize with an optional node index used to prune pairwise checks
+        and optional caches for the aisles and conflicts of each robot pair.
+        
+        Args:
+            node_index: Index of the robots whose route touches each node
+            aisle_cache: Cache of connected aisles keyed by path versions
+            reservation_table: Space-time reservations, required in reservation mode
+            mode: "aisle" (default) or "reservation"
+            conflict_cache: Cache of pairwise aisle conflicts, recomputed only
+                for robots that changed since the last lookup (aisle mode)
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown detection mode '{mode}'")
+        if mode == "reservation" and reservation_table is None:
+            raise ValueError("Reservation mode needs a reservation table")
+        
+        self.node_index = node_index
+        self.aisle_cache = aisle_cache
+        self.reservation_table = reservation_table
+        self.mode = mode
+        self.conflict_cache = conflict_cache
+    
+    def get_connected_aisles(self, robot1: Robot, robot2: Robot) -> List[List[Any]]:
+        """
+        Get the connected aisles of two robots, from the cache when possible.
+        
+        Args:
+            robot1: First robot
+            robot2: Second robot
+            
+        Returns:
+            List of aisles (lists of connected points)
+        """
+        if self.aisle_cache is None:
+            return self.find_connected_aisles(robot1, robot2)
+        return self.aisle_cache.get_aisles(robot1, robot2, self.find_connected_aisles)
+    
     @staticmethod
     def find_connected_aisles(robot1: Robot, robot2: Robot) -> List[List[Any]]:
         """
@@ -94,7 +151,8 @@ class ConflictDetector:
         Returns:
             True if next move is into conflict, False otherwise
         """
-        if not robot.remaining_path:
+        # next_node is None exactly when the remaining path is empty
+        if robot.next_node is None:
             return False
         
         # Check if the next node is in the conflict points
@@ -183,11 +241,14 @@ class ConflictDetector:
         except ValueError:
             return Direction.UNKNOWN
     
-    @staticmethod
-    def find_conflicts(robot: Robot, robots: List[Robot]) -> List[Dict]:
+    def find_conflicts(self, robot: Robot, robots: List[Robot]) -> List[Dict]:
         """
         Find all conflicts between the given robot and all other robots.
         
+        When a node index is attached, only the indexed robots that share at
+        least one route node with the robot are compared. Robots that share no
+        node can neither occupy its next node nor meet it in an aisle.
+        
         Args:
             robot: The robot to check conflicts for
             robots: List of all robots in the system
@@ -195,67 +256,238 @@ class ConflictDetector:
         Returns:
             List of conflict dictionaries with immediate relevance flag
         """
+        if self.mode == "reservation":
+            return self.find_reservation_conflicts(robot)
+        
         conflicts = []
         
+        if self.node_index is not None:
+            robots = self.node_index.candidates(robot)
+        
         # Check for conflict with the current robot with all the other robots
         for other_robot in robots:
             # Skip comparing the robot with itself
             if other_robot.name == robot.name:
                 continue
             
-            # Check if robot's next node is the current position of other robot
-            if robot.next_node and robot.next_node == other_robot.current_node:
-                # Immediate collision risk - the node is already occupied
+            if not other_robot.full_path:
+                # A robot without a path only holds the node it stands on
+                conflicts.extend(self.occupancy_conflicts(robot, other_robot))
+                continue
+            
+            conflicts.extend(self.pair_conflicts(robot, other_robot))
+        
+        return conflicts
+    
+    def pair_conflicts(self, robot: Robot, other_robot: Robot) -> List[Dict]:
+        """
+        Find the conflicts of a robot with one other robot, from the cache when possible.
+        
+        Args:
+            robot: The robot to check conflicts for
+            other_robot: The robot it may be in conflict with
+            
+        Returns:
+            List of conflict dictionaries, shared with the cache (do not modify)
+        """
+        if self.conflict_cache is None:
+            return self.conflicts_with(robot, other_robot)
+        
+        # Occupancy changes with every step of the other robot and is cheap to check;
+        # the aisle conflicts are only recomputed when they can have changed
+        conflicts = self.conflict_cache.get_conflicts(
+            robot, other_robot, lambda: self.aisle_conflicts(robot, other_robot)
+        )
+        if robot.next_node and robot.next_node == other_robot.current_node:
+            return self.occupancy_conflicts(robot, other_robot) + conflicts
+        return conflicts
+    
+    def conflicts_with(self, robot: Robot, other_robot: Robot, aisles: List[List[Any]] = None) -> List[Dict]:
+        """
+        Find the conflicts of a robot with one other robot.
+        
+        Args:
+            robot: The robot to check conflicts for
+            other_robot: The robot it may be in conflict with
+            aisles: Connected aisles of the pair, looked up if omitted
+            
+        Returns:
+            List of conflict dictionaries with immediate relevance flag
+        """
+        conflicts = self.occupancy_conflicts(robot, other_robot)
+        conflicts.extend(self.aisle_conflicts(robot, other_robot, aisles))
+        return conflicts
+    
+    @staticmethod
+    def occupancy_conflicts(robot: Robot, other_robot: Robot) -> List[Dict]:
+        """
+        Find the conflict of a robot whose next node is occupied by another robot.
+        
+        Args:
+            robot: The robot to check conflicts for
+            other_robot: The robot that may stand on its next node
+            
+        Returns:
+            List with the node occupied conflict, empty if there is none
+        """
+        # Check if robot's next node is the current position of other robot
+        if robot.next_node and robot.next_node == other_robot.current_node:
+            # Immediate collision risk - the node is already occupied
+            return [{
+                "robot": other_robot.name,
+                "robot_obj": other_robot,
+                "conflict_points": [robot.next_node],
+                "conflict_type": ConflictType.NODE,
+                "is_immediate": True,
+                "steps_to_conflict": 0,
+                "other_steps_to_conflict": 0,
+                "node_occupied": True,  # Flag to indicate node is currently occupied
+                "direction": Direction.UNKNOWN  # Direction doesn't matter for occupied nodes
+            }]
+        return []
+    
+    def aisle_conflicts(self, robot: Robot, other_robot: Robot, aisles: List[List[Any]] = None) -> List[Dict]:
+        """
+        Find the conflicts of a robot with another one in the aisles their paths share.
+        
+        The result depends on both paths and the robot's next node, but not on
+        how far along its path the other robot is.
+        
+        Args:
+            robot: The robot to check conflicts for
+            other_robot: The robot it may be in conflict with
+            aisles: Connected aisles of the pair, looked up if omitted
+            
+        Returns:
+            List of conflict dictionaries with immediate relevance flag
+        """
+        conflicts = []
+        
+        # Find connected aisles that are common in both paths
+        if aisles is None:
+            aisles = self.get_connected_aisles(robot, other_robot)
+        
+        if logger.isEnabledFor(TRACE):
+            logger.log(TRACE, "Found %d aisles between %s and %s", len(aisles), robot.name, other_robot.name)
+        
+        for aisle in aisles:
+            # Classify as single node or aisle
+            conflict_type = ConflictType.NODE if len(aisle) == 1 else ConflictType.AISLE
+            
+            # Check if the next move leads to this conflict
+            is_immediate = ConflictDetector.is_next_move_into_conflict(robot, aisle)
+            steps_to_conflict = ConflictDetector.steps_to_conflict(robot, aisle)
+            
+            # Check if other robot is also heading to this conflict
+            other_steps = ConflictDetector.steps_to_conflict(other_robot, aisle)
+            other_heading_to_conflict = other_steps >= 0
+            
+            # Only consider conflicts if both robots are heading toward the same aisle
+            if not other_heading_to_conflict:
+                continue
+            
+            # Determine direction of travel
+            direction = Direction.UNKNOWN
+            if conflict_type == ConflictType.AISLE:
+                direction = ConflictDetector.determine_aisle_direction(robot, other_robot, aisle)
+            
+            conflicts.append({
+                "robot": other_robot.name,
+                "robot_obj": other_robot,
+                "conflict_points": aisle,
+                "conflict_type": conflict_type,
+                "is_immediate": is_immediate,
+                "steps_to_conflict": steps_to_conflict,
+                "other_steps_to_conflict": other_steps,
+                "node_occupied": False,
+                "direction": direction
+            })
+        
+        return conflicts
+    
+    def find_reservation_conflicts(self, robot: Robot) -> List[Dict]:
+        """
+        Find conflicts by looking up the robot's upcoming steps in the reservation table.
+        
+        A vertex conflict is another robot reserving the same node at the same
+        timestep. A swap conflict is another robot reserving the same edge in
+        the opposite direction at the same timestep; its conflict points are
+        the nodes both robots pass on the way to the swap, so the robot holds
+        back before entering a stretch the other robot is coming through.
+        
+        Args:
+            robot: The robot to check conflicts for
+            
+        Returns:
+            List of conflict dictionaries in the same format as find_conflicts
+        """
+        table = self.reservation_table
+        conflicts = []
+        
+        if robot.next_node is None:
+            return conflicts
+        
+        # Next node is the current position of another robot
+        for other_robot in table.node_owners(robot.next_node, 0):
+            if other_robot is robot:
+                continue
+            conflicts.append({
+                "robot": other_robot.name,
+                "robot_obj": other_robot,
+                "conflict_points": [robot.next_node],
+                "conflict_type": ConflictType.NODE,
+                "is_immediate": True,
+                "steps_to_conflict": 0,
+                "other_steps_to_conflict": 0,
+                "node_occupied": True,
+                "direction": Direction.UNKNOWN
+            })
+        
+        ahead = list(robot.remaining_path[:table.horizon])
+        reported = set()
+        previous = robot.current_node
+        
+        for t, node in enumerate(ahead, start=1):
+            # Vertex conflicts: both robots reach the node at the same timestep
+            for other_robot in table.node_owners(node, t):
+                if other_robot is robot or (other_robot, "vertex") in reported:
+                    continue
+                reported.add((other_robot, "vertex"))
                 conflicts.append({
                     "robot": other_robot.name,
                     "robot_obj": other_robot,
-                    "conflict_points": [robot.next_node],
+                    "conflict_points": [node],
                     "conflict_type": ConflictType.NODE,
-                    "is_immediate": True,
-                    "steps_to_conflict": 0,
-                    "other_steps_to_conflict": 0,
-                    "node_occupied": True,  # Flag to indicate node is currently occupied
-                    "direction": Direction.UNKNOWN  # Direction doesn't matter for occupied nodes
+                    "is_immediate": t == 1,
+                    "steps_to_conflict": t,
+                    "other_steps_to_conflict": t,
+                    "node_occupied": False,
+                    "direction": Direction.UNKNOWN
                 })
-                
-            # Find connected aisles that are common in both paths
-            aisles = ConflictDetector.find_connected_aisles(robot, other_robot)
             
-            print(f"Found {len(aisles)} aisles between {robot.name} and {other_robot.name}")
+            # Swap conflicts: the other robot traverses the same edge the other way
+            for other_robot in table.edge_owners(node, previous, t):
+                if other_robot is robot or (other_robot, "swap") in reported:
+                    continue
+                reported.add((other_robot, "swap"))
+                other_nodes = table.nodes_of(other_robot)
+                conflict_points = [n for n in ahead[:t] if n in other_nodes]
+                conflicts.append({
+                    "robot": other_robot.name,
+                    "robot_obj": other_robot,
+                    "conflict_points": conflict_points,
+                    "conflict_type": ConflictType.NODE if len(conflict_points) == 1 else ConflictType.AISLE,
+                    "is_immediate": robot.next_node in conflict_points,
+                    "steps_to_conflict": t,
+                    "other_steps_to_conflict": t,
+                    "node_occupied": False,
+                    "direction": Direction.OPPOSITE
+                })
             
-            if aisles:
-                for aisle in aisles:
-                    # Classify as single node or aisle
-                    conflict_type = ConflictType.NODE if len(aisle) == 1 else ConflictType.AISLE
-                    
-                    # Check if the next move leads to this conflict
-                    is_immediate = ConflictDetector.is_next_move_into_conflict(robot, aisle)
-                    steps_to_conflict = ConflictDetector.steps_to_conflict(robot, aisle)
-                    
-                    # Check if other robot is also heading to this conflict
-                    other_steps = ConflictDetector.steps_to_conflict(other_robot, aisle)
-                    other_heading_to_conflict = other_steps >= 0
-                    
-                    # Only consider conflicts if both robots are heading toward the same aisle
-                    if not other_heading_to_conflict:
-                        continue
-                    
-                    # Determine direction of travel
-                    direction = Direction.UNKNOWN
-                    if conflict_type == ConflictType.AISLE:
-                        direction = ConflictDetector.determine_aisle_direction(robot, other_robot, aisle)
-                    
-                    conflicts.append({
-                        "robot": other_robot.name,
-                        "robot_obj": other_robot,
-                        "conflict_points": aisle,
-                        "conflict_type": conflict_type,
-                        "is_immediate": is_immediate,
-                        "steps_to_conflict": steps_to_conflict,
-                        "other_steps_to_conflict": other_steps,
-                        "node_occupied": False,
-                        "direction": direction
-                    })
+            previous = node
+        
+        if logger.isEnabledFor(TRACE):
+            logger.log(TRACE, "Found %d reservation conflicts for %s", len(conflicts), robot.name)
         
         return conflicts
 
@@ -271,14 +503,102 @@ class ConflictResolver:
         "distance": 0.1
     }
     
-    def __init__(self, weights: Dict[str, float] = None):
+    def __init__(
+        self,
+        weights: Dict[str, float] = None,
+        conflict_detector: ConflictDetector = None,
+        wait_for_graph: WaitForGraph = None
+    ):
         """
         Initialize with custom weights if provided.
         
         Args:
             weights: Custom weights for scoring factors
+            conflict_detector: Detector used by decide_all, a default one is created if omitted
+            wait_for_graph: Graph recording which robot each WAIT is for, a default
+                one is created if omitted
         """
         self.weights = weights or self.DEFAULT_WEIGHTS
+        self.conflict_detector = conflict_detector or ConflictDetector()
+        self.wait_for_graph = wait_for_graph or WaitForGraph()
+        
+        # Deadlocked robots that waited again since the last pop_deadlocks(),
+        # mapped to the members of their cycle
+        self.deadlocked: Dict[Robot, List[Robot]] = {}
+        
+        # Objects (e.g. FleetStats) notified with on_conflicts(robot, conflicts) on every decision
+        self.conflict_listeners = []
+        
+        # robot -> (state_version, base score, node score), see robot_scores()
+        self.score_cache: Dict[Robot, Tuple[int, float, float]] = {}
+    
+    def decide_all(self, robots: List[Robot], deciding: List[Robot] = None) -> Dict[str, str]:
+        """
+        Decide for many robots at once from a single snapshot of the fleet.
+        
+        Every robot pair is found once and the conflicts of both sides are
+        handed out together, instead of each robot rediscovering the pair.
+        Each side's aisles are grouped along its own path, as find_conflicts
+        does, because the grouping depends on which path orders the shared
+        points. Robots are processed in name order, so the result does not
+        depend on the order of the input list.
+        
+        Args:
+            robots: All robots in the system
+            deciding: Robots that need a decision, defaults to every robot with a path
+            
+        Returns:
+            Dictionary mapping robot names to decisions (FORWARD or WAIT)
+        """
+        detector = self.conflict_detector
+        by_name = lambda r: r.name
+        
+        active = sorted((r for r in robots if r.full_path), key=by_name)
+        if deciding is None:
+            deciding = active
+        else:
+            deciding = sorted((r for r in deciding if r.full_path), key=by_name)
+        
+        conflicts = {robot: [] for robot in deciding}
+        
+        if detector.mode == "reservation":
+            # Reservation lookups are already per robot, there is no pair work to share
+            for robot in deciding:
+                conflicts[robot] = detector.find_reservation_conflicts(robot)
+        else:
+            seen_pairs = set()
+            for robot in deciding:
+                others = detector.node_index.candidates(robot) if detector.node_index is not None else active
+                for other_robot in others:
+                    if other_robot is robot:
+                        continue
+                    if not other_robot.full_path:
+                        # A robot without a path only holds the node it stands on
+                        conflicts[robot].extend(detector.occupancy_conflicts(robot, other_robot))
+                        continue
+                    
+                    pair = (robot, other_robot) if robot.name < other_robot.name else (other_robot, robot)
+                    if pair in seen_pairs:
+                        continue
+                    seen_pairs.add(pair)
+                    
+                    # Aisles are grouped along the path of the robot they are found for
+                    first, second = pair
+                    if detector.conflict_cache is None:
+                        if first in conflicts:
+                            conflicts[first].extend(detector.conflicts_with(first, second))
+                        if second in conflicts:
+                            conflicts[second].extend(detector.conflicts_with(second, first))
+                        continue
+                    
+                    # Aisle conflicts are only recomputed when either robot changed,
+                    # sharing the cache entries of find_conflicts
+                    if first in conflicts:
+                        conflicts[first].extend(detector.pair_conflicts(first, second))
+                    if second in conflicts:
+                        conflicts[second].extend(detector.pair_conflicts(second, first))
+        
+        return {robot.name: self.handle_conflicts(conflicts[robot], robot) for robot in deciding}
     
     @staticmethod
     def find_entry_point_to_aisle(robot: Robot, aisle_points: List[Any]) -> Tuple[int, Any]:
@@ -306,6 +626,35 @@ class ConflictResolver:
             
         return entry_index, entry_point
     
+    def robot_scores(self, robot: Robot) -> Tuple[float, float]:
+        """
+        Get the per-robot terms of the conflict scores.
+        
+        They only change with the robot's priority, battery level and path
+        progress, so they are cached per robot and recomputed only when its
+        state_version has moved on.
+        
+        Args:
+            robot: Robot to score
+            
+        Returns:
+            Tuple of (base_score, node_score): the priority and battery terms,
+            and those plus the distance to goal term used for node conflicts
+        """
+        entry = self.score_cache.get(robot)
+        if entry is not None and entry[0] == robot.state_version:
+            return entry[1], entry[2]
+        
+        # Battery score - lower battery means higher score
+        battery_score = (100 - robot.battery_lvl) / 100
+        
+        base_score = (robot.task_priority * self.weights["priority"]) + \
+                    (battery_score * self.weights["battery"])
+        node_score = base_score + (len(robot.remaining_path) * self.weights["distance"])
+        
+        self.score_cache[robot] = (robot.state_version, base_score, node_score)
+        return base_score, node_score
+    
     def calculate_node_conflict_scores(
         self, 
         robot: Robot, 
@@ -321,30 +670,8 @@ class ConflictResolver:
         Returns:
             Tuple of (robot_score, other_score)
         """
-        # Extract scoring factors
-        robot_priority = robot.task_priority
-        other_priority = other_robot.task_priority
-        
-        robot_battery = robot.battery_lvl
-        other_battery = other_robot.battery_lvl
-        
-        robot_distance_to_goal = len(robot.remaining_path)
-        other_distance_to_goal = len(other_robot.remaining_path)
-
-        # Battery score - lower battery means higher score
-        robot_battery_score = (100 - robot_battery) / 100
-        other_battery_score = (100 - other_battery) / 100
-            
-        # Calculate composite scores
-        robot_score = (robot_priority * self.weights["priority"]) + \
-                    (robot_battery_score * self.weights["battery"]) + \
-                    (robot_distance_to_goal * self.weights["distance"])
-                        
-        other_score = (other_priority * self.weights["priority"]) + \
-                    (other_battery_score * self.weights["battery"]) + \
-                    (other_distance_to_goal * self.weights["distance"])
-                    
-        return robot_score, other_score
+        # Priority, battery and distance to goal only depend on each robot
+        return self.robot_scores(robot)[1], self.robot_scores(other_robot)[1]
     
     def calculate_aisle_conflict_scores(
         self, 
@@ -371,21 +698,18 @@ class ConflictResolver:
         if direction == Direction.SAME:
             # Simple comparison of entry indices - lower is better
             if robot_entry_index < other_entry_index:
-                print(f"Same direction conflict: {robot.name} is closer to aisle than {other_robot.name}")
+                logger.debug("Same direction conflict: %s is closer to aisle than %s", robot.name, other_robot.name)
                 return 1.0, 0.0  # First robot gets priority
             elif robot_entry_index > other_entry_index:
-                print(f"Same direction conflict: {other_robot.name} is closer to aisle than {robot.name}")
+                logger.debug("Same direction conflict: %s is closer to aisle than %s", other_robot.name, robot.name)
                 return 0.0, 1.0  # Second robot gets priority
             else:
-                print(f"Same direction conflict but equal distance - falling back to normal scoring")
+                logger.debug("Same direction conflict but equal distance - falling back to normal scoring")
                 # Fall back to normal scoring if they're equidistant
         
-        # Extract scoring factors
-        robot_priority = robot.task_priority
-        other_priority = other_robot.task_priority
-        
-        robot_battery = robot.battery_lvl
-        other_battery = other_robot.battery_lvl
+        # Priority and battery terms come from the per-robot cache
+        robot_base_score = self.robot_scores(robot)[0]
+        other_base_score = self.robot_scores(other_robot)[0]
         
         # Calculate distance to goal
         robot_distance_to_goal = len(robot.full_path) - robot_entry_index if robot_entry_index != float('inf') else 0
@@ -395,19 +719,13 @@ class ConflictResolver:
         robot_proximity_score = 1/(robot_entry_index+1) if robot_entry_index != float('inf') else 0
         other_proximity_score = 1/(other_entry_index+1) if other_entry_index != float('inf') else 0
         
-        # Battery score - lower battery means higher score
-        robot_battery_score = (100 - robot_battery) / 100
-        other_battery_score = (100 - other_battery) / 100
-        
         # Calculate composite scores
-        robot_score = (robot_proximity_score * self.weights["proximity"]) + \
-                    (robot_priority * self.weights["priority"]) + \
-                    (robot_battery_score * self.weights["battery"]) + \
+        robot_score = robot_base_score + \
+                    (robot_proximity_score * self.weights["proximity"]) + \
                     (robot_distance_to_goal * self.weights["distance"])
                     
-        other_score = (other_proximity_score * self.weights["proximity"]) + \
-                    (other_priority * self.weights["priority"]) + \
-                    (other_battery_score * self.weights["battery"]) + \
+        other_score = other_base_score + \
+                    (other_proximity_score * self.weights["proximity"]) + \
                     (other_distance_to_goal * self.weights["distance"])
         
         return robot_score, other_score
@@ -416,6 +734,9 @@ class ConflictResolver:
         """
         Handle conflicts and make a decision.
         
+        The decision is recorded in the wait-for graph: a WAIT adds an edge to
+        the robot being waited on, a FORWARD removes the robot's edge.
+        
         Args:
             conflicts: List of conflicts
             robot: The robot to make a decision for
@@ -423,21 +744,63 @@ class ConflictResolver:
         Returns:
             Decision (FORWARD or WAIT)
         """
+        for listener in self.conflict_listeners:
+            listener.on_conflicts(robot, conflicts)
+        
+        decision, blocker = self.resolve_conflicts(conflicts, robot)
+        
+        graph = self.wait_for_graph
+        if blocker is None:
+            graph.clear_wait(robot)
+        else:
+            cycle = graph.set_wait(robot, blocker)
+            if cycle is not None:
+                logger.info("Deadlock detected: %s", " -> ".join(r.name for r in cycle))
+            else:
+                cycle = graph.cycle_of(robot)
+            if cycle is not None:
+                self.deadlocked[robot] = cycle
+        
+        return decision
+    
+    def pop_deadlocks(self) -> Dict[Robot, List[Robot]]:
+        """
+        Take the deadlocked robots collected since the last call.
+        
+        Returns:
+            Dictionary mapping each deadlocked robot that decided WAIT to the
+            members of its cycle
+        """
+        deadlocked, self.deadlocked = self.deadlocked, {}
+        return deadlocked
+    
+    def resolve_conflicts(self, conflicts: List[Dict], robot: Robot) -> Tuple[str, Optional[Robot]]:
+        """
+        Make a decision without recording it in the wait-for graph.
+        
+        Args:
+            conflicts: List of conflicts
+            robot: The robot to make a decision for
+            
+        Returns:
+            Tuple of (decision, robot waited on or None for FORWARD)
+        """
         if not conflicts:
-            return Decision.FORWARD.value  # No conflicts, robot can proceed
+            return Decision.FORWARD.value, None  # No conflicts, robot can proceed
             
         # Filter to only immediate conflicts - where next move leads into conflict
         immediate_conflicts = [c for c in conflicts if c["is_immediate"]]
         
         # If there are no immediate conflicts, the robot can proceed
         if not immediate_conflicts:
-            return Decision.FORWARD.value
+            return Decision.FORWARD.value, None
         
         # Check first for occupied nodes - highest priority conflicts
         occupied_node_conflicts = [c for c in immediate_conflicts if c.get("node_occupied", False)]
         if occupied_node_conflicts:
             # Node is occupied, must wait
-            return Decision.WAIT.value
+            blocker = min((c["robot_obj"] for c in occupied_node_conflicts), key=lambda r: r.name)
+            return Decision.WAIT.value, blocker
         
         aisle_decisions = []
             
@@ -450,22 +813,20 @@ class ConflictResolver:
             
             # Check if the conflict points are still in the remaining paths
             if not (set(conflict_points) & set(robot.remaining_path) & set(other_robot.remaining_path)):
-                print("----No Intersection-------")
-                print(f"conflict points: {conflict_points}")
-                print("***can skip this conflict***\n")
+                logger.debug("No intersection left for conflict points %s, skipping conflict", conflict_points)
                 continue
                 
             # Handle NODE conflict
             if conflict_type == ConflictType.NODE:
                 # Check if robots are heading to the same next node
                 if robot.next_node != other_robot.next_node:
-                    print("No immediate conflict at node - can move forward!")
+                    logger.debug("No immediate conflict at node - can move forward")
                     continue
                 
                 # Calculate scores for NODE conflict
                 robot_score, other_score = self.calculate_node_conflict_scores(robot, other_robot)
                 
-                print(f"Node conflict scores with {other_robot_name}: {robot_score:.4f} vs {other_score:.4f}")
+                logger.debug("Node conflict scores with %s: %.4f vs %.4f", other_robot_name, robot_score, other_score)
                 
                 # Create aisle info
                 aisle_info = {
@@ -485,10 +846,10 @@ class ConflictResolver:
                 else:
                     # Scores are equal, use name-based tie-breaker
                     if robot.name < other_robot.name:
-                        print(f"Tie resolved: {robot.name} gets priority over {other_robot.name}")
+                        logger.debug("Tie resolved: %s gets priority over %s", robot.name, other_robot.name)
                         aisle_decisions.append((Decision.FORWARD.value, aisle_info))
                     else:
-                        print(f"Tie resolved: {other_robot.name} gets priority over {robot.name}")
+                        logger.debug("Tie resolved: %s gets priority over %s", other_robot.name, robot.name)
                         aisle_decisions.append((Decision.WAIT.value, aisle_info))
                 
                 continue
@@ -499,13 +860,13 @@ class ConflictResolver:
             other_entry_index, other_entry_point = self.find_entry_point_to_aisle(other_robot, conflict_points)
             
             if conflict_type == ConflictType.AISLE and direction == Direction.SAME:
-                print(f"Same direction aisle conflict with {other_robot_name}")
+                logger.debug("Same direction aisle conflict with %s", other_robot_name)
     
                 # Check if robots would collide
                 if robot.next_node == other_robot.current_node:
                     # Would move to the same node as other robot - must wait
-                    print(f"Would collide with {other_robot_name}, must wait")
-                    return Decision.WAIT.value
+                    logger.debug("Would collide with %s, must wait", other_robot_name)
+                    return Decision.WAIT.value, other_robot
         
                 # If both robots are targeting the same next node, resolve based on priority
                 if robot.next_node == other_robot.next_node:
@@ -513,14 +874,14 @@ class ConflictResolver:
                     robot_score, other_score = self.calculate_node_conflict_scores(robot, other_robot)
         
                     if robot_score <= other_score:
-                        print(f"{other_robot_name} has higher priority for same next node")
-                        return Decision.WAIT.value
+                        logger.debug("%s has higher priority for same next node", other_robot_name)
+                        return Decision.WAIT.value, other_robot
                     else:
-                        print(f"{robot.name} has higher priority, can proceed")
+                        logger.debug("%s has higher priority, can proceed", robot.name)
                         # Continue checking other conflicts
     
                 # If no immediate collision risk, allow robots to follow each other in the aisle
-                print(f"Same direction, can safely proceed through aisle")
+                logger.debug("Same direction, can safely proceed through aisle")
                 # Continue checking other conflicts by creating a FORWARD decision
                 aisle_info = {
                     "aisle_points": conflict_points,
@@ -537,7 +898,8 @@ class ConflictResolver:
                 robot, other_robot, robot_entry_index, other_entry_index, direction
             )
             
-            print(f"Aisle conflict scores with {other_robot_name} ({direction.value}): {robot_score:.4f} vs {other_score:.4f}")
+            logger.debug("Aisle conflict scores with %s (%s): %.4f vs %.4f",
+                         other_robot_name, direction.value, robot_score, other_score)
             
             # Create aisle info
             aisle_info = {
@@ -558,15 +920,19 @@ class ConflictResolver:
             else:
                 # Scores are equal, use name-based tie-breaker
                 if robot.name < other_robot.name:
-                    print(f"Tie resolved: {robot.name} gets priority over {other_robot.name}")
+                    logger.debug("Tie resolved: %s gets priority over %s", robot.name, other_robot.name)
                     aisle_decisions.append((Decision.FORWARD.value, aisle_info))
                 else:
-                    print(f"Tie resolved: {other_robot.name} gets priority over {robot.name}")
+                    logger.debug("Tie resolved: %s gets priority over %s", other_robot.name, robot.name)
                     aisle_decisions.append((Decision.WAIT.value, aisle_info))
         
-        print(f"Decisions for immediate conflicts: {aisle_decisions}")
+        logger.debug("Decisions for %s immediate conflicts: %s", robot.name, aisle_decisions)
         
-        # Compile results - WAIT if any conflict requires waiting
-        final_decision = Decision.FORWARD.value if all(d[0] == Decision.FORWARD.value for d in aisle_decisions) else Decision.WAIT.value
+        # Compile results - WAIT if any conflict requires waiting, recorded against the
+        # first robot by name so the wait-for graph does not depend on conflict order
+        waits = [info["other_robot"] for decision, info in aisle_decisions if decision == Decision.WAIT.value]
+        if not waits:
+            return Decision.FORWARD.value, None
         
-        return final_decision
+        robots_by_name = {c["robot"]: c["robot_obj"] for c in immediate_conflicts}
+        return Decision.WAIT.value, robots_by_name[min(waits)]
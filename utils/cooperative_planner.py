@@ -0,0 +1,180 @@
+import heapq
+import math
+from itertools import count
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from utils.base_robot import Robot
+from utils.planner import AStarPlanner
+
+
+class CooperativePlanner:
+    """
+    Windowed cooperative A* (WHCA*) for replanning robots around each other.
+
+    Other robots' next `window` steps are reserved as (node, timestep) and
+    (edge, timestep) entries, with timesteps counted in hops from each
+    robot's current node, like the ReservationTable. A search state is
+    (node, min(t, window + 1)): within the window a robot may step to a
+    neighbor or wait in place, and may not enter a node another robot holds
+    at that step or the step before, or swap places across an edge. Past the
+    window every timestep collapses into one and the search is plain A* on
+    the planner's graph, so the cost of a replan is close to that of an
+    ordinary path search.
+
+    Robots are replanned one after another and their new routes are reserved
+    before the next one is planned, so a batch of stuck robots does not pick
+    the same way out.
+    """
+
+    DEFAULT_WINDOW = 8
+
+    def __init__(self, planner: AStarPlanner, window: int = DEFAULT_WINDOW, wait_cost: Optional[float] = None):
+        """
+        Initialize the planner.
+
+        Args:
+            planner: A* planner whose graph, edge costs and heuristic are used
+            window: Steps of other robots' paths that are avoided
+            wait_cost: Cost of waiting one step in place, defaults to the cost
+                of the cheapest edge leaving the node (one step's worth of travel)
+        """
+        if window < 1:
+            raise ValueError("window must be at least 1")
+
+        self.planner = planner
+        self.window = window
+        self.wait_cost = wait_cost
+
+        # (node, t) -> robots; (from_node, to_node, t) -> robots
+        self.node_reservations: Dict[Tuple[Any, int], Set[Robot]] = {}
+        self.edge_reservations: Dict[Tuple[Any, Any, int], Set[Robot]] = {}
+        # robot -> keys it holds in both tables
+        self.reserved: Dict[Robot, List[tuple]] = {}
+
+    def reserve_robots(self, robots: Iterable[Robot]):
+        """
+        Replace every reservation with the upcoming steps of the given robots.
+
+        Args:
+            robots: Robots to avoid
+        """
+        self.node_reservations.clear()
+        self.edge_reservations.clear()
+        self.reserved.clear()
+        for robot in robots:
+            self.reserve(robot)
+
+    def reserve(self, robot: Robot):
+        """Reserve a robot's next `window` steps; a robot without a path holds its node."""
+        self.release(robot)
+        node = robot.current_node
+        if node is None:
+            return
+
+        keys = self.reserved[robot] = []
+        ahead = list(robot.remaining_path[:self.window]) if robot.remaining_path else []
+        # The robot stays on its last node for the rest of the window
+        steps = [node] + ahead + [ahead[-1] if ahead else node] * (self.window - len(ahead))
+
+        previous = node
+        for t, step in enumerate(steps):
+            key = (step, t)
+            self.node_reservations.setdefault(key, set()).add(robot)
+            keys.append(key)
+            if t and step != previous:
+                key = (previous, step, t)
+                self.edge_reservations.setdefault(key, set()).add(robot)
+                keys.append(key)
+            previous = step
+
+    def release(self, robot: Robot):
+        """Drop every reservation held by a robot."""
+        for key in self.reserved.pop(robot, ()):
+            table = self.node_reservations if len(key) == 2 else self.edge_reservations
+            owners = table[key]
+            owners.discard(robot)
+            if not owners:
+                del table[key]
+
+    def is_reserved(self, node: Any, t: int, robot: Robot) -> bool:
+        """Check whether a robot other than the given one holds a node at a timestep."""
+        owners = self.node_reservations.get((node, t))
+        return bool(owners) and (len(owners) > 1 or robot not in owners)
+
+    def is_swap(self, from_node: Any, to_node: Any, t: int, robot: Robot) -> bool:
+        """Check whether another robot crosses the edge the other way, arriving at the same timestep."""
+        owners = self.edge_reservations.get((to_node, from_node, t))
+        return bool(owners) and (len(owners) > 1 or robot not in owners)
+
+    def find_path(self, robot: Robot, goal: Any) -> List[Any]:
+        """
+        Plan a robot's route from its current node to a goal around the reservations.
+
+        Args:
+            robot: Robot to plan for, standing on its current node
+            goal: Goal node id
+
+        Returns:
+            Nodes from the current node to the goal with the waits left out
+            (robots wait through their conflict decisions), empty if no route exists
+        """
+        start = robot.current_node
+        if start == goal:
+            return [start]
+
+        edges = self.planner.edges
+        edge_cost = self.planner.edge_cost
+        heuristic = self.planner.heuristic
+        window = self.window
+        horizon = window + 1
+
+        tie = count()
+        start_h = heuristic(start, goal)
+        open_set = [(start_h, start_h, next(tie), 0.0, (start, 0))]
+        g_score = {(start, 0): 0.0}
+        came_from = {}
+
+        while open_set:
+            _, _, _, current_g, state = heapq.heappop(open_set)
+            if current_g > g_score[state]:
+                continue
+
+            node, t = state
+            if node == goal:
+                return self._reconstruct_path(came_from, state)
+
+            next_t = min(t + 1, horizon)
+            moves = []
+            for neighbor in edges[node]:
+                if next_t <= window and (
+                        self.is_reserved(neighbor, next_t, robot)
+                        or self.is_reserved(neighbor, t, robot)
+                        or self.is_swap(node, neighbor, next_t, robot)):
+                    continue
+                moves.append((neighbor, edge_cost(node, neighbor)))
+
+            # Waiting only helps while other robots' steps are known
+            if next_t <= window and not self.is_reserved(node, next_t, robot):
+                wait_cost = self.wait_cost
+                if wait_cost is None:
+                    wait_cost = min((edge_cost(node, n) for n in edges[node]), default=0.0)
+                moves.append((node, wait_cost))
+
+            for neighbor, cost in moves:
+                next_state = (neighbor, next_t)
+                tentative_g = current_g + cost
+                if tentative_g < g_score.get(next_state, math.inf):
+                    came_from[next_state] = state
+                    g_score[next_state] = tentative_g
+                    h = heuristic(neighbor, goal)
+                    heapq.heappush(open_set, (tentative_g + h, h, next(tie), tentative_g, next_state))
+
+        return []  # No path found
+
+    @staticmethod
+    def _reconstruct_path(came_from: Dict[tuple, tuple], state: tuple) -> List[Any]:
+        path = [state[0]]
+        while state in came_from:
+            state = came_from[state]
+            if state[0] != path[-1]:
+                path.append(state[0])
+        return path[::-1]
@@ -0,0 +1,255 @@
+import heapq
+import math
+from itertools import count
+from typing import Any, Dict, List, Optional, Tuple
+from utils.base_robot import Robot
+from utils.simulation_engine import SimulationEngine
+
+
+class EventSimulationEngine(SimulationEngine):
+    """
+    Discrete-event variant of the engine that jumps between node arrivals.
+
+    Robots travelling between nodes are kept in a priority queue keyed by the
+    tick they arrive at their next node. The arrival tick is found by
+    replaying the exact per-tick arithmetic of move_robot, memoized per edge
+    and speed, so arrivals happen on the same tick as in the frame-stepped
+    engine. Decisions only depend on the robots' nodes and paths, so a tick
+    is processed in full only when a robot arrives, on the tick after any
+    robot's state changed or a deadlock was found or ended, or when a
+    waiting robot is due to be replanned; every tick in between would repeat
+    the previous decisions and is skipped in one go. Poses of travelling
+    robots are brought up to date by sync_poses(), which run() and step() call.
+
+    Only the sequential update order is supported, so results match the
+    default frame-stepped engine for the same seed.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """
+        Initialize the engine; takes the same arguments as SimulationEngine
+        except batch_motion and batch_decisions.
+        """
+        if kwargs.get("batch_motion") or kwargs.get("batch_decisions"):
+            raise ValueError("The event-driven engine only supports the sequential update order")
+        super().__init__(*args, **kwargs)
+
+        # (from_node, to_node, speed) -> ticks of travel
+        self.travel_ticks: Dict[Tuple[Any, Any, float], Optional[int]] = {}
+        # robot -> (tick the flight started, pose at that tick, arrival tick)
+        self.flights: Dict[Robot, Tuple[int, Tuple[float, float], int]] = {}
+        self.arrivals: List[Tuple[int, int, Robot]] = []
+        self._sequence = count()
+        self._last_change = self.tick - 1
+
+        # Ticks that were processed robot by robot
+        self.processed_ticks = 0
+
+        self.resync()
+
+    def randomize_robots(self):
+        super().randomize_robots()
+        self.resync()
+
+    def reset(self):
+        super().reset()
+        self.resync()
+
+    def restart(self):
+        super().restart()
+        self.resync()
+
+    def resync(self):
+        """Rebuild the arrival queue after robots were moved or given paths by hand."""
+        self.flights.clear()
+        self.arrivals = []
+        for robot in self.robots:
+            if robot.next_node is not None and robot.current_pose != self.nodes[robot.current_node]:
+                self.start_flight(robot, robot.current_pose, self.tick)
+        self._last_change = self.tick - 1
+
+    @staticmethod
+    def replay(
+        pose: Tuple[float, float],
+        target: Tuple[float, float],
+        speed: float,
+        max_ticks: Optional[int] = None
+    ) -> Tuple[int, Tuple[float, float], bool]:
+        """
+        Repeat move_robot's per-tick motion towards a target.
+
+        Args:
+            pose: Start pose
+            target: Pose of the node being travelled to
+            speed: Distance travelled per tick
+            max_ticks: Stop after this many ticks, run until arrival if None
+
+        Returns:
+            Tuple of (ticks moved, pose after them, whether the target was reached)
+        """
+        x, y = pose
+        target_x, target_y = target
+        ticks = 0
+        while max_ticks is None or ticks < max_ticks:
+            dx, dy = target_x - x, target_y - y
+            distance = math.hypot(dx, dy)
+            if distance == 0:
+                break
+            ticks += 1
+            if distance <= speed:
+                return ticks, target, True
+            x, y = x + dx / distance * speed, y + dy / distance * speed
+        return ticks, (x, y), False
+
+    def edge_ticks(self, from_node: Any, to_node: Any, speed: float) -> Optional[int]:
+        """Ticks needed to travel an edge from node to node, None if it is never completed."""
+        key = (from_node, to_node, speed)
+        if key not in self.travel_ticks:
+            ticks, _, arrived = self.replay(self.nodes[from_node], self.nodes[to_node], speed)
+            self.travel_ticks[key] = ticks if arrived else None
+        return self.travel_ticks[key]
+
+    def start_flight(self, robot: Robot, pose: Tuple[float, float], start_tick: int):
+        """
+        Queue the arrival of a robot that travels towards its next node.
+
+        Args:
+            robot: Travelling robot
+            pose: Its pose at the start of start_tick
+            start_tick: First tick of the flight
+        """
+        speed = self.robot_speed(robot)
+        if pose == self.nodes[robot.current_node]:
+            ticks = self.edge_ticks(robot.current_node, robot.next_node, speed)
+        else:
+            ticks, _, arrived = self.replay(pose, self.nodes[robot.next_node], speed)
+            ticks = ticks if arrived else None
+        if ticks is None:
+            return
+
+        arrival = start_tick + ticks - 1
+        self.flights[robot] = (start_tick, pose, arrival)
+        heapq.heappush(self.arrivals, (arrival, next(self._sequence), robot))
+
+    def sync_poses(self, tick: Optional[int] = None):
+        """
+        Set the pose of every travelling robot.
+
+        Args:
+            tick: Tick to compute the poses for, defaults to the current one; earlier
+                ticks are only valid back to the last processed tick (e.g. for traces)
+        """
+        if tick is None:
+            tick = self.tick
+        for robot, (start_tick, pose, _) in self.flights.items():
+            _, robot.current_pose, _ = self.replay(
+                pose, self.nodes[robot.next_node], self.robot_speed(robot), tick - start_tick
+            )
+
+    def next_event(self) -> float:
+        """Tick that has to be processed next, inf if nothing will ever change."""
+        if self._last_change == self.tick - 1:
+            return self.tick
+
+        event = math.inf
+        arrivals = self.arrivals
+        while arrivals:
+            arrival, _, robot = arrivals[0]
+            flight = self.flights.get(robot)
+            if flight is not None and flight[2] == arrival:
+                event = arrival
+                break
+            heapq.heappop(arrivals)  # Stale entry of a finished flight
+
+        replan_after = self.replan_after
+        if replan_after is not None and self.edges:
+            # Tick whose end brings a waiting robot's streak to the next multiple
+            for robot in self.robots:
+                if robot.waiting:
+                    streak = self.wait_streaks.get(robot.name, 0)
+                    event = min(event, self.tick + replan_after - streak % replan_after - 1)
+        return event
+
+    def advance_to(self, end_tick: int):
+        """
+        Advance the simulation up to (not including) a tick, skipping quiet ticks.
+
+        Args:
+            end_tick: Tick to stop at
+        """
+        while self.tick < end_tick:
+            event_tick = self.next_event()
+            if event_tick > self.tick:
+                self.skip_ticks(min(event_tick, end_tick) - self.tick)
+            else:
+                self.process_tick()
+
+    def skip_ticks(self, ticks: int):
+        """Account for ticks in which every decision repeats and nobody arrives."""
+        waiting = [robot for robot in self.robots if robot.waiting]
+        self.wait_ticks += ticks * len(waiting)
+        for robot in waiting:
+            self.wait_streaks[robot.name] = self.wait_streaks.get(robot.name, 0) + ticks
+        self.tick += ticks
+
+        for listener in self.tick_listeners:
+            listener.on_tick(self, ticks)
+
+    def process_tick(self):
+        """Run one tick robot by robot, as the frame-stepped engine does."""
+        tick = self.tick
+        robots = [robot for robot in self.robots if robot.full_path]
+        changed = False
+        # A deadlock found (or ended) this tick lets the rest of its cycle act on the
+        # next one, even if no robot moved; an active cycle only ends through durations
+        wait_for_graph = self.conflict_resolver.wait_for_graph
+        deadlocks = (wait_for_graph.deadlocks_detected, len(wait_for_graph.durations))
+
+        for robot in self.robots:
+            flight = self.flights.get(robot)
+            if flight is not None:
+                if flight[2] != tick:
+                    continue
+                # Arrival, exactly as move_robot completes it
+                del self.flights[robot]
+                robot.move_forward()
+                robot.current_pose = self.nodes[robot.current_node]
+                if robot.next_node is None:
+                    self.goals_completed += 1
+                changed = True
+                continue
+
+            state = (robot.path_version, robot.current_node, robot.waiting)
+            self.update_robot(robot, robots)
+
+            if robot.next_node is not None and robot.current_pose != self.nodes[robot.current_node]:
+                # Left its node this tick; the pose is recomputed from the node when needed
+                self.start_flight(robot, self.nodes[robot.current_node], tick)
+                changed = True
+            elif (robot.path_version, robot.current_node, robot.waiting) != state:
+                changed = True
+            elif self.auto_goal and robot.next_node is None:
+                # A failed re-goal draws from the random generator again next tick
+                changed = True
+
+        replans = self.replans
+        self.end_tick()
+        self.processed_ticks += 1
+        if (changed or self.replans != replans
+                or (wait_for_graph.deadlocks_detected, len(wait_for_graph.durations)) != deadlocks):
+            self._last_change = tick
+
+    def step(self):
+        """Advance the simulation by one tick."""
+        self.advance_to(self.tick + 1)
+        self.sync_poses()
+
+    def run(self, ticks: int):
+        """
+        Advance the simulation by a number of ticks, jumping between events.
+
+        Args:
+            ticks: Number of ticks to simulate
+        """
+        self.advance_to(self.tick + ticks)
+        self.sync_poses()
@@ -0,0 +1,247 @@
+import csv
+import math
+import os
+from array import array
+from typing import Any, Dict, List, Optional
+from utils.base_robot import Robot
+from utils.conflict_handler import ConflictType, Direction
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = pq = None
+
+CONFLICT_TYPES = [ConflictType.NODE, ConflictType.AISLE]
+DIRECTIONS = [Direction.SAME, Direction.OPPOSITE, Direction.UNKNOWN]
+
+# Column names of the conflict counters, e.g. conflicts_aisle_opposite
+CONFLICT_COLUMNS = [f"conflicts_{t.value.lower()}_{d.value.lower()}" for t in CONFLICT_TYPES for d in DIRECTIONS]
+
+
+class _CsvTable:
+    """Appends column batches to a CSV file."""
+
+    def __init__(self, path: str, columns: List[str]):
+        self.file = open(path, "w", newline="")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+        self.columns = columns
+
+    def write(self, batch: Dict[str, list]):
+        self.writer.writerows(zip(*(batch[column] for column in self.columns)))
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class _ParquetTable:
+    """Appends column batches to a Parquet file, one row group per batch."""
+
+    def __init__(self, path: str, columns: List[str]):
+        self.path = path
+        self.columns = columns
+        self.writer = None
+
+    def write(self, batch: Dict[str, list]):
+        table = pa.table({column: batch[column] for column in self.columns})
+        if self.writer is None:
+            # The schema is taken from the first batch
+            self.writer = pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+class FleetStats:
+    """
+    Fleet statistics collected in fixed-size arrays and streamed to disk.
+
+    Per robot counters (goals, wait ticks, distance travelled, conflicts) and
+    fleet-wide conflict counters by type and direction live in arrays sized
+    once for the fleet. Every `snapshot_interval` ticks the counters are
+    written as one batch of rows to a fleet table and a robot table, CSV or
+    Parquet (if pyarrow is installed), and nothing is kept in memory, so a
+    run of any length uses the same amount of memory.
+
+    Conflicts are counted per episode: once when a conflict with another
+    robot becomes immediate, however many decisions it lasts, so the counts
+    don't depend on how long robots wait or how often the engine decides.
+
+    The collector attaches to an engine as a path listener of every robot
+    (distance and goals), a conflict listener of the resolver (conflicts)
+    and a tick listener of the engine (waiting).
+    """
+
+    FORMATS = ("auto", "csv", "parquet")
+
+    ROBOT_COLUMNS = ["tick", "robot", "goals", "wait_ticks", "distance", "conflicts"]
+    FLEET_COLUMNS = ["tick", "minutes", "goals", "goals_per_minute", "wait_ticks", "distance"] + CONFLICT_COLUMNS
+
+    def __init__(
+        self,
+        engine: Any,
+        path_prefix: Optional[str] = None,
+        snapshot_interval: int = 600,
+        ticks_per_second: float = 60,
+        file_format: str = "auto"
+    ):
+        """
+        Initialize the counters and attach to an engine.
+
+        Args:
+            engine: SimulationEngine to collect statistics from
+            path_prefix: Snapshots go to <prefix>_fleet.<ext> and <prefix>_robots.<ext>;
+                nothing is written if None
+            snapshot_interval: Ticks between snapshots
+            ticks_per_second: Simulated ticks per second, used for goals per minute
+                (the front-ends run at 60 ticks per second)
+            file_format: "csv", "parquet", or "auto" for Parquet when pyarrow is available
+        """
+        if file_format not in self.FORMATS:
+            raise ValueError(f"Unknown file format '{file_format}'")
+        if file_format == "parquet" and pq is None:
+            raise ValueError("Parquet export needs pyarrow")
+        if file_format == "auto":
+            file_format = "parquet" if pq is not None else "csv"
+
+        self.engine = engine
+        self.snapshot_interval = snapshot_interval
+        self.ticks_per_second = ticks_per_second
+        self.file_format = file_format
+
+        self.robots = list(engine.robots)
+        self.index_of = {robot: i for i, robot in enumerate(self.robots)}
+        count = len(self.robots)
+
+        # Preallocated counters, cumulative since the collector was attached
+        self.goals = array("q", bytes(8 * count))
+        self.wait_ticks = array("q", bytes(8 * count))
+        self.distance = array("d", bytes(8 * count))
+        self.robot_conflicts = array("q", bytes(8 * count))
+        self.conflicts = array("q", bytes(8 * len(CONFLICT_COLUMNS)))
+        # robot -> (other robot name, conflict type) of the immediate conflicts at its last decision
+        self.immediate_conflicts: Dict[Robot, set] = {}
+
+        self.start_tick = engine.tick
+        self.last_snapshot_tick = engine.tick
+        self.last_snapshot_goals = 0
+
+        self.fleet_table = None
+        self.robot_table = None
+        if path_prefix is not None:
+            table = _ParquetTable if file_format == "parquet" else _CsvTable
+            extension = "parquet" if file_format == "parquet" else "csv"
+            directory = os.path.dirname(path_prefix)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.fleet_table = table(f"{path_prefix}_fleet.{extension}", self.FLEET_COLUMNS)
+            self.robot_table = table(f"{path_prefix}_robots.{extension}", self.ROBOT_COLUMNS)
+
+        for robot in self.robots:
+            robot.add_path_listener(self)
+        engine.conflict_resolver.conflict_listeners.append(self)
+        engine.tick_listeners.append(self)
+
+    def on_path_changed(self, robot: Robot):
+        pass
+
+    def on_advance(self, robot: Robot, departed_node: Any):
+        i = self.index_of[robot]
+        nodes = self.engine.nodes
+        start, end = nodes[departed_node], nodes[robot.current_node]
+        self.distance[i] += math.hypot(end[0] - start[0], end[1] - start[1])
+        if robot.next_node is None:
+            self.goals[i] += 1
+
+    def on_conflicts(self, robot: Robot, conflicts: List[Dict]):
+        # A conflict is counted once, when it becomes immediate for a robot pair. A waiting
+        # robot sees it again on every decision (as often as the engine decides) until it ends.
+        active = set()
+        new = []
+        previous = self.immediate_conflicts.get(robot, ())
+        for conflict in conflicts:
+            if not conflict["is_immediate"]:
+                continue
+            key = (conflict["robot"], conflict["conflict_type"])
+            if key not in active:
+                active.add(key)
+                if key not in previous:
+                    new.append(conflict)
+        self.immediate_conflicts[robot] = active
+
+        i = self.index_of.get(robot)
+        if i is not None:
+            self.robot_conflicts[i] += len(new)
+        for conflict in new:
+            direction = conflict.get("direction") or Direction.UNKNOWN
+            column = CONFLICT_TYPES.index(conflict["conflict_type"]) * len(DIRECTIONS) + DIRECTIONS.index(direction)
+            self.conflicts[column] += 1
+
+    def on_tick(self, engine: Any, ticks: int):
+        wait_ticks = self.wait_ticks
+        for i, robot in enumerate(self.robots):
+            if robot.waiting:
+                wait_ticks[i] += ticks
+
+        if engine.tick - self.last_snapshot_tick >= self.snapshot_interval:
+            self.snapshot()
+
+    def minutes(self, ticks: int) -> float:
+        """Simulated minutes in a number of ticks."""
+        return ticks / (self.ticks_per_second * 60)
+
+    def goals_per_minute(self) -> float:
+        """Goals completed per simulated minute since the collector was attached."""
+        minutes = self.minutes(self.engine.tick - self.start_tick)
+        return sum(self.goals) / minutes if minutes else 0.0
+
+    def fleet_row(self) -> Dict[str, Any]:
+        """Current fleet-wide counters; goals per minute is over the last snapshot interval."""
+        tick = self.engine.tick
+        goals = sum(self.goals)
+        interval_minutes = self.minutes(tick - self.last_snapshot_tick)
+        row = {
+            "tick": tick,
+            "minutes": self.minutes(tick - self.start_tick),
+            "goals": goals,
+            "goals_per_minute": (goals - self.last_snapshot_goals) / interval_minutes if interval_minutes else 0.0,
+            "wait_ticks": sum(self.wait_ticks),
+            "distance": sum(self.distance)
+        }
+        row.update(zip(CONFLICT_COLUMNS, self.conflicts))
+        return row
+
+    def snapshot(self):
+        """Write the current counters to the fleet and robot tables."""
+        if self.fleet_table is not None:
+            row = self.fleet_row()
+            self.fleet_table.write({column: [value] for column, value in row.items()})
+            self.robot_table.write({
+                "tick": [row["tick"]] * len(self.robots),
+                "robot": [robot.name for robot in self.robots],
+                "goals": self.goals.tolist(),
+                "wait_ticks": self.wait_ticks.tolist(),
+                "distance": self.distance.tolist(),
+                "conflicts": self.robot_conflicts.tolist()
+            })
+
+        self.last_snapshot_tick = self.engine.tick
+        self.last_snapshot_goals = sum(self.goals)
+
+    def close(self):
+        """Write a final snapshot, close the tables and detach from the engine."""
+        if self.engine.tick != self.last_snapshot_tick:
+            self.snapshot()
+        if self.fleet_table is not None:
+            self.fleet_table.close()
+            self.robot_table.close()
+            self.fleet_table = self.robot_table = None
+
+        for robot in self.robots:
+            robot.remove_path_listener(self)
+        self.engine.conflict_resolver.conflict_listeners.remove(self)
+        self.engine.tick_listeners.remove(self)
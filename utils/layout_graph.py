@@ -0,0 +1,175 @@
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+from utils.spatial_hash import SpatialHash, segment_crosses_rect
+
+# Axes a node is linked along: (step in x, step in y) towards the "after" side
+AXES = [(1, 0), (0, 1)]
+
+
+class LayoutGraph:
+    """
+    Edges of a hand-built layout, maintained as nodes and shelves are placed.
+
+    Every node is linked to the nearest node in each of the four axis
+    directions, up to link_distance away. An edge whose segment passes
+    through a shelf is blocked: it is left out of `edges` and kept in
+    `blocked_edges` instead. Nodes and shelves are kept in spatial hashes, so
+    placing a node or a shelf, picking a node and checking a segment against
+    the shelves only look at the few grid cells around them.
+    """
+
+    def __init__(
+        self,
+        nodes: Dict[Any, Tuple[float, float]],
+        edges: Dict[Any, List[Any]],
+        cell_size: float,
+        link_distance: float
+    ):
+        """
+        Initialize an empty layout.
+
+        Args:
+            nodes: Node positions, filled in place by add_node
+            edges: Adjacency lists, filled in place as nodes and shelves are added
+            cell_size: Cell size of the spatial hashes, about the node spacing
+            link_distance: Longest edge created between two nodes
+        """
+        self.nodes = nodes
+        self.edges = edges
+        self.link_distance = link_distance
+
+        self.node_hash = SpatialHash(cell_size)
+        self.shelf_hash = SpatialHash(cell_size)
+        self.shelf_rects: List[Tuple[float, float, float, float]] = []
+        self.blocked_edges: Set[Tuple[Any, Any]] = set()
+
+    def clear(self):
+        """Remove every node, edge and shelf."""
+        self.nodes.clear()
+        self.edges.clear()
+        self.node_hash.clear()
+        self.shelf_hash.clear()
+        self.shelf_rects.clear()
+        self.blocked_edges.clear()
+
+    def rebuild(self, nodes: Dict[Any, Tuple[float, float]], shelves: Sequence[Sequence[float]]):
+        """
+        Replace the layout with the given nodes and shelves and link it again.
+
+        Args:
+            nodes: Node positions
+            shelves: Shelf rectangles as (x, y, width, height)
+        """
+        nodes = dict(nodes)
+        self.clear()
+        for rect in shelves:
+            self.add_shelf(rect)
+        for node, pos in nodes.items():
+            self.add_node(node, pos)
+
+    def node_at(self, pos: Sequence[float], radius: float) -> Optional[Any]:
+        """Node closest to a point, None if there is none within the radius."""
+        return self.node_hash.nearest(pos, radius)
+
+    def neighbor_towards(self, node: Any, step: Tuple[int, int]) -> Optional[Any]:
+        """
+        Nearest node on the same row or column in a direction.
+
+        Args:
+            node: Node to look from
+            step: Direction as (-1, 0), (1, 0), (0, -1) or (0, 1)
+
+        Returns:
+            Nearest node within link_distance, None if there is none
+        """
+        x, y = self.nodes[node]
+        end_x, end_y = x + step[0] * self.link_distance, y + step[1] * self.link_distance
+        bounds = (min(x, end_x), min(y, end_y), max(x, end_x), max(y, end_y))
+
+        best, best_distance = None, None
+        for other in self.node_hash.query(bounds):
+            other_x, other_y = self.nodes[other]
+            # Distance along the direction; the other coordinate has to match exactly
+            distance = (other_x - x) * step[0] + (other_y - y) * step[1]
+            if distance <= 0 or (other_x - x) * step[1] != 0 or (other_y - y) * step[0] != 0:
+                continue
+            if best is None or distance < best_distance:
+                best, best_distance = other, distance
+        return best
+
+    def crosses_shelf(self, a: Sequence[float], b: Sequence[float]) -> bool:
+        """Check whether the segment between two points passes through a shelf."""
+        bounds = (min(a[0], b[0]), min(a[1], b[1]), max(a[0], b[0]), max(a[1], b[1]))
+        return any(segment_crosses_rect(a, b, self.shelf_rects[shelf]) for shelf in self.shelf_hash.query(bounds))
+
+    def link(self, a: Any, b: Any):
+        """Connect two nodes both ways, or mark the edge blocked if it crosses a shelf."""
+        if self.crosses_shelf(self.nodes[a], self.nodes[b]):
+            self.blocked_edges.add((a, b))
+            self.blocked_edges.add((b, a))
+        else:
+            self.edges[a].append(b)
+            self.edges[b].append(a)
+
+    def unlink(self, a: Any, b: Any):
+        """Remove the edge between two nodes, blocked or not."""
+        if b in self.edges[a]:
+            self.edges[a].remove(b)
+            self.edges[b].remove(a)
+        self.blocked_edges.discard((a, b))
+        self.blocked_edges.discard((b, a))
+
+    def add_node(self, node: Any, pos: Tuple[float, float]):
+        """
+        Place a node and link it to its nearest neighbors along both axes.
+
+        A node placed between two linked nodes splits their edge in two.
+
+        Args:
+            node: New node id
+            pos: Node position
+        """
+        self.nodes[node] = pos
+        self.edges[node] = []
+        self.node_hash.insert_point(node, pos)
+
+        for step in AXES:
+            after = self.neighbor_towards(node, step)
+            before = self.neighbor_towards(node, (-step[0], -step[1]))
+            if after is not None and before is not None:
+                self.unlink(before, after)
+            if after is not None:
+                self.link(node, after)
+            if before is not None:
+                self.link(node, before)
+
+    def add_shelf(self, rect: Sequence[float]):
+        """
+        Place a shelf and block the edges that pass through it.
+
+        Args:
+            rect: Shelf rectangle as (x, y, width, height), e.g. a pygame.Rect
+        """
+        rect = (rect[0], rect[1], rect[2], rect[3])
+        self.shelf_hash.insert_rect(len(self.shelf_rects), rect)
+        self.shelf_rects.append(rect)
+
+        # Only edges with an end within link_distance of the shelf can reach it
+        reach = self.link_distance
+        area = (rect[0] - reach, rect[1] - reach, rect[0] + rect[2] + reach, rect[1] + rect[3] + reach)
+        for node in self.node_hash.query(area):
+            for neighbor in list(self.edges[node]):
+                if segment_crosses_rect(self.nodes[node], self.nodes[neighbor], rect):
+                    self.edges[node].remove(neighbor)
+                    self.blocked_edges.add((node, neighbor))
+
+    def blocked_steps(self, path: Sequence[Any]) -> List[Tuple[Any, Any]]:
+        """
+        Steps of a path that pass through a shelf, for validating hand-drawn paths.
+
+        Args:
+            path: List of node ids
+
+        Returns:
+            (node, next node) pairs whose segment crosses a shelf
+        """
+        return [(a, b) for a, b in zip(path, path[1:]) if self.crosses_shelf(self.nodes[a], self.nodes[b])]
@@ -0,0 +1,107 @@
+from typing import Dict, Any, Iterator
+from utils.base_robot import Robot
+
+
+class NodeRobotIndex:
+    """
+    Inverted index from node id to the robots whose route still touches it.
+
+    A robot's route is its current node plus its remaining path. The index is
+    kept up to date incrementally through the robot's path listeners, so the
+    conflict detector only ever compares robots that actually share a node.
+    """
+
+    def __init__(self):
+        """Initialize an empty index."""
+        # node -> robots whose route contains the node (dict keeps insertion order)
+        self.robots_by_node: Dict[Any, Dict[Robot, None]] = {}
+        # robot -> how many times each node appears in its route
+        self.route_counts: Dict[Robot, Dict[Any, int]] = {}
+
+    def add_robot(self, robot: Robot):
+        """
+        Start tracking a robot and index its current route.
+
+        Args:
+            robot: Robot to track
+        """
+        if robot in self.route_counts:
+            return
+        self.route_counts[robot] = {}
+        robot.add_path_listener(self)
+        self.on_path_changed(robot)
+
+    def remove_robot(self, robot: Robot):
+        """
+        Stop tracking a robot and drop it from every node.
+
+        Args:
+            robot: Robot to forget
+        """
+        if robot not in self.route_counts:
+            return
+        self._clear_route(robot)
+        del self.route_counts[robot]
+        robot.remove_path_listener(self)
+
+    def on_path_changed(self, robot: Robot):
+        """Re-index a robot after it was given a new path or reset."""
+        self._clear_route(robot)
+
+        if robot.current_node is not None:
+            self._add_node(robot, robot.current_node)
+        for node in robot.remaining_path or ():
+            self._add_node(robot, node)
+
+    def on_advance(self, robot: Robot, departed_node: Any):
+        """Drop the node a robot just left from its route."""
+        self._remove_node(robot, departed_node)
+
+    def robots_at(self, node: Any) -> Iterator[Robot]:
+        """Robots whose route contains the node."""
+        return iter(self.robots_by_node.get(node, ()))
+
+    def candidates(self, robot: Robot) -> Dict[Robot, None]:
+        """
+        Find the robots that share at least one route node with a robot.
+
+        Args:
+            robot: Robot to find candidates for
+
+        Returns:
+            Ordered set (dict keys) of other robots sharing a node
+        """
+        candidates = {}
+        for node in self.route_counts.get(robot, ()):
+            candidates.update(self.robots_by_node[node])
+        candidates.pop(robot, None)
+        return candidates
+
+    def _add_node(self, robot: Robot, node: Any):
+        counts = self.route_counts[robot]
+        counts[node] = counts.get(node, 0) + 1
+        self.robots_by_node.setdefault(node, {})[robot] = None
+
+    def _remove_node(self, robot: Robot, node: Any):
+        counts = self.route_counts[robot]
+        count = counts.get(node, 0)
+        if count > 1:
+            counts[node] = count - 1
+            return
+        if count == 1:
+            del counts[node]
+            self._unlink(robot, node)
+
+    def _clear_route(self, robot: Robot):
+        counts = self.route_counts[robot]
+        for node in counts:
+            self._unlink(robot, node)
+        counts.clear()
+
+    def _unlink(self, robot: Robot, node: Any):
+        robots = self.robots_by_node.get(node)
+        if robots is None:
+            return
+        robots.pop(robot, None)
+        if not robots:
+            del self.robots_by_node[node]
@@ -1,6 +1,12 @@
 from typing import List, Dict, Any
 from utils.base_robot import Robot
 from utils.conflict_handler import ConflictDetector, ConflictResolver, Decision
+from utils.node_index import NodeRobotIndex
+from utils.aisle_cache import AisleCache
+from utils.conflict_cache import ConflictCache
+from utils.sim_logging import get_logger
+
+logger = get_logger(__name__)
 
 class RobotPathManager:
     """Manages robot paths and conflict resolution."""
@@ -13,8 +19,15 @@ class RobotPathManager:
             robots: List of robots to manage
         """
         self.robots = robots
-        self.conflict_detector = ConflictDetector()
-        self.conflict_resolver = ConflictResolver()
+        self.node_index = NodeRobotIndex()
+        for robot in robots:
+            self.node_index.add_robot(robot)
+        self.conflict_detector = ConflictDetector(
+            node_index=self.node_index,
+            aisle_cache=AisleCache(),
+            conflict_cache=ConflictCache()
+        )
+        self.conflict_resolver = ConflictResolver(conflict_detector=self.conflict_detector)
         
     def make_decision(self, robot_name: str) -> str:
         """
@@ -52,15 +65,12 @@ class RobotPathManager:
         decisions = {}
         movements = {}
         
-        # First, make decisions for all robots
+        # First, make decisions for all robots in one batch
+        moving_robots = [robot for robot in self.robots if robot.remaining_path]
+        batch_decisions = self.conflict_resolver.decide_all(self.robots, moving_robots)
+        
         for robot in self.robots:
-            if not robot.remaining_path:
-                decisions[robot.name] = "DESTINATION_REACHED"
-                movements[robot.name] = False
-                continue
-                
-            decision = self.make_decision(robot.name)
-            decisions[robot.name] = decision
+            decisions[robot.name] = batch_decisions.get(robot.name, "DESTINATION_REACHED")
             movements[robot.name] = False
         
         # Then, move robots based on decisions
@@ -68,8 +78,8 @@ class RobotPathManager:
             if len(robot.remaining_path) > 0 and decisions[robot.name] == Decision.FORWARD.value:
                 robot.move_forward()
                 movements[robot.name] = True
-                print(f"{robot.name} moved forward to {robot.current_node}")
+                logger.info("%s moved forward to %s", robot.name, robot.current_node)
             else:
-                print(f"{robot.name} waiting at {robot.current_node}")
+                logger.info("%s waiting at %s", robot.name, robot.current_node)
         
         return decisions
@@ -0,0 +1,141 @@
+import heapq
+import math
+from itertools import count
+from typing import Callable, Collection, Dict, List, Tuple, Any, Optional, Union
+
+
+def euclidean_distance(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    """Straight-line distance between two positions."""
+    return math.hypot(a[0] - b[0], a[1] - b[1])
+
+
+def manhattan_distance(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    """Axis-aligned distance between two positions."""
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+
+class AStarPlanner:
+    """
+    A* path planner over a node/edge graph.
+
+    Edge costs default to the straight-line length of each edge, and the
+    heuristic is computed from node coordinates. The open set is a binary heap
+    with lazy deletion: improved entries are pushed again and stale ones are
+    skipped when popped, so every relaxation costs O(log V).
+    """
+
+    HEURISTICS = {
+        "euclidean": euclidean_distance,
+        "manhattan": manhattan_distance,
+        "zero": lambda a, b: 0.0
+    }
+
+    def __init__(
+        self,
+        nodes: Dict[Any, Tuple[float, float]],
+        edges: Dict[Any, List[Any]],
+        heuristic: Union[str, Callable[[Any, Any], float]] = "euclidean",
+        edge_cost: Optional[Callable[[Any, Any], float]] = None
+    ):
+        """
+        Initialize the planner.
+
+        The euclidean heuristic is admissible for any graph whose edge costs are
+        at least their straight-line length. The manhattan heuristic is only
+        admissible when every edge is axis-aligned, as on generated grids.
+
+        Args:
+            nodes: Mapping of node ids to (x, y) positions
+            edges: Adjacency lists of the graph
+            heuristic: Name of a built-in heuristic, or a function of
+                (node, goal) returning an estimate of the remaining cost
+            edge_cost: Function of (node, neighbor) returning the cost of the
+                edge; defaults to the edge's straight-line length
+        """
+        self.nodes = nodes
+        self.edges = edges
+
+        if callable(heuristic):
+            self.heuristic = heuristic
+        else:
+            if heuristic not in self.HEURISTICS:
+                raise ValueError(f"Unknown heuristic '{heuristic}'")
+            distance = self.HEURISTICS[heuristic]
+            self.heuristic = lambda node, goal: distance(self.nodes[node], self.nodes[goal])
+
+        self.edge_cost = edge_cost or self.edge_length
+
+    def edge_length(self, node: Any, neighbor: Any) -> float:
+        """Straight-line length of an edge."""
+        return euclidean_distance(self.nodes[node], self.nodes[neighbor])
+
+    def find_path(self, start: Any, goal: Any, blocked: Collection[Any] = ()) -> List[Any]:
+        """
+        Find the cheapest path between two nodes.
+
+        Args:
+            start: Start node id
+            goal: Goal node id
+            blocked: Nodes the path must not pass through (e.g. nodes held by
+                robots in a deadlock)
+
+        Returns:
+            List of node ids from start to goal, empty if no path exists
+        """
+        if start == goal:
+            return [start]
+
+        edges = self.edges
+        heuristic = self.heuristic
+        edge_cost = self.edge_cost
+
+        # Ties on f are broken towards lower h (deeper nodes), then FIFO
+        tie = count()
+        start_h = heuristic(start, goal)
+        open_set = [(start_h, start_h, next(tie), 0.0, start)]
+        g_score = {start: 0.0}
+        came_from = {}
+
+        while open_set:
+            _, _, _, current_g, current = heapq.heappop(open_set)
+
+            # Lazy deletion: a cheaper entry for this node was already expanded
+            if current_g > g_score[current]:
+                continue
+
+            if current == goal:
+                return self._reconstruct_path(came_from, current)
+
+            for neighbor in edges[current]:
+                if blocked and neighbor in blocked:
+                    continue
+
+                tentative_g = current_g + edge_cost(current, neighbor)
+
+                if tentative_g < g_score.get(neighbor, math.inf):
+                    came_from[neighbor] = current
+                    g_score[neighbor] = tentative_g
+                    h = heuristic(neighbor, goal)
+                    heapq.heappush(open_set, (tentative_g + h, h, next(tie), tentative_g, neighbor))
+
+        return []  # No path found
+
+    def path_cost(self, path: List[Any]) -> float:
+        """
+        Total edge cost of a path.
+
+        Args:
+            path: List of node ids
+
+        Returns:
+            Sum of the edge costs along the path
+        """
+        return sum(self.edge_cost(a, b) for a, b in zip(path, path[1:]))
+
+    @staticmethod
+    def _reconstruct_path(came_from: Dict[Any, Any], current: Any) -> List[Any]:
+        path = [current]
+        while current in came_from:
+            current = came_from[current]
+            path.append(current)
+        return path[::-1]
@@ -0,0 +1,306 @@
+import cProfile
+import functools
+import inspect
+import io
+import json
+import pstats
+import sys
+import time
+from typing import IO, Any, Callable, Dict, List, Optional, Tuple, Union
+
+
+class LatencyHistogram:
+    """
+    Log-linear latency histogram in the style of HdrHistogram.
+
+    Values (nanoseconds) below 2**SUB_BUCKET_BITS get their own bucket; above
+    that, every power of two is split into 2**(SUB_BUCKET_BITS - 1) equal
+    buckets, so any recorded value is known to within about 2% while the
+    histogram stays a small sparse dict whatever the range of values.
+    """
+
+    SUB_BUCKET_BITS = 7
+
+    def __init__(self):
+        """Initialize an empty histogram."""
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def record(self, value: int):
+        """Record one value in nanoseconds."""
+        exponent = value.bit_length() - self.SUB_BUCKET_BITS
+        if exponent > 0:
+            index = (exponent << (self.SUB_BUCKET_BITS - 1)) + (value >> exponent)
+        else:
+            index = value
+        self.counts[index] = self.counts.get(index, 0) + 1
+
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def bucket_bounds(self, index: int) -> Tuple[int, int]:
+        """Lowest and highest value that fall into a bucket."""
+        if index < (1 << self.SUB_BUCKET_BITS):
+            return index, index
+        exponent = (index >> (self.SUB_BUCKET_BITS - 1)) - 1
+        lowest = (index - (exponent << (self.SUB_BUCKET_BITS - 1))) << exponent
+        return lowest, lowest + (1 << exponent) - 1
+
+    def percentile(self, fraction: float) -> int:
+        """
+        Value below which a fraction of the recorded values lie.
+
+        Args:
+            fraction: Percentile as a fraction (0.99 for p99)
+
+        Returns:
+            Highest value of the bucket holding the percentile, 0 if empty
+        """
+        if not self.count:
+            return 0
+        rank = max(1, round(fraction * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self.bucket_bounds(index)[1], self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        """Count, total and latency percentiles in microseconds."""
+        us = 1e-3
+        return {
+            "calls": self.count,
+            "total_ms": self.total * 1e-6,
+            "mean_us": self.total / self.count * us if self.count else 0.0,
+            "min_us": (self.min or 0) * us,
+            "p50_us": self.percentile(0.50) * us,
+            "p90_us": self.percentile(0.90) * us,
+            "p99_us": self.percentile(0.99) * us,
+            "max_us": self.max * us
+        }
+
+
+class Profiler:
+    """
+    Named phase timers, counters and an optional cProfile capture.
+
+    Timers are installed by replacing a function attribute with a timing
+    wrapper (instrument()) and are removed again by disable(), which puts the
+    original attributes back. Nothing is wrapped while the profiler is
+    disabled, so it costs nothing then. Times are inclusive: a phase called
+    from another phase is counted in both.
+
+    An instrumented engine also feeds the counters: simulated ticks (which an
+    event-driven engine mostly skips rather than processes) and the growth of
+    its decision, deadlock and replan metrics.
+    """
+
+    # Engine metrics whose growth is counted while an engine is instrumented
+    ENGINE_COUNTERS = ("decisions", "deadlocks_broken", "replans")
+
+    def __init__(self):
+        """Initialize a disabled profiler."""
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.counters: Dict[str, int] = {}
+        self.enabled = False
+
+        # (target, attribute, original value or None if it was inherited)
+        self._patches: List[Tuple[Any, str, Any]] = []
+        # Engines this profiler listens to, with their metrics at the last tick
+        self._engines: Dict[Any, Dict[str, int]] = {}
+        self._cprofile: Optional[cProfile.Profile] = None
+
+    def timer(self, name: str) -> LatencyHistogram:
+        """Histogram of a named phase, created on first use."""
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        return histogram
+
+    def count(self, name: str, amount: int = 1):
+        """Add to a named counter."""
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def wrap(self, name: str, func: Callable) -> Callable:
+        """
+        Wrap a function so every call is timed into a named histogram.
+
+        Args:
+            name: Phase name
+            func: Function to time
+
+        Returns:
+            Timing wrapper around func
+        """
+        record = self.timer(name).record
+        clock = time.perf_counter_ns
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(clock() - start)
+
+        return timed
+
+    def instrument(self, target: Any, attribute: str, name: Optional[str] = None):
+        """
+        Time every call of a function attribute until disable().
+
+        Args:
+            target: Object, class or module owning the attribute
+            attribute: Name of the function attribute
+            name: Phase name, defaults to the attribute name
+        """
+        static = inspect.getattr_static(target, attribute)
+        owned = attribute in getattr(target, "__dict__", {})
+        timed = self.wrap(name or attribute, getattr(target, attribute))
+
+        # A static method replaced on a class has to stay a static method
+        if isinstance(target, type) and isinstance(static, staticmethod):
+            timed = staticmethod(timed)
+
+        self._patches.append((target, attribute, static if owned else None))
+        setattr(target, attribute, timed)
+        self.enabled = True
+
+    def instrument_engine(self, engine: Any):
+        """
+        Time the phases of a SimulationEngine tick and count its ticks and decisions.
+
+        Args:
+            engine: Engine whose detector, resolver, planner and motion are timed
+        """
+        if hasattr(engine, "process_tick"):
+            # The event-driven engine only processes the ticks in which something
+            # happens and jumps over the rest, without going through step()
+            self.instrument(engine, "process_tick", "tick")
+            self.instrument(engine, "advance_to", "run")
+        else:
+            self.instrument(engine, "step", "tick")
+        self.instrument(engine.conflict_detector, "find_conflicts")
+        self.instrument(engine.conflict_detector, "find_connected_aisles")
+        self.instrument(engine.conflict_resolver, "handle_conflicts")
+        self.instrument(engine.conflict_resolver, "decide_all")
+        self.instrument(engine.planner, "find_path")
+        self.instrument(engine, "move_robot")
+        if engine.batch_motion is not None:
+            self.instrument(engine.batch_motion, "advance", "batch_motion")
+
+        self._engines[engine] = {name: getattr(engine, name) for name in self.ENGINE_COUNTERS}
+        engine.tick_listeners.append(self)
+
+    def on_tick(self, engine: Any, ticks: int):
+        """Count the simulated ticks and the metrics an instrumented engine gained in them."""
+        self.count("ticks", ticks)
+        last = self._engines[engine]
+        for name in self.ENGINE_COUNTERS:
+            value = getattr(engine, name)
+            self.count(name, value - last[name])
+            last[name] = value
+
+    def disable(self):
+        """Remove every timing wrapper; a running cProfile capture is left alone."""
+        for target, attribute, original in reversed(self._patches):
+            if original is None:
+                delattr(target, attribute)
+            else:
+                setattr(target, attribute, original)
+        self._patches.clear()
+        for engine in self._engines:
+            engine.tick_listeners.remove(self)
+        self._engines.clear()
+        self.enabled = False
+
+    def reset(self):
+        """Forget every recorded value; installed timers keep recording."""
+        for histogram in self.histograms.values():
+            histogram.__init__()
+        self.counters.clear()
+
+    @property
+    def capturing(self) -> bool:
+        """True while a cProfile capture runs."""
+        return self._cprofile is not None
+
+    def start_cprofile(self):
+        """Start a cProfile capture of everything the process does."""
+        if self._cprofile is None:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def stop_cprofile(self, path: Optional[str] = "profile.prof") -> Optional[pstats.Stats]:
+        """
+        Stop the cProfile capture.
+
+        Args:
+            path: File the raw stats are written to (for snakeviz etc.), skipped if None
+
+        Returns:
+            The captured stats, None if no capture was running
+        """
+        if self._cprofile is None:
+            return None
+        self._cprofile.disable()
+        stats = pstats.Stats(self._cprofile, stream=io.StringIO())
+        if path:
+            stats.dump_stats(path)
+        self._cprofile = None
+        return stats
+
+    def toggle_cprofile(self, path: str = "profile.prof") -> bool:
+        """
+        Start or stop the cProfile capture.
+
+        Returns:
+            True if a capture is now running
+        """
+        if self._cprofile is None:
+            self.start_cprofile()
+            return True
+        self.stop_cprofile(path)
+        return False
+
+    def to_dict(self) -> Dict[str, Dict]:
+        """Summaries of every timer and the counters."""
+        return {
+            "timers": {name: h.summary() for name, h in self.histograms.items()},
+            "counters": dict(self.counters)
+        }
+
+    def summary(self) -> str:
+        """Human readable table of the timers and counters."""
+        lines = [f"{'phase':<24}{'calls':>10}{'total ms':>11}{'mean us':>10}"
+                 f"{'p50 us':>10}{'p90 us':>10}{'p99 us':>10}{'max us':>11}"]
+        for name, histogram in sorted(self.histograms.items(), key=lambda item: -item[1].total):
+            s = histogram.summary()
+            lines.append(f"{name:<24}{s['calls']:>10}{s['total_ms']:>11.1f}{s['mean_us']:>10.1f}"
+                         f"{s['p50_us']:>10.1f}{s['p90_us']:>10.1f}{s['p99_us']:>10.1f}{s['max_us']:>11.1f}")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"{name:<24}{value:>10}")
+        return "\n".join(lines)
+
+    def export(self, target: Union[str, IO, None] = None, as_json: bool = False):
+        """
+        Write the summary.
+
+        Args:
+            target: File path or open stream, stdout if omitted
+            as_json: Write the summary as JSON instead of a table
+        """
+        text = json.dumps(self.to_dict(), indent=2) if as_json else self.summary()
+        if isinstance(target, str):
+            with open(target, "w") as stream:
+                stream.write(text + "\n")
+        else:
+            (target or sys.stdout).write(text + "\n")
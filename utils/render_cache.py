@@ -0,0 +1,67 @@
+from typing import Callable, List
+import pygame
+
+
+class RenderCache:
+    """
+    Cached static background and dirty-rect screen updates for the front-ends.
+
+    The static map (grid, shelves, edges, nodes) is drawn once to a background
+    surface and only redrawn after invalidate(). Each frame, the areas drawn
+    in the previous frame are restored from the background, the moving parts
+    are drawn on top, and only the rectangles that changed are pushed to the
+    display.
+    """
+
+    def __init__(self, screen: pygame.Surface, draw_static: Callable[[pygame.Surface], None]):
+        """
+        Initialize the cache; the background is built on the first frame.
+
+        Args:
+            screen: Display surface
+            draw_static: Function drawing the static map onto a surface
+        """
+        self.screen = screen
+        self.draw_static = draw_static
+        self.background = None
+
+        self.full_redraw = True
+        self.rects: List[pygame.Rect] = []
+        self.previous_rects: List[pygame.Rect] = []
+
+    def invalidate(self):
+        """Rebuild the background on the next frame, e.g. after the layout changed."""
+        self.background = None
+
+    def redraw_all(self):
+        """Push the whole screen on the next frame, e.g. after the window was exposed."""
+        self.full_redraw = True
+
+    def begin_frame(self):
+        """Erase the moving parts of the previous frame."""
+        if self.background is None:
+            self.background = pygame.Surface(self.screen.get_size()).convert()
+            self.draw_static(self.background)
+            self.full_redraw = True
+
+        if self.full_redraw:
+            self.screen.blit(self.background, (0, 0))
+        else:
+            for rect in self.previous_rects:
+                self.screen.blit(self.background, rect, rect)
+        self.rects = []
+
+    def mark(self, rect: pygame.Rect) -> pygame.Rect:
+        """Record an area drawn this frame (pygame draw and blit calls return it)."""
+        self.rects.append(rect)
+        return rect
+
+    def end_frame(self):
+        """Update the changed areas of the display."""
+        if self.full_redraw:
+            pygame.display.flip()
+            self.full_redraw = False
+        else:
+            # Last frame's areas were erased, this frame's were drawn
+            pygame.display.update(self.previous_rects + self.rects)
+        self.previous_rects = self.rects
@@ -0,0 +1,130 @@
+from typing import Dict, Tuple, Any
+from utils.base_robot import Robot
+
+
+class ReservationTable:
+    """
+    Space-time reservations of every robot's upcoming steps.
+
+    Each robot reserves its current node at timestep 0 and the next `horizon`
+    nodes of its path at timesteps 1..horizon, plus every edge it traverses
+    keyed by the timestep it arrives. Timesteps are hops counted from each
+    robot's current node. Reservations are refreshed through the robots' path
+    listeners, so a conflict check is a handful of hash lookups.
+    """
+
+    DEFAULT_HORIZON = 10
+
+    def __init__(self, horizon: int = DEFAULT_HORIZON):
+        """
+        Initialize an empty table.
+
+        Args:
+            horizon: Number of upcoming steps each robot reserves
+        """
+        if horizon < 1:
+            raise ValueError("horizon must be at least 1")
+
+        self.horizon = horizon
+        # (node, t) -> robots; (from_node, to_node, t) -> robots
+        self.node_reservations: Dict[Tuple[Any, int], Dict[Robot, None]] = {}
+        self.edge_reservations: Dict[Tuple[Any, Any, int], Dict[Robot, None]] = {}
+        # robot -> {node: first timestep} of its current reservations
+        self.reserved_nodes: Dict[Robot, Dict[Any, int]] = {}
+        self.reserved_edges: Dict[Robot, list] = {}
+
+    def add_robot(self, robot: Robot):
+        """
+        Start tracking a robot and reserve its upcoming steps.
+
+        Args:
+            robot: Robot to track
+        """
+        if robot in self.reserved_nodes:
+            return
+        self.reserved_nodes[robot] = {}
+        self.reserved_edges[robot] = []
+        robot.add_path_listener(self)
+        self.reserve(robot)
+
+    def remove_robot(self, robot: Robot):
+        """
+        Stop tracking a robot and drop its reservations.
+
+        Args:
+            robot: Robot to forget
+        """
+        if robot not in self.reserved_nodes:
+            return
+        self.release(robot)
+        del self.reserved_nodes[robot]
+        del self.reserved_edges[robot]
+        robot.remove_path_listener(self)
+
+    def on_path_changed(self, robot: Robot):
+        self.reserve(robot)
+
+    def on_advance(self, robot: Robot, departed_node: Any):
+        # Timesteps are relative to the current node, so every entry shifts
+        self.reserve(robot)
+
+    def reserve(self, robot: Robot):
+        """Replace a robot's reservations with its next `horizon` steps."""
+        self.release(robot)
+
+        if robot.current_node is None:
+            return
+
+        nodes = self.reserved_nodes[robot]
+        edges = self.reserved_edges[robot]
+
+        nodes[robot.current_node] = 0
+        self.node_reservations.setdefault((robot.current_node, 0), {})[robot] = None
+
+        previous = robot.current_node
+        ahead = robot.remaining_path[:self.horizon] if robot.remaining_path else ()
+        for t, node in enumerate(ahead, start=1):
+            nodes.setdefault(node, t)
+            self.node_reservations.setdefault((node, t), {})[robot] = None
+
+            key = (previous, node, t)
+            edges.append(key)
+            self.edge_reservations.setdefault(key, {})[robot] = None
+            previous = node
+
+    def release(self, robot: Robot):
+        """Drop every reservation held by a robot."""
+        nodes = self.reserved_nodes[robot]
+        edges = self.reserved_edges[robot]
+
+        # The timestep 0 entry is the only node reservation without an edge
+        for node, t in nodes.items():
+            if t == 0:
+                self._unlink(self.node_reservations, (node, 0), robot)
+        for key in edges:
+            self._unlink(self.node_reservations, (key[1], key[2]), robot)
+            self._unlink(self.edge_reservations, key, robot)
+
+        nodes.clear()
+        edges.clear()
+
+    def node_owners(self, node: Any, t: int) -> Dict[Robot, None]:
+        """Robots that reserved a node at a timestep."""
+        return self.node_reservations.get((node, t), {})
+
+    def edge_owners(self, from_node: Any, to_node: Any, t: int) -> Dict[Robot, None]:
+        """Robots that reserved traversing an edge, arriving at a timestep."""
+        return self.edge_reservations.get((from_node, to_node, t), {})
+
+    def nodes_of(self, robot: Robot) -> Dict[Any, int]:
+        """Nodes reserved by a robot mapped to the first timestep it reaches them."""
+        return self.reserved_nodes.get(robot, {})
+
+    @staticmethod
+    def _unlink(table: Dict, key: Any, robot: Robot):
+        owners = table.get(key)
+        if owners is None:
+            return
+        owners.pop(robot, None)
+        if not owners:
+            del table[key]
@@ -0,0 +1,146 @@
+from array import array
+from collections import deque
+from typing import Dict, List, Any
+
+# Marker for "no route" in the next-hop table
+NO_ROUTE = -1
+
+
+class RoutingTable:
+    """
+    Precomputed all-pairs next-hop and hop-distance table for a static map.
+
+    The table is built once with a breadth-first search towards every node
+    and stored row-major in flat `array` buffers, so looking up a path costs
+    O(path length) with no search at all. Memory grows with the square of the
+    node count; use estimate_memory() to decide whether a map is small enough.
+    The table has the same find_path() interface as AStarPlanner, so it can be
+    passed to the engine as its planner.
+    """
+
+    def __init__(self, node_ids: List[Any], next_hop: array, distance: array):
+        """
+        Initialize from already built tables; use RoutingTable.build() instead.
+
+        Args:
+            node_ids: Node ids in table order
+            next_hop: Flat V*V table of next-hop node indices (row = source)
+            distance: Flat V*V table of hop counts (row = source)
+        """
+        self.node_ids = node_ids
+        self.index_of = {node: i for i, node in enumerate(node_ids)}
+        self.next_hop = next_hop
+        self.distance_table = distance
+        self.unreachable = (1 << (8 * distance.itemsize)) - 1
+
+    @staticmethod
+    def _distance_typecode(num_nodes: int) -> str:
+        # A shortest path has fewer hops than there are nodes
+        return "H" if num_nodes < 0xFFFF else "I"
+
+    @classmethod
+    def estimate_memory(cls, num_nodes: int) -> int:
+        """
+        Bytes needed by the tables of a map with the given number of nodes.
+
+        Args:
+            num_nodes: Number of nodes in the map
+
+        Returns:
+            Estimated size of the next-hop and distance tables in bytes
+        """
+        hop_size = array("i").itemsize
+        distance_size = array(cls._distance_typecode(num_nodes)).itemsize
+        return num_nodes * num_nodes * (hop_size + distance_size)
+
+    @classmethod
+    def build(cls, nodes: Dict[Any, Any], edges: Dict[Any, List[Any]]) -> "RoutingTable":
+        """
+        Build the table with a breadth-first search towards every node.
+
+        Args:
+            nodes: Mapping of node ids to positions
+            edges: Adjacency lists of the (possibly directed) map
+
+        Returns:
+            Routing table for the map
+        """
+        node_ids = list(nodes.keys())
+        index_of = {node: i for i, node in enumerate(node_ids)}
+        num_nodes = len(node_ids)
+
+        # Searching backwards from each target gives every source its first hop
+        reverse = [[] for _ in range(num_nodes)]
+        for node, neighbors in edges.items():
+            source = index_of[node]
+            for neighbor in neighbors:
+                reverse[index_of[neighbor]].append(source)
+
+        distance_typecode = cls._distance_typecode(num_nodes)
+        unreachable = (1 << (8 * array(distance_typecode).itemsize)) - 1
+
+        next_hop = array("i", [NO_ROUTE]) * (num_nodes * num_nodes)
+        distance = array(distance_typecode, [unreachable]) * (num_nodes * num_nodes)
+
+        for target in range(num_nodes):
+            distance[target * num_nodes + target] = 0
+            next_hop[target * num_nodes + target] = target
+
+            hops = {target: 0}
+            queue = deque([target])
+            while queue:
+                current = queue.popleft()
+                current_hops = hops[current] + 1
+                for source in reverse[current]:
+                    if source in hops:
+                        continue
+                    hops[source] = current_hops
+                    cell = source * num_nodes + target
+                    next_hop[cell] = current
+                    distance[cell] = current_hops
+                    queue.append(source)
+
+        return cls(node_ids, next_hop, distance)
+
+    def find_path(self, start: Any, goal: Any) -> List[Any]:
+        """
+        Look up the shortest path (in hops) between two nodes.
+
+        Args:
+            start: Start node id
+            goal: Goal node id
+
+        Returns:
+            List of node ids from start to goal, empty if no path exists
+        """
+        num_nodes = len(self.node_ids)
+        current = self.index_of[start]
+        target = self.index_of[goal]
+
+        if self.next_hop[current * num_nodes + target] == NO_ROUTE:
+            return []
+
+        path = [start]
+        while current != target:
+            current = self.next_hop[current * num_nodes + target]
+            path.append(self.node_ids[current])
+        return path
+
+    def distance(self, start: Any, goal: Any) -> float:
+        """
+        Number of hops on the shortest path between two nodes.
+
+        Args:
+            start: Start node id
+            goal: Goal node id
+
+        Returns:
+            Hop count, or infinity if the goal cannot be reached
+        """
+        hops = self.distance_table[self.index_of[start] * len(self.node_ids) + self.index_of[goal]]
+        return float("inf") if hops == self.unreachable else hops
+
+    def memory_usage(self) -> int:
+        """Bytes used by the next-hop and distance tables."""
+        return (self.next_hop.itemsize * len(self.next_hop)
+                + self.distance_table.itemsize * len(self.distance_table))
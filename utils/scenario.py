@@ -0,0 +1,245 @@
+import gc
+import json
+import math
+import struct
+import sys
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from utils.base_robot import Robot
+
+SCENARIO_MAGIC = b"FMSSCENE"
+SCENARIO_VERSION = 1
+
+# Magic, format version, header length
+PREAMBLE = struct.Struct("<8sHI")
+
+# Blobs start on 8 byte boundaries
+ALIGNMENT = 8
+
+NO_NODE = -1
+
+
+class Scenario:
+    """
+    Map, shelves and robots read from a scenario file.
+
+    Attributes:
+        nodes: Mapping of node ids to (x, y) positions
+        edges: Adjacency lists of the map
+        robots: Robots with their paths, progress, priority and battery level restored
+        shelves: Shelf rectangles as (x, y, width, height) tuples
+        metadata: Free-form values stored with the scenario (e.g. the tick it was saved at)
+    """
+
+    def __init__(
+        self,
+        nodes: Dict[Any, Tuple[float, float]],
+        edges: Dict[Any, List[Any]],
+        robots: List[Robot],
+        shelves: List[Tuple[int, int, int, int]],
+        metadata: Dict[str, Any]
+    ):
+        self.nodes = nodes
+        self.edges = edges
+        self.robots = robots
+        self.shelves = shelves
+        self.metadata = metadata
+
+
+def _little_endian(values: array) -> array:
+    # Blobs are always stored little-endian
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+def save_scenario(
+    path: str,
+    nodes: Dict[Any, Tuple[float, float]],
+    edges: Dict[Any, Iterable[Any]],
+    robots: Sequence[Robot],
+    shelves: Iterable[Sequence[int]] = (),
+    metadata: Optional[Dict[str, Any]] = None
+):
+    """
+    Write a scenario file.
+
+    The file holds a short JSON header (format version, robot names and
+    scalar robot state, blob directory) followed by flat typed arrays: node
+    ids and coordinates, the adjacency in compressed sparse row form (one
+    offset per node into a list of neighbor indexes), the robots' nodes,
+    poses and paths, and the shelves. Nothing is pickled, so files don't
+    depend on the classes that wrote them.
+
+    Args:
+        path: File to write
+        nodes: Mapping of node ids to (x, y) positions
+        edges: Adjacency lists of the map (may be empty)
+        robots: Robots to store
+        shelves: Shelf rectangles as (x, y, width, height), e.g. pygame.Rect
+        metadata: JSON-serializable values stored with the scenario
+    """
+    node_ids = list(nodes)
+    position = {node: i for i, node in enumerate(node_ids)}
+    integer_ids = all(type(node) is int for node in node_ids)
+
+    coordinates = array("d")
+    for node in node_ids:
+        coordinates.extend(nodes[node])
+
+    # Compressed sparse row adjacency over node positions
+    edge_offsets = array("q", [0])
+    edge_targets = array("q")
+    for node in node_ids:
+        edge_targets.extend(position[neighbor] for neighbor in edges.get(node, ()))
+        edge_offsets.append(len(edge_targets))
+
+    robot_nodes = array("q")
+    robot_poses = array("d")
+    path_offsets = array("q", [0])
+    path_nodes = array("q")
+    robot_state = []
+    for robot in robots:
+        robot_nodes.append(position.get(robot.current_node, NO_NODE))
+        robot_poses.extend(robot.current_pose if robot.current_pose is not None else (math.nan, math.nan))
+        if robot.full_path is not None:
+            path_nodes.extend(position[node] for node in robot.full_path)
+        path_offsets.append(len(path_nodes))
+        robot_state.append({
+            "name": robot.name,
+            "battery_lvl": robot.battery_lvl,
+            "task_priority": robot.task_priority,
+            "robot_speed": robot.robot_speed,
+            "waiting": robot.waiting,
+            "has_path": robot.full_path is not None,
+            "path_index": robot.path_index
+        })
+
+    shelf_rects = array("q")
+    for shelf in shelves:
+        shelf_rects.extend(int(value) for value in tuple(shelf)[:4])
+
+    blobs = {
+        "coordinates": coordinates,
+        "edge_offsets": edge_offsets,
+        "edge_targets": edge_targets,
+        "robot_nodes": robot_nodes,
+        "robot_poses": robot_poses,
+        "path_offsets": path_offsets,
+        "path_nodes": path_nodes,
+        "shelves": shelf_rects
+    }
+    if integer_ids:
+        blobs["node_ids"] = array("q", node_ids)
+
+    directory = {}
+    offset = 0
+    for name, values in blobs.items():
+        directory[name] = {"typecode": values.typecode, "offset": offset, "length": len(values)}
+        size = len(values) * values.itemsize
+        offset += size + (-size % ALIGNMENT)
+
+    header = {
+        "version": SCENARIO_VERSION,
+        "node_count": len(node_ids),
+        "edge_count": len(edge_targets),
+        # Node ids that are not all integers are kept in the header
+        "node_ids": None if integer_ids else node_ids,
+        "robots": robot_state,
+        "metadata": metadata or {},
+        "blobs": directory
+    }
+    header_bytes = json.dumps(header).encode()
+    header_bytes += b" " * (-(PREAMBLE.size + len(header_bytes)) % ALIGNMENT)
+
+    with open(path, "wb") as f:
+        f.write(PREAMBLE.pack(SCENARIO_MAGIC, SCENARIO_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for values in blobs.values():
+            data = _little_endian(values).tobytes()
+            f.write(data)
+            f.write(bytes(-len(data) % ALIGNMENT))
+
+
+def load_scenario(path: str) -> Scenario:
+    """
+    Read a scenario file written by save_scenario.
+
+    Args:
+        path: Scenario file
+
+    Returns:
+        Scenario with the map, shelves and restored robots
+    """
+    with open(path, "rb") as f:
+        data = memoryview(f.read())
+
+    magic, version, header_length = PREAMBLE.unpack_from(data, 0)
+    if magic != SCENARIO_MAGIC:
+        raise ValueError(f"{path} is not a scenario file")
+    if version > SCENARIO_VERSION:
+        raise ValueError(f"Unsupported scenario version {version}")
+
+    header = json.loads(bytes(data[PREAMBLE.size:PREAMBLE.size + header_length]))
+    data_start = PREAMBLE.size + header_length
+
+    def blob(name: str) -> array:
+        entry = header["blobs"][name]
+        values = array(entry["typecode"])
+        start = data_start + entry["offset"]
+        values.frombytes(data[start:start + entry["length"] * values.itemsize])
+        return _little_endian(values)
+
+    node_count = header["node_count"]
+    node_ids = header["node_ids"]
+    if node_ids is None:
+        node_ids = blob("node_ids").tolist()
+    else:
+        # JSON turns tuples into lists; node ids have to stay hashable
+        node_ids = [tuple(node) if isinstance(node, list) else node for node in node_ids]
+
+    # Hundreds of thousands of new containers would otherwise trigger many
+    # garbage collection passes that find nothing to free
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        coordinates = blob("coordinates")
+        nodes = dict(zip(node_ids, zip(coordinates[0::2], coordinates[1::2])))
+
+        # Map neighbor positions back to node ids once, then slice per node
+        edge_offsets = blob("edge_offsets").tolist()
+        targets = blob("edge_targets").tolist()
+        if node_ids != list(range(node_count)):
+            targets = [node_ids[i] for i in targets]
+        edges = {node: targets[edge_offsets[i]:edge_offsets[i + 1]] for i, node in enumerate(node_ids)}
+    finally:
+        if collecting:
+            gc.enable()
+
+    robot_nodes = blob("robot_nodes")
+    robot_poses = blob("robot_poses")
+    path_offsets = blob("path_offsets")
+    path_nodes = blob("path_nodes")
+    robots = []
+    for i, state in enumerate(header["robots"]):
+        robot = Robot(name=state["name"], battery_lvl=state["battery_lvl"])
+        robot.update_priority(state["task_priority"])
+        robot.robot_speed = state["robot_speed"]
+
+        if state["has_path"]:
+            robot.handle_path([node_ids[j] for j in path_nodes[path_offsets[i]:path_offsets[i + 1]]])
+            for _ in range(state["path_index"]):
+                robot.move_forward()
+        elif robot_nodes[i] != NO_NODE:
+            robot.current_node = node_ids[robot_nodes[i]]
+
+        x, y = robot_poses[2 * i], robot_poses[2 * i + 1]
+        robot.current_pose = None if math.isnan(x) else (x, y)
+        robot.waiting = state["waiting"]
+        robots.append(robot)
+
+    shelf_rects = blob("shelves").tolist()
+    shelves = [tuple(shelf_rects[i:i + 4]) for i in range(0, len(shelf_rects), 4)]
+
+    return Scenario(nodes, edges, robots, shelves, header["metadata"])
@@ -0,0 +1,160 @@
+import json
+import logging
+import sys
+from collections import deque
+from typing import IO, Optional, Union
+
+# Level below DEBUG for per robot pair output in the conflict hot path
+TRACE = 5
+logging.addLevelName(TRACE, "TRACE")
+
+# Parent logger of every module under utils/
+ROOT_LOGGER_NAME = "utils"
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Get a module logger.
+
+    Messages should be logged with %-style arguments (never f-strings) so
+    that nothing is formatted unless a handler actually emits the record.
+    Calls whose arguments are expensive to build should be wrapped in
+    `if logger.isEnabledFor(level):`.
+
+    Args:
+        name: Logger name, normally the module's __name__
+
+    Returns:
+        Logger instance
+    """
+    return logging.getLogger(name)
+
+
+class RingBufferHandler(logging.Handler):
+    """
+    Keeps the most recent log records in memory for post-mortem dumps.
+
+    Records are stored unformatted, so keeping them costs little more than
+    the record itself; formatting only happens in dump().
+    """
+
+    DEFAULT_CAPACITY = 5000
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, level: int = logging.DEBUG):
+        """
+        Initialize an empty ring buffer.
+
+        Args:
+            capacity: Maximum number of records kept
+            level: Lowest level stored in the buffer
+        """
+        super().__init__(level)
+        self.records = deque(maxlen=capacity)
+
+    def emit(self, record: logging.LogRecord):
+        self.records.append(record)
+
+    def clear(self):
+        """Drop every buffered record."""
+        self.records.clear()
+
+    def dump(self, target: Union[str, IO, None] = None, as_json: bool = False):
+        """
+        Write the buffered records, oldest first.
+
+        Args:
+            target: File path or open stream, stderr if omitted
+            as_json: Write one JSON object per line instead of plain text
+        """
+        if isinstance(target, str):
+            with open(target, "w") as stream:
+                self._write(stream, as_json)
+        else:
+            self._write(target or sys.stderr, as_json)
+
+    def _write(self, stream: IO, as_json: bool):
+        formatter = self.formatter or logging.Formatter(
+            "%(relativeCreated)10.1f %(levelname)-5s %(name)s: %(message)s"
+        )
+        for record in list(self.records):
+            if as_json:
+                stream.write(json.dumps({
+                    "time": record.created,
+                    "level": record.levelname,
+                    "logger": record.name,
+                    "event": record.msg,
+                    "args": [str(arg) for arg in record.args or ()],
+                    "message": record.getMessage()
+                }) + "\n")
+            else:
+                stream.write(formatter.format(record) + "\n")
+
+
+def parse_level(level: Union[int, str]) -> int:
+    """
+    Convert a log level name (case-insensitive, TRACE included) to its number.
+
+    Args:
+        level: Level name or number
+
+    Returns:
+        Level number
+    """
+    if isinstance(level, str):
+        number = logging.getLevelName(level.strip().upper())
+        if not isinstance(number, int):
+            raise ValueError(f"Unknown log level '{level}'")
+        return number
+    return level
+
+
+def configure_logging(
+    level: Union[int, str] = logging.WARNING,
+    ring_buffer_size: Optional[int] = None,
+    ring_buffer_level: Union[int, str, None] = None,
+    stream: Optional[IO] = None
+) -> Optional[RingBufferHandler]:
+    """
+    Configure console output and an optional ring buffer for the utils loggers.
+
+    The logger level is set to the lowest level any sink wants, so records
+    below it are rejected by a single level check before any formatting.
+    A ring buffer that stores more than the console therefore makes every
+    record down to its level get built, and has to be asked for.
+
+    Args:
+        level: Lowest level written to the console (name or number)
+        ring_buffer_size: Keep this many recent records in memory, disabled if None
+        ring_buffer_level: Lowest level stored in the ring buffer (name or
+            number), the console level if None or blank (e.g. an empty
+            environment variable)
+        stream: Console stream, stderr if omitted
+
+    Returns:
+        The ring buffer handler, or None if it is disabled
+    """
+    level = parse_level(level)
+
+    logger = logging.getLogger(ROOT_LOGGER_NAME)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    logger.propagate = False
+
+    console = logging.StreamHandler(stream)
+    console.setLevel(level)
+    console.setFormatter(logging.Formatter("%(levelname)s %(name)s: %(message)s"))
+    logger.addHandler(console)
+
+    ring_buffer = None
+    effective_level = level
+    if ring_buffer_size:
+        if ring_buffer_level is None or (isinstance(ring_buffer_level, str) and not ring_buffer_level.strip()):
+            ring_buffer_level = level
+        else:
+            ring_buffer_level = parse_level(ring_buffer_level)
+        ring_buffer = RingBufferHandler(ring_buffer_size, ring_buffer_level)
+        logger.addHandler(ring_buffer)
+        effective_level = min(level, ring_buffer_level)
+
+    logger.setLevel(effective_level)
+    return ring_buffer
@@ -0,0 +1,668 @@
+import math
+import random
+from typing import Dict, List, Set, Tuple, Any, Optional
+from utils.base_robot import Robot
+from utils.conflict_handler import ConflictDetector, ConflictResolver, Decision
+from utils.node_index import NodeRobotIndex
+from utils.aisle_cache import AisleCache
+from utils.conflict_cache import ConflictCache
+from utils.reservation_table import ReservationTable
+from utils.planner import AStarPlanner
+from utils.cooperative_planner import CooperativePlanner
+from utils.routing_table import RoutingTable
+from utils.wait_for_graph import WaitForGraph
+from utils.warehouse_map import WarehouseMap
+from utils.task_assigner import TaskAssigner
+from utils.sim_logging import get_logger
+
+logger = get_logger(__name__)
+
+# Default layout used when generating grids for the front-ends
+DEFAULT_WIDTH, DEFAULT_HEIGHT = 1000, 700
+DEFAULT_MARGIN = 50
+
+
+def generate_grid_nodes(
+    cols: int = 10,
+    rows: int = 10,
+    width: float = DEFAULT_WIDTH,
+    height: float = DEFAULT_HEIGHT,
+    margin: float = DEFAULT_MARGIN
+) -> Dict[int, Tuple[float, float]]:
+    """
+    Generate a rectangular grid of nodes that fits inside the given area.
+
+    Args:
+        cols: Number of columns in the grid
+        rows: Number of rows in the grid
+        width: Width of the area the grid is laid out in
+        height: Height of the area the grid is laid out in
+        margin: Empty border left around the grid
+
+    Returns:
+        Dictionary mapping node ids to (x, y) positions
+    """
+    nodes = {}
+    node_id = 0
+
+    # Calculate spacing to fit grid within the available area
+    available_width = width - (2 * margin)
+    available_height = height - (2 * margin)
+
+    x_spacing = available_width / (cols - 1) if cols > 1 else available_width
+    y_spacing = available_height / (rows - 1) if rows > 1 else available_height
+
+    for y in range(rows):
+        for x in range(cols):
+            nodes[node_id] = (margin + x * x_spacing, margin + y * y_spacing)
+            node_id += 1
+
+    return nodes
+
+
+def generate_edges(nodes: Dict[int, Any], cols: int = 10, rows: int = 10) -> Dict[int, List[int]]:
+    """
+    Connect every grid node to its right, left, down and up neighbours.
+
+    Args:
+        nodes: Grid nodes as produced by generate_grid_nodes
+        cols: Number of columns in the grid
+        rows: Number of rows in the grid
+
+    Returns:
+        Dictionary mapping node ids to lists of neighbouring node ids
+    """
+    edges = {}
+
+    for node_id in nodes:
+        edges[node_id] = []
+
+        # Check right neighbor
+        if (node_id + 1) % cols != 0 and node_id + 1 < len(nodes):
+            edges[node_id].append(node_id + 1)
+
+        # Check left neighbor
+        if node_id % cols != 0 and node_id - 1 >= 0:
+            edges[node_id].append(node_id - 1)
+
+        # Check down neighbor
+        if node_id + cols < len(nodes):
+            edges[node_id].append(node_id + cols)
+
+        # Check up neighbor
+        if node_id - cols >= 0:
+            edges[node_id].append(node_id - cols)
+
+    return edges
+
+
+class SimulationEngine:
+    """
+    Headless simulation loop for a fleet of robots.
+
+    The engine owns the map, the robots and the conflict handling objects and
+    advances the whole fleet one tick at a time. It never touches a display,
+    never prompts for input and never sleeps, so it can run as fast as the
+    conflict logic allows. The pygame front-ends are thin viewers over it.
+    """
+
+    # Ways to break a deadlock found in the resolver's wait-for graph
+    DEADLOCK_POLICIES = ("backoff", "yield", "reroute")
+
+    def __init__(
+        self,
+        nodes: Dict[Any, Tuple[float, float]],
+        edges: Dict[Any, List[Any]],
+        robots: List[Robot],
+        speed: Optional[float] = None,
+        auto_goal: bool = True,
+        seed: Optional[int] = None,
+        batch_motion: bool = False,
+        batch_decisions: bool = False,
+        detection_mode: str = "aisle",
+        reservation_horizon: int = ReservationTable.DEFAULT_HORIZON,
+        deadlock_policy: Optional[str] = "reroute",
+        assignment: str = "random",
+        task_pool: Optional[int] = None,
+        replan_after: Optional[int] = None,
+        replan_window: int = CooperativePlanner.DEFAULT_WINDOW,
+        planner: AStarPlanner = None,
+        conflict_detector: ConflictDetector = None,
+        conflict_resolver: ConflictResolver = None
+    ):
+        """
+        Initialize the engine.
+
+        Args:
+            nodes: Mapping of node ids to (x, y) positions
+            edges: Adjacency lists of the map (may be empty for hand-drawn paths)
+            robots: Robots taking part in the simulation
+            speed: Distance travelled per tick; defaults to each robot's robot_speed
+            auto_goal: Give robots a new random goal when they reach the current one
+            seed: Seed for the engine's random number generator
+            batch_motion: Move all robots with one vectorized NumPy update per tick
+                (decisions for the whole fleet are then made before anyone moves)
+            batch_decisions: Decide for the whole fleet at once with
+                ConflictResolver.decide_all, in robot name order
+            detection_mode: "aisle" compares paths pairwise, "reservation" looks up
+                a space-time reservation table
+            reservation_horizon: Steps each robot reserves in reservation mode
+            deadlock_policy: How a robot that closes a wait-for cycle gives way:
+                "backoff" retreats to the node it came from, "yield" steps aside
+                to a free neighbor, "reroute" plans around the robots in the
+                cycle. None only detects and counts deadlocks.
+            assignment: How robots that reached their goal get a new one: "random"
+                sends each to a random free node at once, "greedy" and "hungarian"
+                match the robots done in a tick to a pool of open tasks by path
+                distance at the end of the tick (see TaskAssigner)
+            task_pool: Open tasks kept for matching, defaults to the number of robots
+            replan_after: Consecutive waiting ticks after which a robot is replanned
+                around the other robots' next steps (and again after as many
+                more). None keeps every robot on its route.
+            replan_window: Steps of the other robots' paths a replanned route avoids
+            planner: Path planner, an A* planner over nodes and edges is created if omitted
+            conflict_detector: Detector to use, a default one backed by a node index,
+                an aisle cache and a conflict cache is created if omitted
+            conflict_resolver: Resolver to use, a default one is created if omitted
+        """
+        self.nodes = nodes
+        self.edges = edges
+        self.robots = robots
+        self.speed = speed
+        self.auto_goal = auto_goal
+        self.rng = random.Random(seed)
+
+        if deadlock_policy is not None and deadlock_policy not in self.DEADLOCK_POLICIES:
+            raise ValueError(f"Unknown deadlock policy '{deadlock_policy}'")
+        self.deadlock_policy = deadlock_policy
+        self.planner = planner or AStarPlanner(nodes, edges)
+
+        # Inverted node -> robots index, kept current by the robots themselves
+        self.node_index = NodeRobotIndex()
+        for robot in robots:
+            self.node_index.add_robot(robot)
+
+        self.reservation_table = None
+        if detection_mode == "reservation":
+            self.reservation_table = ReservationTable(reservation_horizon)
+            for robot in robots:
+                self.reservation_table.add_robot(robot)
+
+        self.conflict_detector = conflict_detector or ConflictDetector(
+            node_index=self.node_index,
+            # Room for every ordered robot pair twice over, so live pairs are not evicted
+            aisle_cache=AisleCache(max(AisleCache.DEFAULT_MAX_ENTRIES, 2 * len(robots) ** 2)),
+            reservation_table=self.reservation_table,
+            mode=detection_mode,
+            conflict_cache=ConflictCache()
+        )
+        self.conflict_resolver = conflict_resolver or ConflictResolver(
+            conflict_detector=self.conflict_detector,
+            # Deadlock durations are measured in ticks
+            wait_for_graph=WaitForGraph(clock=lambda: self.tick)
+        )
+        self._detour_planner = None
+
+        if replan_after is not None and replan_after < 1:
+            raise ValueError("replan_after must be at least 1")
+        self.replan_after = replan_after
+        self.replan_window = replan_window
+        self._cooperative_planner = None
+        self.batch_decisions = batch_decisions
+
+        # Keeps the free nodes current through the robots' path listeners
+        self.task_assigner = TaskAssigner(nodes, self.planner, robots, self.rng,
+                                          strategy=assignment, pool_size=task_pool)
+
+        self.batch_motion = None
+        if batch_motion:
+            # NumPy is only needed for the vectorized motion stage
+            from utils.batch_motion import BatchMotion
+            self.batch_motion = BatchMotion(robots, nodes, self.robot_speed)
+
+        self.tick = 0
+        self.decisions = 0
+
+        # Fleet metrics
+        self.goals_completed = 0
+        self.wait_ticks = 0
+        self.wait_streaks = {robot.name: 0 for robot in robots}
+        self.deadlocks_broken = 0
+        self.replans = 0
+
+        # Objects (e.g. FleetStats) notified with on_tick(engine, ticks) after every tick
+        self.tick_listeners = []
+
+    @classmethod
+    def from_grid(
+        cls,
+        num_robots: int,
+        cols: int = 10,
+        rows: int = 10,
+        width: float = DEFAULT_WIDTH,
+        height: float = DEFAULT_HEIGHT,
+        precompute_routes: bool = False,
+        **kwargs
+    ) -> "SimulationEngine":
+        """
+        Build an engine on a generated grid with randomly placed robots.
+
+        Args:
+            num_robots: Number of robots to create
+            cols: Number of columns in the grid
+            rows: Number of rows in the grid
+            width: Width of the area the grid is laid out in
+            height: Height of the area the grid is laid out in
+            precompute_routes: Plan with a precomputed RoutingTable instead of
+                searching on every new goal (see RoutingTable.estimate_memory)
+            **kwargs: Extra arguments passed on to the constructor
+
+        Returns:
+            Engine with every robot placed and given an initial goal
+        """
+        nodes = generate_grid_nodes(cols=cols, rows=rows, width=width, height=height)
+        edges = generate_edges(nodes, cols=cols, rows=rows)
+        robots = [Robot(name=f"R{i+1}") for i in range(num_robots)]
+
+        if precompute_routes:
+            kwargs.setdefault("planner", RoutingTable.build(nodes, edges))
+        else:
+            # Grid edges are axis-aligned, so the tighter manhattan heuristic is admissible
+            kwargs.setdefault("planner", AStarPlanner(nodes, edges, heuristic="manhattan"))
+
+        engine = cls(nodes, edges, robots, **kwargs)
+        engine.randomize_robots()
+        return engine
+
+    @classmethod
+    def from_map(cls, warehouse_map: WarehouseMap, num_robots: int, **kwargs) -> "SimulationEngine":
+        """
+        Build an engine on an imported warehouse map with randomly placed robots.
+
+        The engine uses the map's array-backed node and edge views directly.
+
+        Args:
+            warehouse_map: Map loaded with WarehouseMap.load or WarehouseMap.from_text
+            num_robots: Number of robots to create
+            **kwargs: Extra arguments passed on to the constructor
+
+        Returns:
+            Engine with every robot placed and given an initial goal
+        """
+        robots = [Robot(name=f"R{i+1}") for i in range(num_robots)]
+
+        # Map edges are grid steps, so the manhattan heuristic is admissible
+        kwargs.setdefault("planner", AStarPlanner(warehouse_map.nodes, warehouse_map.edges, heuristic="manhattan"))
+
+        engine = cls(warehouse_map.nodes, warehouse_map.edges, robots, **kwargs)
+        engine.randomize_robots()
+        return engine
+
+    def robot_speed(self, robot: Robot) -> float:
+        """Distance the robot travels in one tick."""
+        return self.speed if self.speed is not None else robot.robot_speed
+
+    def place_robot(self, robot: Robot, node: Any):
+        """Put a robot on a node without giving it a path."""
+        robot.current_node = node
+        robot.current_pose = self.nodes[node]
+        # The node index, reservation table and task assigner count the robot on its node
+        for listener in robot.path_listeners:
+            listener.on_path_changed(robot)
+
+    def randomize_robots(self):
+        """Give every robot a random priority, battery level, start node and goal."""
+        node_ids = list(self.nodes.keys())
+
+        for robot in self.robots:
+            robot.update_priority(self.rng.randint(1, 10))
+            robot.update_battery_level(self.rng.randint(50, 100))
+
+            self.place_robot(robot, self.rng.choice(node_ids))
+            self.task_assigner.request(robot)
+
+        # Matching strategies assign the whole fleet at once
+        self.task_assigner.assign()
+
+        if self.batch_motion is not None:
+            self.batch_motion.sync_all()
+
+    def reset(self):
+        """Move every robot to a new random node and give it a new goal."""
+        node_ids = list(self.nodes.keys())
+
+        self.task_assigner.cancel_requests()
+        for robot in self.robots:
+            robot.reset_robot()
+            self.place_robot(robot, self.rng.choice(node_ids))
+            self.task_assigner.request(robot)
+        self.task_assigner.assign()
+
+        self.clear_waits()
+        if self.batch_motion is not None:
+            self.batch_motion.sync_all()
+
+    def restart(self):
+        """Send every robot back to the start of its current path."""
+        for robot in self.robots:
+            if robot.full_path:
+                robot.handle_path(list(robot.full_path))
+                robot.current_pose = self.nodes[robot.current_node]
+                robot.waiting = False
+
+        self.task_assigner.cancel_requests()
+        self.clear_waits()
+        if self.batch_motion is not None:
+            self.batch_motion.sync_all()
+
+    def clear_waits(self):
+        """Forget the wait-for graph after robots were moved by hand."""
+        self.conflict_resolver.wait_for_graph.clear()
+        self.conflict_resolver.pop_deadlocks()
+
+    def make_decision(self, robot: Robot, robots: List[Robot]) -> str:
+        """
+        Find conflicts for a robot and decide whether it may move on.
+
+        Args:
+            robot: Robot to decide for
+            robots: Robots that can be in conflict with it
+
+        Returns:
+            Decision (FORWARD or WAIT)
+        """
+        self.decisions += 1
+        conflicts = self.conflict_detector.find_conflicts(robot, robots)
+        decision = self.conflict_resolver.handle_conflicts(conflicts, robot)
+        self.break_deadlocks()
+        return decision
+
+    def break_deadlocks(self):
+        """Apply the deadlock policy to every robot the resolver found deadlocked."""
+        deadlocked = self.conflict_resolver.pop_deadlocks()
+        if self.deadlock_policy is None or not self.edges:
+            return
+
+        for robot, cycle in deadlocked.items():
+            if self.break_deadlock(robot, cycle):
+                self.deadlocks_broken += 1
+                self.conflict_resolver.wait_for_graph.clear_wait(robot)
+
+    def break_deadlock(self, robot: Robot, cycle: List[Robot]) -> bool:
+        """
+        Give a deadlocked robot a new path according to the deadlock policy.
+
+        Args:
+            robot: Robot that gives way, it must be standing on a node
+            cycle: Robots in the wait-for cycle, including robot
+
+        Returns:
+            True if the robot got a new path, False if the policy found no way out
+        """
+        current = robot.current_node
+        goal = robot.full_path[-1]
+        others = [r for r in cycle if r is not robot]
+        occupied = {r.current_node for r in self.robots if r is not robot}
+        planner = self.detour_planner()
+
+        path = None
+        if self.deadlock_policy == "reroute":
+            # Plan around the nodes held by the rest of the cycle
+            path = planner.find_path(current, goal, blocked={r.current_node for r in others})
+        elif self.deadlock_policy == "backoff":
+            previous = robot.previous_node
+            if previous is not None and previous not in occupied:
+                if previous in self.edges.get(current, ()):
+                    path = [current] + planner.find_path(previous, goal)
+                else:
+                    # The way back is one-way (e.g. on a warehouse map), step aside instead
+                    path = self.step_aside_path(current, goal, others, occupied)
+        else:
+            path = self.step_aside_path(current, goal, others, occupied)
+
+        if not path or len(path) < 2 or path[-1] != goal:
+            logger.debug("No %s way out of the deadlock for %s", self.deadlock_policy, robot.name)
+            return False
+
+        logger.info("Breaking deadlock: %s %ss", robot.name, self.deadlock_policy)
+        robot.handle_path(path)
+        return True
+
+    def step_aside_path(self, current: Any, goal: Any, others: List[Robot], occupied: Set[Any]) -> Optional[List[Any]]:
+        """
+        Path that steps aside to a free neighbor none of the other robots is heading through.
+
+        Args:
+            current: Node the robot stands on
+            goal: Goal of the robot
+            others: Other robots in the wait-for cycle
+            occupied: Nodes held by the other robots
+
+        Returns:
+            Path from current through the neighbor to the goal, None if no neighbor is free
+        """
+        ahead = {node for r in others if r.remaining_path for node in r.remaining_path}
+        for neighbor in self.edges.get(current, ()):
+            if neighbor not in occupied and neighbor not in ahead:
+                return [current] + self.detour_planner().find_path(neighbor, goal)
+        return None
+
+    def detour_planner(self) -> AStarPlanner:
+        """Planner that supports blocked nodes, the engine's own one if it can."""
+        if isinstance(self.planner, AStarPlanner):
+            return self.planner
+        if self._detour_planner is None:
+            # A routing table only knows the fixed shortest paths
+            self._detour_planner = AStarPlanner(self.nodes, self.edges)
+        return self._detour_planner
+
+    def cooperative_planner(self) -> CooperativePlanner:
+        """Windowed cooperative planner used to replan stuck robots."""
+        if self._cooperative_planner is None:
+            self._cooperative_planner = CooperativePlanner(self.detour_planner(), self.replan_window)
+        return self._cooperative_planner
+
+    def replan_stuck_robots(self) -> int:
+        """
+        Replan every robot whose wait streak just reached a multiple of replan_after.
+
+        The robots are replanned in name order, each around the next steps of
+        all other robots, including the routes given earlier in the batch.
+
+        Returns:
+            Number of robots that got a different route
+        """
+        replan_after = self.replan_after
+        if replan_after is None or not self.edges:
+            return 0
+
+        wait_streaks = self.wait_streaks
+        stuck = [robot for robot in self.robots
+                 if robot.waiting and wait_streaks[robot.name] % replan_after == 0]
+        if not stuck:
+            return 0
+
+        planner = self.cooperative_planner()
+        planner.reserve_robots(self.robots)
+
+        replanned = 0
+        for robot in sorted(stuck, key=lambda r: r.name):
+            current_route = [robot.current_node, *robot.remaining_path]
+            goal = current_route[-1]
+
+            planner.release(robot)
+            path = planner.find_path(robot, goal)
+            if path and len(path) > 1 and path != current_route:
+                logger.debug("Replanning %s after %d waits", robot.name, wait_streaks[robot.name])
+                robot.handle_path(path)
+                replanned += 1
+            planner.reserve(robot)
+
+        self.replans += replanned
+        return replanned
+
+    def move_robot(self, robot: Robot):
+        """Advance a robot towards its next node by one tick of travel."""
+        if robot.next_node is None or robot.waiting:
+            return
+
+        x, y = robot.current_pose
+        target_x, target_y = self.nodes[robot.next_node]
+        dx, dy = target_x - x, target_y - y
+        distance = math.hypot(dx, dy)
+
+        if distance != 0:
+            speed = self.robot_speed(robot)
+
+            if distance <= speed:
+                robot.move_forward()
+                robot.current_pose = self.nodes[robot.current_node]
+                if robot.next_node is None:
+                    self.goals_completed += 1
+            else:
+                robot.current_pose = (x + dx / distance * speed, y + dy / distance * speed)
+
+    def regoal_robot(self, robot: Robot):
+        """
+        Ask the task assigner for a new goal for a robot that reached its goal.
+
+        A robot whose request failed (e.g. its goal can't be reached past
+        one-way cells) asks again every tick, with or without a path.
+        """
+        if not self.auto_goal or robot.current_node is None:
+            return
+        if not robot.full_path or robot.current_pose == self.nodes[robot.full_path[-1]]:
+            self.task_assigner.request(robot)
+
+    def prepare_robot(self, robot: Robot, robots: List[Robot]) -> bool:
+        """
+        Re-goal a robot and decide whether it moves this tick.
+
+        Args:
+            robot: Robot to prepare
+            robots: Robots with a path, used for conflict detection
+
+        Returns:
+            True if the robot should move, False if it waits or has nowhere to go
+        """
+        self.regoal_robot(robot)
+
+        if robot.next_node is None:
+            return False
+
+        # Robots only make decisions when they are standing on a node
+        if robot.current_pose == self.nodes[robot.current_node]:
+            decision = self.make_decision(robot, robots)
+            if decision != Decision.FORWARD.value:
+                robot.waiting = True
+                return False
+            robot.waiting = False
+
+        return True
+
+    def prepare_fleet(self) -> List[bool]:
+        """
+        Re-goal every robot, then decide for all robots on a node in one batch.
+
+        Returns:
+            One flag per robot, True if it should move this tick
+        """
+        for robot in self.robots:
+            self.regoal_robot(robot)
+
+        deciding = [robot for robot in self.robots
+                    if robot.next_node is not None and robot.current_pose == self.nodes[robot.current_node]]
+        decisions = self.conflict_resolver.decide_all(self.robots, deciding)
+        self.decisions += len(deciding)
+        self.break_deadlocks()
+
+        moving = []
+        for robot in self.robots:
+            decision = decisions.get(robot.name)
+            if robot.next_node is None:
+                moving.append(False)
+            elif decision is None:
+                # Between nodes, keep going
+                moving.append(True)
+            else:
+                robot.waiting = decision != Decision.FORWARD.value
+                moving.append(not robot.waiting)
+
+        return moving
+
+    def update_robot(self, robot: Robot, robots: List[Robot]):
+        """
+        Run one tick for a single robot: re-goal, decide and move.
+
+        Args:
+            robot: Robot to update
+            robots: Robots with a path, used for conflict detection
+        """
+        if self.prepare_robot(robot, robots):
+            self.move_robot(robot)
+
+    def step(self):
+        """Advance the simulation by one tick."""
+        if self.batch_decisions:
+            moving = self.prepare_fleet()
+        else:
+            robots = [robot for robot in self.robots if robot.full_path]
+
+            if self.batch_motion is None:
+                # Sequential mode: each robot sees the moves made before it this tick
+                for robot in self.robots:
+                    self.update_robot(robot, robots)
+                self.end_tick()
+                return
+
+            moving = [self.prepare_robot(robot, robots) for robot in self.robots]
+
+        if self.batch_motion is None:
+            for robot, robot_moves in zip(self.robots, moving):
+                if robot_moves:
+                    self.move_robot(robot)
+        else:
+            arrived = self.batch_motion.advance(moving)
+            self.goals_completed += sum(1 for robot in arrived if robot.next_node is None)
+
+        self.end_tick()
+
+    def end_tick(self):
+        """Update the waiting metrics, replan stuck robots and advance the tick counter."""
+        wait_streaks = self.wait_streaks
+        for robot in self.robots:
+            if robot.waiting:
+                self.wait_ticks += 1
+                wait_streaks[robot.name] = wait_streaks.get(robot.name, 0) + 1
+            else:
+                wait_streaks[robot.name] = 0
+
+        self.replan_stuck_robots()
+        self.conflict_resolver.wait_for_graph.compact()
+        self.task_assigner.assign()
+        self.tick += 1
+
+        for listener in self.tick_listeners:
+            listener.on_tick(self, 1)
+
+    def stuck_robots(self, min_wait_ticks: int) -> List[Robot]:
+        """
+        Robots that have been waiting for at least the given number of ticks.
+
+        Args:
+            min_wait_ticks: Consecutive waiting ticks that count as stuck
+
+        Returns:
+            List of stuck robots
+        """
+        return [robot for robot in self.robots if self.wait_streaks.get(robot.name, 0) >= min_wait_ticks]
+
+    def run(self, ticks: int):
+        """
+        Advance the simulation by a number of ticks.
+
+        Args:
+            ticks: Number of ticks to simulate
+        """
+        for _ in range(ticks):
+            self.step()
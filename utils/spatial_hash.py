@@ -0,0 +1,169 @@
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# (min_x, min_y, max_x, max_y)
+Bounds = Tuple[float, float, float, float]
+
+
+def segment_crosses_rect(a: Sequence[float], b: Sequence[float], rect: Sequence[float]) -> bool:
+    """
+    Check whether a segment passes through the inside of a rectangle.
+
+    Segments that only touch the border (e.g. an aisle running along a shelf)
+    don't count as crossing it.
+
+    Args:
+        a: Start point of the segment
+        b: End point of the segment
+        rect: Rectangle as (x, y, width, height), e.g. a pygame.Rect
+
+    Returns:
+        True if part of the segment lies strictly inside the rectangle
+    """
+    x, y, width, height = rect[0], rect[1], rect[2], rect[3]
+    dx, dy = b[0] - a[0], b[1] - a[1]
+
+    # Liang-Barsky: clip the segment's parameter range to the rectangle's slabs
+    t_enter, t_exit = 0.0, 1.0
+    for delta, start, low, high in ((dx, a[0], x, x + width), (dy, a[1], y, y + height)):
+        if delta == 0:
+            if not low < start < high:
+                return False
+            continue
+        t_low, t_high = (low - start) / delta, (high - start) / delta
+        if t_low > t_high:
+            t_low, t_high = t_high, t_low
+        t_enter, t_exit = max(t_enter, t_low), min(t_exit, t_high)
+        if t_enter >= t_exit:
+            return False
+
+    # The clipped part may still run along the border; its middle can't
+    t = (t_enter + t_exit) / 2
+    mid_x, mid_y = a[0] + t * dx, a[1] + t * dy
+    return x < mid_x < x + width and y < mid_y < y + height
+
+
+class SpatialHash:
+    """
+    Uniform-grid spatial hash of points and rectangles.
+
+    Every item is stored in each grid cell its bounds overlap, so a query
+    only looks at the items in the cells it covers instead of scanning all
+    of them. With a cell size close to the typical query size, picking and
+    range queries cost O(1) regardless of how many items there are.
+    """
+
+    def __init__(self, cell_size: float):
+        """
+        Initialize an empty hash.
+
+        Args:
+            cell_size: Side length of the grid cells
+        """
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int], List[Any]] = {}
+        self.bounds: Dict[Any, Bounds] = {}
+
+    def __len__(self) -> int:
+        return len(self.bounds)
+
+    def __contains__(self, item: Any) -> bool:
+        return item in self.bounds
+
+    def _cell_keys(self, bounds: Bounds):
+        size = self.cell_size
+        for cx in range(math.floor(bounds[0] / size), math.floor(bounds[2] / size) + 1):
+            for cy in range(math.floor(bounds[1] / size), math.floor(bounds[3] / size) + 1):
+                yield cx, cy
+
+    def insert(self, item: Any, bounds: Bounds):
+        """
+        Add an item, or move it if it is already stored.
+
+        Args:
+            item: Hashable item, e.g. a node id
+            bounds: Item bounds as (min_x, min_y, max_x, max_y)
+        """
+        if item in self.bounds:
+            self.remove(item)
+        self.bounds[item] = bounds
+        for key in self._cell_keys(bounds):
+            self.cells.setdefault(key, []).append(item)
+
+    def insert_point(self, item: Any, pos: Sequence[float]):
+        """Add an item at a point."""
+        self.insert(item, (pos[0], pos[1], pos[0], pos[1]))
+
+    def insert_rect(self, item: Any, rect: Sequence[float]):
+        """Add an item covering a rectangle given as (x, y, width, height)."""
+        self.insert(item, (rect[0], rect[1], rect[0] + rect[2], rect[1] + rect[3]))
+
+    def remove(self, item: Any):
+        """Remove an item; unknown items are ignored."""
+        bounds = self.bounds.pop(item, None)
+        if bounds is None:
+            return
+        for key in self._cell_keys(bounds):
+            cell = self.cells[key]
+            cell.remove(item)
+            if not cell:
+                del self.cells[key]
+
+    def clear(self):
+        """Remove every item."""
+        self.cells.clear()
+        self.bounds.clear()
+
+    def query(self, bounds: Bounds) -> List[Any]:
+        """
+        Find the items whose bounds overlap an area (borders included).
+
+        Args:
+            bounds: Area as (min_x, min_y, max_x, max_y)
+
+        Returns:
+            Overlapping items, each once
+        """
+        min_x, min_y, max_x, max_y = bounds
+        found = []
+        seen = set()
+        for key in self._cell_keys(bounds):
+            for item in self.cells.get(key, ()):
+                if item in seen:
+                    continue
+                seen.add(item)
+                b = self.bounds[item]
+                if b[0] <= max_x and b[2] >= min_x and b[1] <= max_y and b[3] >= min_y:
+                    found.append(item)
+        return found
+
+    def within(self, pos: Sequence[float], radius: float) -> List[Any]:
+        """Items whose bounds come within a distance of a point."""
+        x, y = pos[0], pos[1]
+        return [item for item in self.query((x - radius, y - radius, x + radius, y + radius))
+                if self.distance(item, pos) <= radius]
+
+    def nearest(self, pos: Sequence[float], radius: float) -> Optional[Any]:
+        """
+        Find the item closest to a point.
+
+        Args:
+            pos: Point to search around
+            radius: Largest distance to look at
+
+        Returns:
+            Closest item within the radius, None if there is none
+        """
+        best, best_distance = None, radius
+        for item in self.within(pos, radius):
+            distance = self.distance(item, pos)
+            if best is None or distance < best_distance:
+                best, best_distance = item, distance
+        return best
+
+    def distance(self, item: Any, pos: Sequence[float]) -> float:
+        """Distance from a point to an item's bounds (0 inside them)."""
+        min_x, min_y, max_x, max_y = self.bounds[item]
+        dx = max(min_x - pos[0], 0.0, pos[0] - max_x)
+        dy = max(min_y - pos[1], 0.0, pos[1] - max_y)
+        return math.hypot(dx, dy)
@@ -0,0 +1,362 @@
+import heapq
+import math
+import random
+from typing import Any, Dict, Iterable, List, Optional
+from utils.base_robot import Robot
+from utils.sim_logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def greedy_match(cost: List[List[float]]) -> List[Optional[int]]:
+    """
+    Match rows to columns by repeatedly taking the cheapest remaining pair.
+
+    Args:
+        cost: Cost matrix, one row per robot and one column per task
+
+    Returns:
+        Column matched to each row, None where only unreachable (inf) pairs were left
+    """
+    pairs = sorted((c, row, column) for row, costs in enumerate(cost)
+                   for column, c in enumerate(costs) if c != math.inf)
+    match: List[Optional[int]] = [None] * len(cost)
+    taken = set()
+    for _, row, column in pairs:
+        if match[row] is None and column not in taken:
+            match[row] = column
+            taken.add(column)
+    return match
+
+
+def hungarian_match(cost: List[List[float]]) -> List[Optional[int]]:
+    """
+    Minimum total cost matching of rows to columns (Hungarian algorithm).
+
+    Runs in O(rows^2 * columns), so it is meant for small batches.
+
+    Args:
+        cost: Cost matrix with at most as many rows as columns
+
+    Returns:
+        Column matched to each row, None where the pair is unreachable (inf)
+    """
+    rows = len(cost)
+    columns = len(cost[0]) if rows else 0
+    if rows > columns:
+        raise ValueError("Hungarian matching needs at least as many columns as rows")
+
+    # Unreachable pairs get a cost no complete matching of reachable pairs can reach
+    finite = [c for costs in cost for c in costs if c != math.inf]
+    unreachable = (max(finite, default=0.0) + 1) * (rows + 1)
+    cost = [[c if c != math.inf else unreachable for c in costs] for costs in cost]
+
+    # Potentials and matching over 1-based indexes; column 0 is a virtual start
+    u = [0.0] * (rows + 1)
+    v = [0.0] * (columns + 1)
+    row_of = [0] * (columns + 1)
+    way = [0] * (columns + 1)
+
+    for row in range(1, rows + 1):
+        row_of[0] = row
+        column = 0
+        min_slack = [math.inf] * (columns + 1)
+        used = [False] * (columns + 1)
+        while True:
+            used[column] = True
+            current_row = row_of[column]
+            delta, next_column = math.inf, 0
+            for j in range(1, columns + 1):
+                if used[j]:
+                    continue
+                slack = cost[current_row - 1][j - 1] - u[current_row] - v[j]
+                if slack < min_slack[j]:
+                    min_slack[j] = slack
+                    way[j] = column
+                if min_slack[j] < delta:
+                    delta, next_column = min_slack[j], j
+            for j in range(columns + 1):
+                if used[j]:
+                    u[row_of[j]] += delta
+                    v[j] -= delta
+                else:
+                    min_slack[j] -= delta
+            column = next_column
+            if row_of[column] == 0:
+                break
+
+        # Flip the augmenting path
+        while column:
+            previous = way[column]
+            row_of[column] = row_of[previous]
+            column = previous
+
+    match: List[Optional[int]] = [None] * rows
+    for column in range(1, columns + 1):
+        row = row_of[column]
+        if row and cost[row - 1][column - 1] != unreachable:
+            match[row - 1] = column - 1
+    return match
+
+
+class TaskAssigner:
+    """
+    Hands out goals to robots, keeping the set of free nodes incrementally.
+
+    Node occupancy is tracked through the robots' path listeners, and the
+    free nodes are kept in a list with a position index, so taking a node
+    out, putting it back and drawing a random free node are all O(1) instead
+    of rebuilding a set of every node on each new goal.
+
+    With the "random" strategy a robot gets a random free node as soon as it
+    asks. The "greedy" and "hungarian" strategies queue the requests of a
+    tick and assign them together in assign(). They match the waiting robots
+    to a pool of open tasks (random free nodes, topped up to pool_size) by
+    path distance. Greedy repeatedly takes the nearest robot/task pair.
+    Hungarian minimizes the total distance of the batch and falls back to
+    greedy for batches over HUNGARIAN_LIMIT robots.
+    """
+
+    STRATEGIES = ("random", "greedy", "hungarian")
+    HUNGARIAN_LIMIT = 32
+
+    def __init__(
+        self,
+        nodes: Dict[Any, Any],
+        planner: Any,
+        robots: Iterable[Robot] = (),
+        rng: Optional[random.Random] = None,
+        strategy: str = "random",
+        pool_size: Optional[int] = None
+    ):
+        """
+        Initialize the assigner and start tracking robots.
+
+        Args:
+            nodes: Mapping of node ids to positions
+            planner: Planner used for paths (find_path) and path distances
+                (distance() if it has one, e.g. RoutingTable, otherwise a
+                search over its edges and edge_cost)
+            robots: Robots to track
+            rng: Random number generator for new tasks
+            strategy: "random", "greedy" or "hungarian"
+            pool_size: Open tasks kept for matching, defaults to the number of robots
+        """
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown assignment strategy '{strategy}'")
+        self.planner = planner
+        self.rng = rng or random.Random()
+        self.strategy = strategy
+
+        # Free nodes, with the position of each in the list for O(1) removal
+        self.free: List[Any] = list(nodes)
+        self.free_position: Dict[Any, int] = {node: i for i, node in enumerate(self.free)}
+
+        # node -> robots standing on it, robot -> node it is counted on
+        self.occupancy: Dict[Any, int] = {}
+        self.robot_nodes: Dict[Robot, Any] = {}
+
+        # Robots waiting for a goal (dict keeps request order) and open task nodes
+        self.pending: Dict[Robot, None] = {}
+        self.tasks: List[Any] = []
+
+        robots = list(robots)
+        for robot in robots:
+            self.add_robot(robot)
+        self.pool_size = pool_size if pool_size is not None else len(robots)
+
+        self.assigned = 0
+
+    def add_robot(self, robot: Robot):
+        """Start tracking a robot's node."""
+        if robot in self.robot_nodes:
+            return
+        self.robot_nodes[robot] = None
+        robot.add_path_listener(self)
+        self.update_robot(robot)
+
+    def remove_robot(self, robot: Robot):
+        """Stop tracking a robot and free its node."""
+        if robot not in self.robot_nodes:
+            return
+        self._release(self.robot_nodes.pop(robot))
+        self.pending.pop(robot, None)
+        robot.remove_path_listener(self)
+
+    def on_path_changed(self, robot: Robot):
+        self.update_robot(robot)
+
+    def on_advance(self, robot: Robot, departed_node: Any):
+        self.update_robot(robot)
+
+    def update_robot(self, robot: Robot):
+        """Count a robot on its current node, e.g. after it was placed by hand."""
+        node = robot.current_node
+        previous = self.robot_nodes.get(robot)
+        if node == previous:
+            return
+        self._release(previous)
+        self.robot_nodes[robot] = node
+        if node is not None:
+            self.occupancy[node] = self.occupancy.get(node, 0) + 1
+            if node in self.free_position:
+                # Swap with the last free node and pop
+                i = self.free_position.pop(node)
+                last = self.free.pop()
+                if last != node:
+                    self.free[i] = last
+                    self.free_position[last] = i
+
+    def _release(self, node: Any):
+        if node is None:
+            return
+        count = self.occupancy[node] - 1
+        if count:
+            self.occupancy[node] = count
+            return
+        del self.occupancy[node]
+        self.free_position[node] = len(self.free)
+        self.free.append(node)
+
+    def is_free(self, node: Any) -> bool:
+        """True if no robot stands on the node."""
+        return node in self.free_position
+
+    def random_free_node(self) -> Optional[Any]:
+        """Random node no robot stands on, None if every node is taken."""
+        return self.rng.choice(self.free) if self.free else None
+
+    def assign_random(self, robot: Robot) -> bool:
+        """
+        Send a robot to a random free node right away.
+
+        Args:
+            robot: Robot that needs a new goal
+
+        Returns:
+            True if a new path was assigned, False otherwise
+        """
+        goal = self.random_free_node()
+        if goal is None or robot.current_node is None:
+            return False
+        return self._send(robot, goal)
+
+    def request(self, robot: Robot):
+        """
+        Ask for a new goal for a robot.
+
+        The random strategy answers at once; the matching strategies queue the
+        robot until the next assign().
+        """
+        if self.strategy == "random":
+            self.assign_random(robot)
+        else:
+            self.pending[robot] = None
+
+    def cancel_requests(self):
+        """Forget the queued robots, e.g. after the fleet was reset by hand."""
+        self.pending.clear()
+
+    def assign(self) -> int:
+        """
+        Match every queued robot to an open task.
+
+        Returns:
+            Number of robots that got a new path; the others stay queued
+        """
+        robots = [robot for robot in self.pending if robot.current_node is not None]
+        if not robots:
+            return 0
+
+        # Top the pool up with random free nodes (a few draws may hit open tasks)
+        wanted = max(self.pool_size, len(robots)) - len(self.tasks)
+        if wanted > 0 and self.free:
+            open_tasks = set(self.tasks)
+            for _ in range(4 * wanted):
+                node = self.rng.choice(self.free)
+                if node not in open_tasks:
+                    open_tasks.add(node)
+                    self.tasks.append(node)
+                    wanted -= 1
+                    if not wanted:
+                        break
+
+        # Tasks on a node a robot stands on wait until it is free again
+        tasks = [node for node in self.tasks if self.is_free(node)]
+        if not tasks:
+            return 0
+
+        hungarian = self.strategy == "hungarian" and len(robots) <= min(self.HUNGARIAN_LIMIT, len(tasks))
+
+        # Both matchers give every robot one of its len(robots) nearest tasks:
+        # at most len(robots) - 1 of them go to other robots, and swapping a
+        # farther task for a free nearer one never costs more. So each search
+        # stops after that many tasks.
+        cost = []
+        for robot in robots:
+            distances = self.path_distances(robot.current_node, tasks, len(robots))
+            cost.append([distances[task] for task in tasks])
+
+        match = hungarian_match(cost) if hungarian else greedy_match(cost)
+
+        assigned = 0
+        for robot, column in zip(robots, match):
+            if column is None:
+                continue
+            task = tasks[column]
+            if self._send(robot, task):
+                self.tasks.remove(task)
+                assigned += 1
+
+        logger.debug("Assigned %d of %d queued robots", assigned, len(self.pending))
+        return assigned
+
+    def _send(self, robot: Robot, goal: Any) -> bool:
+        path = self.planner.find_path(robot.current_node, goal)
+        if not path:
+            return False
+        robot.handle_path(path)
+        self.pending.pop(robot, None)
+        self.assigned += 1
+        return True
+
+    def path_distances(self, start: Any, goals: List[Any], nearest: Optional[int] = None) -> Dict[Any, float]:
+        """
+        Path distance from a node to each of several goals.
+
+        Args:
+            start: Start node id
+            goals: Goal node ids
+            nearest: Only find this many of the nearest goals, the rest count as unreachable
+
+        Returns:
+            Distance to every goal, inf for unreachable ones
+        """
+        planner = self.planner
+        if hasattr(planner, "distance"):
+            return {goal: planner.distance(start, goal) for goal in goals}
+
+        # Dijkstra from the start until every goal is settled
+        edges = planner.edges
+        edge_cost = planner.edge_cost
+        remaining = set(goals)
+        found = {}
+        best = {start: 0.0}
+        heap = [(0.0, start)]
+        wanted = len(remaining) if nearest is None else min(nearest, len(remaining))
+        while heap and len(found) < wanted:
+            distance, node = heapq.heappop(heap)
+            if distance > best[node]:
+                continue
+            if node in remaining:
+                remaining.discard(node)
+                found[node] = distance
+            for neighbor in edges[node]:
+                candidate = distance + edge_cost(node, neighbor)
+                if candidate < best.get(neighbor, math.inf):
+                    best[neighbor] = candidate
+                    heapq.heappush(heap, (candidate, neighbor))
+
+        for goal in remaining:
+            found[goal] = math.inf
+        return found
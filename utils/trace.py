@@ -0,0 +1,205 @@
+import json
+import mmap
+import struct
+from typing import Any, Dict, List, Tuple
+
+TRACE_MAGIC = b"FMSTRACE"
+TRACE_VERSION = 1
+
+# Magic, format version, header length
+PREAMBLE = struct.Struct("<8sHI")
+
+# One record per robot per tick: x, y, current node index, next node index, decision
+RECORD = struct.Struct("<ffIIB")
+
+NO_NODE = 0xFFFFFFFF
+
+# Decision codes stored in each record
+IDLE, FORWARD, WAIT = 0, 1, 2
+DECISION_NAMES = {IDLE: "IDLE", FORWARD: "FORWARD", WAIT: "WAIT"}
+
+
+class TraceWriter:
+    """
+    Append-only recorder of every tick of a simulation.
+
+    The file starts with a JSON header holding the map and the robot names,
+    followed by one frame per tick. A frame is a fixed-size record per robot
+    (pose, current and next node as indexes into the header's node list, and
+    the decision), so frame i starts at a known offset. Frames are packed into
+    a preallocated buffer and written in batches.
+
+    The writer is a tick listener of the engine: every tick appends a frame.
+    """
+
+    def __init__(self, engine: Any, path: str, batch_ticks: int = 256):
+        """
+        Open the trace, write the header and the frame of the current tick.
+
+        Args:
+            engine: SimulationEngine to record
+            path: Trace file to create
+            batch_ticks: Frames buffered before they are written
+        """
+        self.engine = engine
+        self.robots = list(engine.robots)
+        self.node_ids = list(engine.nodes)
+        self.node_index = {node: i for i, node in enumerate(self.node_ids)}
+
+        header = {
+            "version": TRACE_VERSION,
+            "record_format": RECORD.format,
+            "first_tick": engine.tick,
+            "robots": [robot.name for robot in self.robots],
+            "nodes": [[node, *engine.nodes[node]] for node in self.node_ids],
+            "edges": [[node, list(neighbors)] for node, neighbors in engine.edges.items()]
+        }
+        header_bytes = json.dumps(header).encode()
+
+        self.file = open(path, "wb")
+        self.file.write(PREAMBLE.pack(TRACE_MAGIC, TRACE_VERSION, len(header_bytes)))
+        self.file.write(header_bytes)
+
+        self.frame_size = RECORD.size * len(self.robots)
+        self.buffer = bytearray(self.frame_size * batch_ticks)
+        self.buffered = 0
+        self.batch_ticks = batch_ticks
+        self.frames = 0
+        self.sync_poses = getattr(engine, "sync_poses", None)
+
+        self.write_frame()
+        engine.tick_listeners.append(self)
+
+    def on_tick(self, engine: Any, ticks: int):
+        if self.sync_poses is None:
+            self.write_frame()
+            return
+
+        # The event-driven engine moves travelling robots lazily and reports
+        # skipped ticks in bulk, so each tick's poses are recreated first
+        for tick in range(engine.tick - ticks + 1, engine.tick + 1):
+            self.sync_poses(tick)
+            self.write_frame()
+
+    def write_frame(self):
+        """Append the current state of every robot."""
+        node_index = self.node_index
+        offset = self.buffered * self.frame_size
+        pack_into = RECORD.pack_into
+
+        for robot in self.robots:
+            pose = robot.current_pose
+            if pose is None:
+                pose = (float("nan"), float("nan"))
+
+            if robot.next_node is None:
+                decision = IDLE
+            elif robot.waiting:
+                decision = WAIT
+            else:
+                decision = FORWARD
+
+            pack_into(self.buffer, offset, pose[0], pose[1],
+                      node_index.get(robot.current_node, NO_NODE),
+                      node_index.get(robot.next_node, NO_NODE), decision)
+            offset += RECORD.size
+
+        self.buffered += 1
+        self.frames += 1
+        if self.buffered == self.batch_ticks:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered frames to the file."""
+        if self.buffered:
+            self.file.write(memoryview(self.buffer)[:self.buffered * self.frame_size])
+            self.file.flush()
+            self.buffered = 0
+
+    def close(self):
+        """Write the remaining frames, close the file and detach from the engine."""
+        self.flush()
+        self.file.close()
+        self.engine.tick_listeners.remove(self)
+
+
+class TraceReader:
+    """
+    Memory-mapped reader of a trace written by TraceWriter.
+
+    Frames have a fixed size, so seeking to any tick is an offset
+    computation; only the frames that are read are paged in. A frame cut
+    short by a crash at the end of the file is ignored.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open a trace and read its header.
+
+        Args:
+            path: Trace file
+        """
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, header_length = PREAMBLE.unpack_from(self.map, 0)
+        if magic != TRACE_MAGIC:
+            raise ValueError(f"{path} is not a trace file")
+        if version > TRACE_VERSION:
+            raise ValueError(f"Unsupported trace version {version}")
+
+        header = json.loads(self.map[PREAMBLE.size:PREAMBLE.size + header_length])
+        self.header = header
+        self.first_tick = header["first_tick"]
+        self.robot_names: List[str] = header["robots"]
+        self.node_ids = [node for node, _, _ in header["nodes"]]
+        self.nodes: Dict[Any, Tuple[float, float]] = {node: (x, y) for node, x, y in header["nodes"]}
+        self.edges: Dict[Any, List[Any]] = {node: neighbors for node, neighbors in header["edges"]}
+
+        self.record = struct.Struct(header["record_format"])
+        self.data_start = PREAMBLE.size + header_length
+        self.frame_size = self.record.size * len(self.robot_names)
+
+    def __len__(self) -> int:
+        """Number of complete frames in the file."""
+        if not self.frame_size:
+            return 0
+        return (len(self.map) - self.data_start) // self.frame_size
+
+    @property
+    def last_tick(self) -> int:
+        return self.first_tick + len(self) - 1
+
+    def frame(self, tick: int) -> List[Dict[str, Any]]:
+        """
+        Read the state of every robot at a tick.
+
+        Args:
+            tick: Simulation tick, between first_tick and last_tick
+
+        Returns:
+            One dictionary per robot with name, pose, current_node, next_node and decision
+        """
+        index = tick - self.first_tick
+        if not 0 <= index < len(self):
+            raise IndexError(f"Tick {tick} is not in the trace ({self.first_tick}-{self.last_tick})")
+
+        offset = self.data_start + index * self.frame_size
+        node_ids = self.node_ids
+        robots = []
+        for name, (x, y, current, following, decision) in zip(
+            self.robot_names, self.record.iter_unpack(self.map[offset:offset + self.frame_size])
+        ):
+            robots.append({
+                "name": name,
+                "pose": None if x != x else (x, y),  # NaN marks an unplaced robot
+                "current_node": node_ids[current] if current != NO_NODE else None,
+                "next_node": node_ids[following] if following != NO_NODE else None,
+                "decision": DECISION_NAMES[decision]
+            })
+        return robots
+
+    def close(self):
+        """Unmap and close the file."""
+        self.map.close()
+        self.file.close()
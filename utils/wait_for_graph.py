@@ -0,0 +1,150 @@
+import time
+from typing import Callable, Dict, List, Optional
+from utils.base_robot import Robot
+
+
+class WaitForGraph:
+    """
+    Incremental graph of which robot is waiting on which.
+
+    A waiting robot has exactly one out-edge, to the robot its WAIT decision
+    was made for, so every component is either a tree leading to one robot
+    that is not waiting, or a single cycle: a deadlock. Components are kept in
+    a union-find forest. Adding an edge from a robot (always the root of its
+    own tree, since it has no out-edge yet) closes a cycle exactly when the
+    robot it waits on is in the same component, so detection costs near
+    constant amortized time. Removing an edge cannot be undone in union-find;
+    it marks the forest stale and cycles are found by walking the chain until
+    compact() rebuilds the forest. Waiting robots re-decide every tick, so one
+    rebuild per tick is paid for by that tick's updates.
+    """
+
+    def __init__(self, clock: Optional[Callable[[], float]] = None):
+        """
+        Initialize an empty graph.
+
+        Args:
+            clock: Function returning the current time, used for deadlock
+                durations; defaults to time.perf_counter
+        """
+        self.clock = clock or time.perf_counter
+
+        # waiting robot -> robot it waits on
+        self.waits_on: Dict[Robot, Robot] = {}
+        self._parent: Dict[Robot, Robot] = {}
+        self._stale = False
+
+        # robot -> (members, start time) of the deadlock it belongs to
+        self.active_cycles: Dict[Robot, tuple] = {}
+
+        # Metrics
+        self.deadlocks_detected = 0
+        self.durations: List[float] = []
+
+    def set_wait(self, robot: Robot, blocker: Robot) -> Optional[List[Robot]]:
+        """
+        Record that a robot waits on another one.
+
+        Args:
+            robot: Waiting robot
+            blocker: Robot it waits on
+
+        Returns:
+            Members of the cycle if this edge closed one, None otherwise
+        """
+        if self.waits_on.get(robot) is blocker:
+            return None
+        self.clear_wait(robot)
+
+        if self._stale:
+            closes_cycle = self._reaches(blocker, robot)
+        else:
+            closes_cycle = self._find(blocker) is self._find(robot)
+
+        self.waits_on[robot] = blocker
+        if not closes_cycle:
+            if not self._stale:
+                self._parent[self._find(robot)] = self._find(blocker)
+            return None
+
+        cycle = [robot]
+        member = blocker
+        while member is not robot:
+            cycle.append(member)
+            member = self.waits_on[member]
+
+        entry = (cycle, self.clock())
+        for member in cycle:
+            self.active_cycles[member] = entry
+        self.deadlocks_detected += 1
+        return cycle
+
+    def clear_wait(self, robot: Robot):
+        """Remove a robot's out-edge, ending the deadlock it was part of."""
+        if self.waits_on.pop(robot, None) is None:
+            return
+        self._stale = True
+
+        entry = self.active_cycles.get(robot)
+        if entry is not None:
+            cycle, start = entry
+            for member in cycle:
+                del self.active_cycles[member]
+            self.durations.append(self.clock() - start)
+
+    def cycle_of(self, robot: Robot) -> Optional[List[Robot]]:
+        """Members of the deadlock a robot is part of, None if it is not deadlocked."""
+        entry = self.active_cycles.get(robot)
+        return entry[0] if entry is not None else None
+
+    def compact(self):
+        """Rebuild the union-find forest after edges were removed."""
+        if not self._stale:
+            return
+        self._parent = {}
+        self._stale = False
+        for robot, blocker in self.waits_on.items():
+            root, blocker_root = self._find(robot), self._find(blocker)
+            if root is not blocker_root:
+                self._parent[root] = blocker_root
+
+    def clear(self):
+        """Forget every edge; metrics of finished deadlocks are kept."""
+        for robot in list(self.waits_on):
+            self.clear_wait(robot)
+        self._parent = {}
+        self._stale = False
+
+    def stats(self) -> Dict[str, float]:
+        """Deadlock counters and durations."""
+        durations = self.durations
+        return {
+            "detected": self.deadlocks_detected,
+            "resolved": len(durations),
+            "active": len({id(entry) for entry in self.active_cycles.values()}),
+            "total_duration": sum(durations),
+            "mean_duration": sum(durations) / len(durations) if durations else 0.0,
+            "max_duration": max(durations, default=0.0)
+        }
+
+    def _find(self, robot: Robot) -> Robot:
+        parent = self._parent
+        root = robot
+        while root in parent:
+            root = parent[root]
+        # Path compression
+        while robot is not root:
+            parent[robot], robot = root, parent[robot]
+        return root
+
+    def _reaches(self, start: Robot, target: Robot) -> bool:
+        # Chain walk used while the forest is stale; ends at a robot that is
+        # not waiting or on a cycle that does not contain target
+        seen = set()
+        robot = start
+        while robot is not None and robot not in seen:
+            if robot is target:
+                return True
+            seen.add(robot)
+            robot = self.waits_on.get(robot)
+        return False
@@ -0,0 +1,238 @@
+import csv
+import os
+from array import array
+from collections.abc import Mapping
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+FREE = "."
+BLOCKED = "#"
+
+# One-way cells can only be left in the direction of their arrow, as (row, column) steps
+ONE_WAY = {">": (0, 1), "<": (0, -1), "v": (1, 0), "^": (-1, 0)}
+ARROWS = list(ONE_WAY)
+
+# Neighbors of a two-way cell: right, left, down, up (the order generate_edges uses)
+DIRECTIONS = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+
+# Spreadsheet exports tend to mark cells with numbers
+CELL_ALIASES = {"": FREE, "0": FREE, "1": BLOCKED, "X": BLOCKED}
+
+# Default spacing between cell centres and border, matching the front-ends' grid
+DEFAULT_CELL_SIZE = 40
+DEFAULT_MARGIN = 50
+
+
+class NodeView(Mapping):
+    """Read-only {node: (x, y)} view over the map's coordinate arrays."""
+
+    def __init__(self, xs: array, ys: array):
+        self.xs = xs
+        self.ys = ys
+
+    def __getitem__(self, node: int) -> Tuple[float, float]:
+        if node.__class__ is not int or not 0 <= node < len(self.xs):
+            raise KeyError(node)
+        return self.xs[node], self.ys[node]
+
+    def __contains__(self, node) -> bool:
+        return node.__class__ is int and 0 <= node < len(self.xs)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(len(self.xs)))
+
+    def __len__(self) -> int:
+        return len(self.xs)
+
+
+class EdgeView(Mapping):
+    """Read-only {node: neighbors} view over the map's CSR adjacency arrays."""
+
+    def __init__(self, offsets: array, targets: array):
+        self.offsets = offsets
+        self.targets = targets
+
+    def __getitem__(self, node: int) -> array:
+        if node.__class__ is not int or not 0 <= node < len(self.offsets) - 1:
+            raise KeyError(node)
+        return self.targets[self.offsets[node]:self.offsets[node + 1]]
+
+    def __contains__(self, node) -> bool:
+        return node.__class__ is int and 0 <= node < len(self.offsets) - 1
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(len(self.offsets) - 1))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+
+class WarehouseMap:
+    """
+    Grid warehouse layout stored as flat arrays.
+
+    Every free cell of the grid becomes a node, numbered 0..n-1 in row-major
+    order. Coordinates live in two float arrays and the adjacency in
+    compressed sparse row (CSR) form: the neighbors of node i are
+    targets[offsets[i]:offsets[i + 1]]. That costs a few bytes per node and
+    edge instead of a dict entry, a tuple and a list per node.
+
+    `nodes` and `edges` are read-only mapping views over the arrays, so the
+    map can be handed to SimulationEngine, AStarPlanner and RoutingTable in
+    place of the usual dicts.
+
+    Map symbols: "." free, "#" blocked, and ">", "<", "v", "^" for one-way
+    cells, which can only be left in the direction of the arrow and never
+    entered against it. CSV maps may also use "" or "0" for free and "1" or
+    "X" for blocked cells.
+    """
+
+    def __init__(
+        self,
+        rows: Sequence[Sequence[str]],
+        cell_size: float = DEFAULT_CELL_SIZE,
+        origin: Tuple[float, float] = (DEFAULT_MARGIN, DEFAULT_MARGIN)
+    ):
+        """
+        Build the map from rows of cell symbols.
+
+        Args:
+            rows: Grid rows, each a string or a list of cell symbols; short rows
+                are padded with blocked cells
+            cell_size: Distance between neighboring cell centres
+            origin: Position of the centre of the top-left cell
+        """
+        self.rows = len(rows)
+        self.cols = max((len(row) for row in rows), default=0)
+        cols = self.cols
+
+        # Grid cell of every node, and node of every cell (-1 if blocked)
+        self.cells = array("i")
+        self.node_of_cell = array("i", [-1]) * (self.rows * cols)
+        arrows = array("b")  # Index into ARROWS, -1 for two-way cells
+
+        for r, row in enumerate(rows):
+            for c, symbol in enumerate(row):
+                symbol = symbol.strip()
+                symbol = CELL_ALIASES.get(symbol, symbol)
+                if symbol == BLOCKED:
+                    continue
+                if symbol != FREE and symbol not in ONE_WAY:
+                    raise ValueError(f"Unknown map symbol '{symbol}' at row {r}, column {c}")
+                self.node_of_cell[r * cols + c] = len(self.cells)
+                self.cells.append(r * cols + c)
+                arrows.append(ARROWS.index(symbol) if symbol in ONE_WAY else -1)
+
+        self.offsets = array("i", [0])
+        self.targets = array("i")
+        node_of_cell = self.node_of_cell
+        steps = [ONE_WAY[arrow] for arrow in ARROWS]
+
+        for node, cell in enumerate(self.cells):
+            r, c = divmod(cell, cols)
+            moves = (steps[arrows[node]],) if arrows[node] >= 0 else DIRECTIONS
+            for dr, dc in moves:
+                nr, nc = r + dr, c + dc
+                if not (0 <= nr < self.rows and 0 <= nc < cols):
+                    continue
+                neighbor = node_of_cell[nr * cols + nc]
+                if neighbor < 0:
+                    continue
+                # Entering a one-way cell whose arrow points back here goes against it
+                if arrows[neighbor] >= 0 and steps[arrows[neighbor]] == (-dr, -dc):
+                    continue
+                self.targets.append(neighbor)
+            self.offsets.append(len(self.targets))
+
+        self.xs = array("d")
+        self.ys = array("d")
+        self.place(cell_size, origin)
+
+        self.nodes = NodeView(self.xs, self.ys)
+        self.edges = EdgeView(self.offsets, self.targets)
+
+    @classmethod
+    def from_text(cls, text: str, **kwargs) -> "WarehouseMap":
+        """
+        Build a map from a text grid, one character per cell.
+
+        Args:
+            text: Grid rows separated by newlines; blank lines are skipped
+            **kwargs: Extra arguments passed on to the constructor
+
+        Returns:
+            Map of the grid
+        """
+        return cls([line.rstrip("\r\n") for line in text.splitlines() if line.strip()], **kwargs)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "WarehouseMap":
+        """
+        Read a map file: CSV (one cell per field) if it ends in .csv, a text grid otherwise.
+
+        Args:
+            path: Map file
+            **kwargs: Extra arguments passed on to the constructor
+
+        Returns:
+            Map read from the file
+        """
+        with open(path, newline="") as f:
+            if os.path.splitext(path)[1].lower() == ".csv":
+                return cls([row for row in csv.reader(f) if row], **kwargs)
+            return cls.from_text(f.read(), **kwargs)
+
+    def place(self, cell_size: float, origin: Tuple[float, float]):
+        """
+        Lay the grid out with a cell spacing and top-left cell position.
+
+        Args:
+            cell_size: Distance between neighboring cell centres
+            origin: Position of the centre of the top-left cell
+        """
+        self.cell_size = cell_size
+        self.origin = origin
+        cols = self.cols
+        xs = array("d", (origin[0] + (cell % cols) * cell_size for cell in self.cells))
+        ys = array("d", (origin[1] + (cell // cols) * cell_size for cell in self.cells))
+        # Assigned in place so the node view keeps pointing at them
+        self.xs[:] = xs
+        self.ys[:] = ys
+
+    def fit(self, width: float, height: float, margin: float = DEFAULT_MARGIN):
+        """
+        Scale the layout to fit inside an area, e.g. the front-end window.
+
+        Args:
+            width: Width of the area
+            height: Height of the area
+            margin: Empty border left around the grid
+        """
+        x_spacing = (width - 2 * margin) / max(self.cols - 1, 1)
+        y_spacing = (height - 2 * margin) / max(self.rows - 1, 1)
+        self.place(min(x_spacing, y_spacing), (margin, margin))
+
+    def node_at(self, row: int, col: int) -> Optional[int]:
+        """Node of a grid cell, None if the cell is blocked or outside the grid."""
+        if not (0 <= row < self.rows and 0 <= col < self.cols):
+            return None
+        node = self.node_of_cell[row * self.cols + col]
+        return node if node >= 0 else None
+
+    def cell_of(self, node: int) -> Tuple[int, int]:
+        """(row, column) of a node."""
+        return divmod(self.cells[node], self.cols)
+
+    @property
+    def edge_count(self) -> int:
+        """Number of directed edges."""
+        return len(self.targets)
+
+    def one_way_edges(self) -> List[Tuple[int, int]]:
+        """Edges that have no edge back, as (node, neighbor) pairs."""
+        edges = self.edges
+        return [(node, neighbor) for node in edges for neighbor in edges[node] if node not in edges[neighbor]]
+
+    def memory_usage(self) -> int:
+        """Bytes held by the map's arrays."""
+        arrays = (self.cells, self.node_of_cell, self.offsets, self.targets, self.xs, self.ys)
+        return sum(len(values) * values.itemsize for values in arrays)